@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# config.py lives in backend/, next to this package; make it importable once
+# for every app module instead of each module adding the directory again
+_BACKEND_DIR = str(Path(__file__).parent.parent)
+if _BACKEND_DIR not in sys.path:
+    sys.path.insert(0, _BACKEND_DIR)
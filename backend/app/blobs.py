@@ -0,0 +1,281 @@
+"""
+Content-addressed blob storage for student photos and documents.
+
+Every file is written once to disk under its SHA-256 digest. Student rows
+only keep short references ("sha256:<hex>"), and the bytes are served from
+/api/blobs/<hex> with immutable cache headers.
+"""
+import base64
+import binascii
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.models import Blob, Student
+
+# Try to get from config, otherwise use default
+try:
+    from config import BLOB_STORAGE_DIR
+except ImportError:
+    BLOB_STORAGE_DIR = Path(__file__).parent.parent / "blobs"
+
+# Environment variable overrides the config file when set (local runs, benchmarks)
+BLOB_STORAGE_DIR = Path(os.getenv("BLOB_STORAGE_DIR", BLOB_STORAGE_DIR))
+
+BLOB_REF_PREFIX = "sha256:"
+BLOB_URL_PREFIX = "/api/blobs/"
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+_REF_RE = re.compile(r"(?:^sha256:|/api/blobs/)([0-9a-f]{64})$")
+_DATA_URL_RE = re.compile(r"^data:([^;,]*)(;base64)?,", re.IGNORECASE)
+
+
+def is_valid_digest(digest: str) -> bool:
+    """Check that a string looks like a SHA-256 hex digest"""
+    return bool(_DIGEST_RE.match(digest))
+
+
+def blob_path(digest: str) -> Path:
+    """Location of a blob on disk, fanned out by the first two hex characters"""
+    return BLOB_STORAGE_DIR / digest[:2] / digest
+
+
+def blob_url(ref: Optional[str]) -> Optional[str]:
+    """Convert a stored reference ("sha256:<hex>") to its public URL"""
+    if not ref:
+        return None
+    return BLOB_URL_PREFIX + ref[len(BLOB_REF_PREFIX):]
+
+
+def parse_blob_ref(value: str) -> Optional[str]:
+    """
+    Return the digest if the value references an existing blob.
+
+    Accepts the stored form ("sha256:<hex>") as well as the URLs returned by
+    the API, so clients can send back what they received unchanged.
+    """
+    match = _REF_RE.search(value.strip())
+    return match.group(1) if match else None
+
+
+def decode_base64_payload(value: str, content_type: Optional[str] = None) -> Tuple[bytes, str]:
+    """
+    Decode a data URL ("data:image/png;base64,...") or bare base64 string.
+
+    Raises ValueError if the payload is not valid base64.
+    """
+    match = _DATA_URL_RE.match(value)
+    if match:
+        content_type = match.group(1) or content_type
+        value = value[match.end():]
+    try:
+        data = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("Invalid base64 data")
+    return data, content_type or DEFAULT_CONTENT_TYPE
+
+
+def _write_blob_file(digest: str, data: bytes) -> None:
+    """Atomically write blob content unless it is already on disk"""
+    path = blob_path(digest)
+    if path.exists():
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def store_blob(db: Session, data: bytes, content_type: str) -> str:
+    """
+    Store bytes in the blob store and return the reference to keep in the row.
+
+    Identical content is stored once; repeated uploads only return the
+    existing reference.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    _write_blob_file(digest, data)
+    return register_blob(db, digest, content_type, len(data))
+
+
+def register_blob(db: Session, digest: str, content_type: str, size: int) -> str:
+    """Record a blob already written to disk and return its reference"""
+    if db.get(Blob, digest) is None:
+        db.add(Blob(hash=digest, content_type=content_type[:255], size=size))
+        db.flush()
+    return BLOB_REF_PREFIX + digest
+
+
+class BlobWriter:
+    """
+    Write a blob incrementally, hashing it as the chunks arrive.
+
+    The content goes to a temporary file in the blob directory and is moved
+    under its digest by ``finish``; ``discard`` removes it instead. Memory use
+    does not depend on the size of the file.
+    """
+
+    def __init__(self):
+        BLOB_STORAGE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=str(BLOB_STORAGE_DIR), prefix=".tmp-")
+        self._file = os.fdopen(fd, "wb")
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+
+    def finish(self) -> str:
+        """Move the content into the store and return its digest"""
+        self._file.close()
+        digest = self._hash.hexdigest()
+        path = blob_path(digest)
+        if path.exists():
+            os.unlink(self.tmp_path)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self.tmp_path, path)
+        return digest
+
+    def discard(self) -> None:
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.unlink(self.tmp_path)
+
+
+def _resolve_existing(db: Session, value: str) -> Optional[str]:
+    """Return the reference for a value pointing at a known blob"""
+    digest = parse_blob_ref(value)
+    if digest is None:
+        return None
+    if db.get(Blob, digest) is None:
+        raise ValueError("Unknown blob reference")
+    return BLOB_REF_PREFIX + digest
+
+
+def prepare_photo(db: Session, photo: Optional[str]) -> Optional[Union[str, Tuple[bytes, str]]]:
+    """
+    Check a photo without storing anything.
+
+    Returns the reference of an existing blob, or the decoded (bytes,
+    content type) to store. Raises ValueError like ``store_photo``.
+    """
+    if not photo:
+        return None
+    ref = _resolve_existing(db, photo)
+    if ref:
+        return ref
+    return decode_base64_payload(photo, "image/jpeg")
+
+
+def store_photo(db: Session, photo: Optional[str]) -> Optional[str]:
+    """Store a photo (data URL, base64 or existing reference) and return its reference"""
+    prepared = prepare_photo(db, photo)
+    if prepared is None or isinstance(prepared, str):
+        return prepared
+    return store_blob(db, *prepared)
+
+
+def prepare_documents(db: Session, documents: Optional[List[dict]]) -> Optional[List[Tuple[dict, Union[str, bytes]]]]:
+    """
+    Check document uploads without storing anything.
+
+    Returns (document, reference of an existing blob or decoded bytes)
+    pairs. Raises ValueError like ``store_documents``.
+    """
+    if documents is None:
+        return None
+    prepared = []
+    for doc in documents:
+        ref = None
+        if doc.get("url"):
+            ref = _resolve_existing(db, doc["url"])
+        if ref is None and doc.get("data"):
+            ref = _resolve_existing(db, doc["data"])
+            if ref is None:
+                ref, _ = decode_base64_payload(doc["data"], doc.get("type"))
+        if ref is None:
+            raise ValueError(f"Document '{doc.get('name')}' has no data")
+        prepared.append((doc, ref))
+    return prepared
+
+
+def store_documents(db: Session, documents: Optional[List[dict]]) -> Optional[str]:
+    """
+    Store document uploads and return the JSON array of references for the row.
+
+    Each document carries either base64 ``data`` or the ``url`` of a blob
+    returned earlier by the API.
+    """
+    prepared = prepare_documents(db, documents)
+    if prepared is None:
+        return None
+    refs = []
+    for doc, ref in prepared:
+        if isinstance(ref, bytes):
+            ref = store_blob(db, ref, doc.get("type") or DEFAULT_CONTENT_TYPE)
+        refs.append({"name": doc.get("name"), "type": doc.get("type"), "blob": ref})
+    return json.dumps(refs)
+
+
+def documents_to_response(documents: Optional[str]) -> Optional[List[dict]]:
+    """Expand the stored document references into the API representation"""
+    if not documents:
+        return None
+    return [
+        {"name": doc["name"], "type": doc["type"], "url": blob_url(doc["blob"])}
+        for doc in json.loads(documents)
+    ]
+
+
+def migrate_inline_blobs(db: Session, batch_size: int = 100) -> int:
+    """
+    Move base64 photos and documents still stored inline into the blob store.
+
+    Returns the number of student rows rewritten. Values that cannot be
+    decoded are left untouched.
+    """
+    inline_filter = or_(
+        ~Student.photo.like(BLOB_REF_PREFIX + "%"),
+        Student.documents.like('%"data"%'),
+    )
+    migrated = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(Student)
+            .filter(Student.id > last_id, inline_filter)
+            .order_by(Student.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        for student in rows:
+            last_id = student.id
+            try:
+                if student.photo and not student.photo.startswith(BLOB_REF_PREFIX):
+                    student.photo = store_photo(db, student.photo)
+                if student.documents and '"data"' in student.documents:
+                    student.documents = store_documents(db, json.loads(student.documents))
+                migrated += 1
+            except ValueError:
+                continue
+        db.commit()
+    return migrated
@@ -0,0 +1,380 @@
+"""
+Bulk student import, export and cohort updates.
+
+Uploads are parsed incrementally as they stream in (CSV or NDJSON), validated
+with the StudentCreate schema and written in large batches: one query checks
+email uniqueness for a whole batch and one executemany INSERT plus commit
+writes it.
+
+Exports stream rows from the database cursor in fixed-size chunks, so memory
+stays constant whatever the size of the table.
+
+Cohort operations (promote a year, move a class, purge a graduating batch)
+run as one set-based UPDATE or DELETE over the students matching a filter,
+instead of one request per student.
+"""
+import codecs
+import csv
+import io
+import json
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy import case, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.blobs import prepare_documents, prepare_photo, store_documents, store_photo
+from app.database import SessionLocal
+from app.dates import convert_date_string
+from app.fields import FIELD_COLUMNS
+from app.models import Student
+from app.schemas import StudentChanges, StudentCreate, StudentSelection
+from app.serialization import dumps
+from app.thumbnails import schedule_thumbnails
+from app.writer import after_commit
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Rows fetched from the cursor and written out per chunk
+EXPORT_CHUNK_SIZE = 500
+
+# Rows validated, checked and inserted together in one transaction
+IMPORT_BATCH_SIZE = 1000
+
+# Per-row errors kept in the report; the counts stay exact beyond this
+MAX_REPORTED_ERRORS = 1000
+
+# Affected ids listed by a bulk dry run
+DRY_RUN_SAMPLE_SIZE = 20
+
+
+def detect_format(format: Optional[str], content_type: Optional[str]) -> str:
+    """Pick the import format from the query parameter or the Content-Type"""
+    if format:
+        if format not in IMPORT_FORMATS:
+            raise ValueError(f"Invalid format '{format}'. Allowed: {', '.join(IMPORT_FORMATS)}")
+        return format
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonlines"):
+        return "ndjson"
+    raise ValueError("Cannot detect the import format; pass format=csv or format=ndjson")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a streamed UTF-8 body into lines without buffering the whole body"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        try:
+            pending += decoder.decode(chunk)
+        except UnicodeDecodeError as e:
+            # Hand out the complete lines before the invalid byte, then fail
+            *lines, _ = (pending + e.object[:e.start].decode("utf-8")).split("\n")
+            for line in lines:
+                yield line
+            raise
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[dict]:
+    """
+    Parse CSV records from streamed lines, using the first record as header.
+
+    A record can span several lines when a quoted field contains newlines;
+    lines are joined until the quotes balance.
+    """
+    header = None
+    buffer = ""
+    async for line in lines:
+        buffer = f"{buffer}\n{line}" if buffer else line
+        if buffer.count('"') % 2:
+            continue
+        record, buffer = buffer, ""
+        if not record.strip():
+            continue
+        try:
+            values = next(csv.reader([record]))
+        except csv.Error as e:
+            raise ValueError(f"Invalid CSV: {e}")
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        # Empty cells mean "not provided" so schema defaults apply
+        yield {key: value for key, value in zip(header, values) if value != ""}
+    if buffer.strip():
+        raise ValueError("Unterminated quoted field at end of CSV")
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[object]:
+    """Parse one JSON object per non-empty line; bad lines are yielded as errors"""
+    async for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ImportLineError(f"Invalid JSON: {e}")
+
+
+class ImportLineError:
+    """Placeholder for a line that could not be parsed into a record"""
+
+    def __init__(self, message: str):
+        self.message = message
+
+
+def _validation_errors(error: ValidationError) -> List[dict]:
+    return [
+        {"field": ".".join(str(part) for part in item["loc"]) or None, "message": item["msg"]}
+        for item in error.errors()
+    ]
+
+
+class ImportReport:
+    """Running totals and per-row errors of one import"""
+
+    def __init__(self, format: str, dry_run: bool):
+        self.format = format
+        self.dry_run = dry_run
+        self.total = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        self.seen_emails: Set[str] = set()
+        # Set when the upload could not be read to the end
+        self.stream_error: Optional[str] = None
+
+    def add_error(self, row: int, errors: List[dict]) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "errors": errors})
+
+    def to_dict(self) -> dict:
+        return {
+            "format": self.format,
+            "dryRun": self.dry_run,
+            "total": self.total,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errorsTruncated": self.failed > len(self.errors),
+            "complete": self.stream_error is None,
+            "streamError": self.stream_error,
+        }
+
+
+def _to_row(db: Session, student: StudentCreate, dry_run: bool) -> Dict:
+    """Map a validated record to Student column values"""
+    documents = [doc.model_dump() for doc in student.documents] if student.documents else None
+    photo_ref, documents_json = None, None
+    if dry_run:
+        # Same decoding and reference checks, without writing files or blob rows
+        prepare_photo(db, student.photo)
+        prepare_documents(db, documents)
+    else:
+        photo_ref = store_photo(db, student.photo)
+        documents_json = store_documents(db, documents)
+    return {
+        "first_name": student.firstName,
+        "last_name": student.lastName,
+        "email": student.email,
+        "enrollment_year": student.enrollmentYear,
+        "dob": convert_date_string(student.dob),
+        "major": student.major,
+        "class_name": student.class_,
+        "year": student.year,
+        "photo": photo_ref,
+        "documents": documents_json,
+    }
+
+
+def import_batch(db: Session, batch: List[Tuple[int, object]], report: ImportReport) -> None:
+    """
+    Validate and insert one batch of (row number, record) pairs.
+
+    Email uniqueness is checked for the whole batch with a single query, and
+    all valid rows are inserted with one executemany and one commit.
+    """
+    valid: List[Tuple[int, StudentCreate]] = []
+    for row_number, record in batch:
+        report.total += 1
+        if isinstance(record, ImportLineError):
+            report.add_error(row_number, [{"field": None, "message": record.message}])
+            continue
+        try:
+            valid.append((row_number, StudentCreate.model_validate(record)))
+        except ValidationError as e:
+            report.add_error(row_number, _validation_errors(e))
+
+    emails = [student.email for _, student in valid]
+    existing = set(db.scalars(select(Student.email).where(Student.email.in_(emails)))) if emails else set()
+
+    rows = []
+    for row_number, student in valid:
+        if student.email in existing or student.email in report.seen_emails:
+            report.add_error(row_number, [{"field": "email", "message": "Email already registered"}])
+            continue
+        try:
+            rows.append(_to_row(db, student, report.dry_run))
+        except ValueError as e:
+            report.add_error(row_number, [{"field": None, "message": str(e)}])
+            continue
+        report.seen_emails.add(student.email)
+
+    if rows and not report.dry_run:
+        db.execute(insert(Student), rows)
+        db.commit()
+
+    def committed():
+        report.imported += len(rows)
+        if not report.dry_run:
+            schedule_thumbnails(row["photo"] for row in rows)
+
+    after_commit(db, committed)
+
+
+def export_rows(
+    fields: List[str],
+    to_dict: Callable,
+    year: Optional[str] = None,
+    class_name: Optional[str] = None,
+) -> Iterator[List[dict]]:
+    """
+    Yield lists of serialized students, EXPORT_CHUNK_SIZE rows at a time.
+
+    Only the columns behind ``fields`` are selected, and rows are pulled from
+    the cursor with yield_per instead of being loaded all at once. The
+    generator owns its session because it runs after the request handler
+    has returned.
+    """
+    columns = [getattr(Student, FIELD_COLUMNS[field]) for field in fields]
+    query = select(*columns).order_by(Student.id)
+    if year:
+        query = query.where(Student.year == year)
+    if class_name:
+        query = query.where(Student.class_name == class_name)
+
+    db = SessionLocal()
+    try:
+        result = db.execute(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        for rows in result.partitions():
+            yield [to_dict(row, fields) for row in rows]
+    finally:
+        db.close()
+
+
+def stream_export(format: str, fields: List[str], chunks: Iterator[List[dict]]) -> Iterator[Union[bytes, str]]:
+    """Encode chunks of serialized students as NDJSON lines or CSV rows"""
+    if format == "ndjson":
+        for chunk in chunks:
+            yield b"".join(dumps(item) + b"\n" for item in chunk)
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for chunk in chunks:
+        for item in chunk:
+            # Nested values (documents) are written as JSON text
+            writer.writerow([
+                json.dumps(item[field]) if isinstance(item[field], (list, dict)) else item[field]
+                for field in fields
+            ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def selection_criteria(selection: StudentSelection) -> list:
+    """
+    WHERE clauses of a bulk selection.
+
+    Raises ValueError for an empty filter, so a bulk request cannot touch
+    every student by omission.
+    """
+    criteria = []
+    if selection.ids is not None:
+        criteria.append(Student.id.in_(selection.ids))
+    if selection.year is not None:
+        criteria.append(Student.year == selection.year)
+    if selection.class_ is not None:
+        criteria.append(Student.class_name == selection.class_)
+    if selection.enrollmentYear is not None:
+        criteria.append(Student.enrollment_year == selection.enrollmentYear)
+    if not criteria:
+        raise ValueError("filter needs at least one of ids, year, class, enrollmentYear")
+    return criteria
+
+
+def change_values(changes: StudentChanges) -> Dict:
+    """Column values of a bulk change set; raises ValueError if it is empty or clears a required field"""
+    values = {}
+    for field, value in changes.model_dump(exclude_unset=True).items():
+        field = "class" if field == "class_" else field
+        column = getattr(Student, FIELD_COLUMNS[field])
+        if value is None and not column.nullable:
+            raise ValueError(f"{field} cannot be null")
+        values[column.key] = value
+    if not values:
+        raise ValueError("changes needs at least one of year, class, major, enrollmentYear")
+    return values
+
+
+def _sample_ids(db: Session, criteria: list) -> List[int]:
+    return list(db.scalars(select(Student.id).where(*criteria).order_by(Student.id).limit(DRY_RUN_SAMPLE_SIZE)))
+
+
+def bulk_update(db: Session, selection: StudentSelection, changes: StudentChanges, dry_run: bool) -> Dict:
+    """
+    Set the changed fields on every selected student with one UPDATE.
+
+    Students already holding the new values are left alone, so their version
+    and ETags stay valid; the rest get a new version like a single update.
+    """
+    criteria = selection_criteria(selection)
+    values = change_values(changes)
+    differs = or_(*(getattr(Student, key).is_distinct_from(value) for key, value in values.items()))
+
+    matched, affected = db.execute(
+        select(func.count(), func.coalesce(func.sum(case((differs, 1), else_=0)), 0)).where(*criteria)
+    ).one()
+    result = {"dryRun": dry_run, "matched": matched, "affected": affected}
+    if dry_run:
+        result["sampleIds"] = _sample_ids(db, criteria + [differs])
+        return result
+
+    statement = (
+        update(Student)
+        .where(*criteria, differs)
+        .values({**values, "version": Student.version + 1})
+        .execution_options(synchronize_session=False)
+    )
+    result["affected"] = db.execute(statement).rowcount
+    db.commit()
+    return result
+
+
+def bulk_delete(db: Session, selection: StudentSelection, dry_run: bool) -> Dict:
+    """Delete every selected student with one DELETE"""
+    criteria = selection_criteria(selection)
+    if dry_run:
+        matched = db.scalar(select(func.count()).select_from(Student).where(*criteria))
+        return {"dryRun": True, "matched": matched, "affected": matched, "sampleIds": _sample_ids(db, criteria)}
+
+    deleted = db.execute(delete(Student).where(*criteria).execution_options(synchronize_session=False)).rowcount
+    db.commit()
+    return {"dryRun": False, "matched": deleted, "affected": deleted}
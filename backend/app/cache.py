@@ -0,0 +1,145 @@
+"""
+In-process read-through cache for serialized student responses.
+
+Entries hold the encoded JSON body plus any extra headers, bounded by an
+entry count, a byte budget (LRU eviction) and a TTL. Keys embed the row
+version (by-id lookups) or the collection version (lists), both read from
+the database on every request, so a write committed by another worker
+process changes the key and a stale entry is never served. Writes in this
+process also drop the affected entries right away to free their memory.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+# Try to get from config, otherwise use defaults
+try:
+    from config import CACHE_ENABLED, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_TTL_SECONDS
+except ImportError:
+    CACHE_ENABLED = True
+    CACHE_MAX_ENTRIES = 1024
+    CACHE_MAX_BYTES = 32 * 1024 * 1024
+    CACHE_TTL_SECONDS = 300
+
+
+class CachedResponse:
+    __slots__ = ("body", "headers", "expires_at")
+
+    def __init__(self, body: bytes, headers: Dict[str, str], expires_at: float):
+        self.body = body
+        self.headers = headers
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """Thread-safe LRU + TTL cache with a memory budget and hit/miss counters"""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float, enabled: bool = True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: Hashable, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        # Anything over a quarter of the budget would flush most other entries
+        if not self.enabled or len(body) > self.max_bytes // 4:
+            return
+        entry = CachedResponse(body, headers or {}, time.monotonic() + self.ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, predicate) -> int:
+        """Drop every entry whose key satisfies the predicate"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxEntries": self.max_entries,
+                "maxBytes": self.max_bytes,
+                "ttlSeconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+
+
+student_cache = ResponseCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_TTL_SECONDS, enabled=CACHE_ENABLED)
+
+
+def student_key(student_id: int, version: int, fields) -> tuple:
+    return ("student", student_id, version, tuple(fields))
+
+
+def list_key(etag: str) -> tuple:
+    # List ETags already encode the collection version and every query parameter
+    return ("list", etag)
+
+
+def invalidate_student(student_id: int) -> None:
+    """Drop cached representations of one student and every cached list"""
+    student_cache.invalidate(
+        lambda key: key[0] == "list" or (key[0] == "student" and key[1] == student_id)
+    )
+
+
+def invalidate_lists() -> None:
+    """Drop every cached list (rows were added or removed)"""
+    student_cache.invalidate(lambda key: key[0] == "list")
+
+
+def invalidate_students() -> None:
+    """Drop every cached student and list (bulk writes)"""
+    student_cache.invalidate(lambda key: key[0] in ("student", "list"))
@@ -0,0 +1,221 @@
+"""
+Response compression.
+
+``GZipMiddleware`` gzips text responses (JSON, NDJSON/CSV exports, HTML,
+metrics) of at least GZIP_MIN_SIZE bytes, including streamed ones. Images and
+other already-compressed types, small bodies, and responses that already
+have a Content-Encoding (precompressed assets) are passed through untouched.
+A compressed response carries ``Vary: Accept-Encoding`` and its own strong
+ETag: the gzip body is a different representation from the identity one, so
+GZIP_ETAG_SUFFIX is added inside the quotes ("student-1-v3-gzip"). The
+validators in app.versioning strip the suffix, and a 304 answering the gzip
+ETag is sent back with that ETag, so it matches what the client cached.
+
+Frontend assets are compressed once, at deploy time, instead of per request:
+
+    python -m app.compression assets    # writes .gz (and .br with Brotli) next to each asset
+
+Brotli variants need the optional ``brotli`` package.
+"""
+import gzip
+import importlib.util
+import sys
+import zlib
+from pathlib import Path
+from typing import Iterable, List
+
+from app.versioning import GZIP_ETAG_SUFFIX
+
+# Try to get from config, otherwise use defaults
+try:
+    from config import GZIP_ENABLED, GZIP_MIN_SIZE, GZIP_LEVEL
+except ImportError:
+    GZIP_ENABLED = True
+    GZIP_MIN_SIZE = 1024
+    GZIP_LEVEL = 5
+
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+}
+
+# Precompressed variants, in order of preference: encoding -> file suffix
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# Asset files worth precompressing
+ASSET_EXTENSIONS = {".js", ".css", ".html", ".svg", ".json", ".txt", ".map"}
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES
+
+
+def accepted_encodings(accept_encoding: str) -> List[str]:
+    """Content codings listed in an Accept-Encoding header (without q=0)"""
+    encodings = []
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            encodings.append(coding.strip())
+    return encodings
+
+
+def _header(headers: list, name: bytes) -> bytes:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return b""
+
+
+def gzip_etag(etag: bytes) -> bytes:
+    """ETag of the gzipped representation: the suffix goes inside the quotes"""
+    if not etag.endswith(b'"'):
+        return etag
+    return etag[:-1] + GZIP_ETAG_SUFFIX.encode() + b'"'
+
+
+def _replace_header(headers: list, name: bytes, value: bytes) -> list:
+    return [(key, value if key.lower() == name else current) for key, current in headers]
+
+
+class GZipMiddleware:
+    """Plain ASGI middleware gzipping large text responses (see module docstring)"""
+
+    def __init__(self, app, minimum_size: int = GZIP_MIN_SIZE, level: int = GZIP_LEVEL):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        if_none_match = b""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+            elif key == b"if-none-match":
+                if_none_match = value
+        if "gzip" not in accepted_encodings(accept):
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                passthrough = (
+                    message["status"] < 200 or message["status"] in (204, 206, 304)
+                    or _header(headers, b"content-encoding")
+                    or not is_compressible(_header(headers, b"content-type").decode("latin-1"))
+                )
+                etag = _header(headers, b"etag")
+                if message["status"] == 304 and etag and gzip_etag(etag) in if_none_match:
+                    # The client revalidated the gzipped body; confirm that representation
+                    message = {**message, "headers": _replace_header(headers, b"etag", gzip_etag(etag))}
+                if passthrough:
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows whether it is worth compressing
+                    start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)  # 31: gzip container
+                headers = [(key, value) for key, value in start.get("headers", []) if key.lower() != b"content-length"]
+                headers.append((b"content-encoding", b"gzip"))
+                etag = _header(headers, b"etag")
+                if etag:
+                    headers = _replace_header(headers, b"etag", gzip_etag(etag))
+                vary = _header(headers, b"vary")
+                if vary:
+                    headers = [(key, value) for key, value in headers if key.lower() != b"vary"]
+                    headers.append((b"vary", vary + b", Accept-Encoding"))
+                else:
+                    headers.append((b"vary", b"Accept-Encoding"))
+                if not more_body:
+                    data = compressor.compress(body) + compressor.flush()
+                    headers.append((b"content-length", str(len(data)).encode()))
+                    await send({**start, "headers": headers})
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                await send({**start, "headers": headers})
+
+            # Streamed responses: flush each chunk so the client sees progress
+            data = compressor.compress(body)
+            data += compressor.flush() if not more_body else compressor.flush(zlib.Z_SYNC_FLUSH)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _stale(source: Path, target: Path) -> bool:
+    return not target.exists() or target.stat().st_mtime < source.stat().st_mtime
+
+
+def precompress_assets(directory: Path, minimum_size: int = GZIP_MIN_SIZE, force: bool = False) -> Iterable[Path]:
+    """Write .gz (and .br) variants of the text assets under a directory; yields the files written"""
+    for source in sorted(directory.rglob("*")):
+        if not source.is_file() or source.suffix not in ASSET_EXTENSIONS or source.stat().st_size < minimum_size:
+            continue
+        data = None
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+            if encoding == "br" and not BROTLI_AVAILABLE:
+                continue
+            target = source.with_name(source.name + suffix)
+            if not force and not _stale(source, target):
+                continue
+            data = source.read_bytes() if data is None else data
+            if encoding == "br":
+                import brotli
+                compressed = brotli.compress(data, quality=11)
+            else:
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            # Only worth serving if it is actually smaller
+            if len(compressed) < len(data):
+                target.write_bytes(compressed)
+                yield target
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Response compression")
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("assets", help="precompress the built frontend assets")
+    command.add_argument("directory", nargs="?", default=str(Path(__file__).parent / "static"),
+                         help="asset directory (default: app/static)")
+    command.add_argument("--force", action="store_true", help="rewrite existing variants")
+    args = parser.parse_args()
+
+    directory = Path(args.directory)
+    if not directory.is_dir():
+        sys.exit(f"{directory} does not exist; build the frontend first")
+    written = list(precompress_assets(directory, force=args.force))
+    for path in written:
+        print(f"  {path.relative_to(directory)} ({path.stat().st_size} bytes)")
+    print(f"wrote {len(written)} compressed file(s){'' if BROTLI_AVAILABLE else ' (install brotli for .br variants)'}")
+
+
+if __name__ == "__main__":
+    main()
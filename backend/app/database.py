@@ -1,15 +1,21 @@
-from sqlalchemy import create_engine
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 import os
+import time
 from pathlib import Path
+from typing import Callable, TypeVar, Union
+
+from app.diagnostics import profiled
+from app.metrics import observe_pool_wait
+from app.writer import WriteQueue
 
 # Database URL - using SQLite for simplicity
 # Use absolute path for GoDaddy compatibility
 # Try to get from config, otherwise use default
 try:
-    import sys
-    sys.path.insert(0, str(Path(__file__).parent.parent))
     from config import DATABASE_URL
 except ImportError:
     # Fallback: use default path
@@ -17,15 +23,181 @@ except ImportError:
     DATABASE_PATH = BASE_DIR / "students.db"
     DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
 
+try:
+    from config import DB_PROFILE, DB_PROFILE_OVERRIDES
+except ImportError:
+    DB_PROFILE = "performance"
+    DB_PROFILE_OVERRIDES = {}
+
+try:
+    from config import DB_ASYNC
+except ImportError:
+    DB_ASYNC = False
+
+try:
+    from config import WRITE_QUEUE_ENABLED
+except ImportError:
+    WRITE_QUEUE_ENABLED = True
+
+# Environment variables override the config file when set (local runs, benchmarks)
+DATABASE_URL = os.getenv("DATABASE_URL", DATABASE_URL)
+if os.getenv("DB_ASYNC"):
+    DB_ASYNC = os.getenv("DB_ASYNC").lower() in ("1", "true", "yes")
+if os.getenv("WRITE_QUEUE_ENABLED"):
+    WRITE_QUEUE_ENABLED = os.getenv("WRITE_QUEUE_ENABLED").lower() in ("1", "true", "yes")
+
+T = TypeVar("T")
+
+# Engine profiles: SQLite pragmas applied to every new connection, busy
+# handling and pool sizing. "legacy" reproduces the SQLite defaults
+# (rollback journal, no busy wait) for comparison.
+ENGINE_PROFILES = {
+    "legacy": {
+        "pragmas": {},
+        "busy_timeout_ms": 0,
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+    },
+    "performance": {
+        "pragmas": {
+            # Readers no longer block the writer (and vice versa); the mode is
+            # stored in the database file, so every worker shares it
+            "journal_mode": "WAL",
+            # In WAL mode NORMAL only fsyncs at checkpoints and stays corruption-safe
+            "synchronous": "NORMAL",
+            "cache_size": -64000,  # negative = KiB, i.e. 64 MB page cache per connection
+            "mmap_size": 268435456,  # 256 MB memory-mapped reads
+            "temp_store": "MEMORY",
+        },
+        # Wait for the write lock instead of failing with "database is locked"
+        "busy_timeout_ms": 5000,
+        "pool_size": 8,
+        "max_overflow": 8,
+        "pool_timeout": 10,
+    },
+}
+
+
+def get_engine_profile(name: str = DB_PROFILE, overrides: dict = None) -> dict:
+    """Resolve a profile by name and apply overrides (pragmas are merged)"""
+    if name not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE '{name}'. Available: {', '.join(ENGINE_PROFILES)}")
+    profile = dict(ENGINE_PROFILES[name])
+    overrides = dict(overrides or {})
+    profile["pragmas"] = {**profile["pragmas"], **overrides.pop("pragmas", {})}
+    profile.update(overrides)
+    return profile
+
+
+class _TimedCheckout:
+    """Pool mixin reporting how long each checkout waited for a connection"""
+
+    # Keep pool log records under SQLAlchemy's logger, not app.database
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.QueuePool"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            observe_pool_wait(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+def _install_pragmas(sync_engine, profile: dict) -> None:
+    """Apply the busy timeout and profile pragmas to every new connection"""
+    busy_timeout_ms = profile["busy_timeout_ms"]
+
+    @event.listens_for(sync_engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+            for name, value in profile["pragmas"].items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+
+def _connect_args(profile: dict) -> dict:
+    return {
+        "check_same_thread": False,  # Needed for SQLite
+        "timeout": profile["busy_timeout_ms"] / 1000,  # sqlite3's busy handler
+    }
+
+
+def create_db_engine(url: str = DATABASE_URL, profile_name: str = DB_PROFILE, overrides: dict = None):
+    """Create a SQLite engine configured with the given profile"""
+    profile = get_engine_profile(profile_name, overrides)
+
+    db_engine = create_engine(
+        url,
+        connect_args=_connect_args(profile),
+        poolclass=TimedQueuePool,
+        pool_size=profile["pool_size"],
+        max_overflow=profile["max_overflow"],
+        pool_timeout=profile["pool_timeout"],
+    )
+    _install_pragmas(db_engine, profile)
+    return db_engine
+
+
+def async_database_url(url: str) -> str:
+    """sqlite:///path -> sqlite+aiosqlite:///path"""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    return url
+
+
+def create_async_db_engine(url: str = DATABASE_URL, profile_name: str = DB_PROFILE, overrides: dict = None):
+    """Create an aiosqlite engine with the same profile as the sync engine"""
+    try:
+        import aiosqlite  # noqa: F401
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from sqlalchemy.pool import AsyncAdaptedQueuePool
+    except ImportError as e:
+        raise ImportError("DB_ASYNC requires the aiosqlite package (pip install aiosqlite)") from e
+
+    class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+        pass
+
+    profile = get_engine_profile(profile_name, overrides)
+    db_engine = create_async_engine(
+        async_database_url(url),
+        connect_args=_connect_args(profile),
+        poolclass=TimedAsyncAdaptedQueuePool,
+        pool_size=profile["pool_size"],
+        max_overflow=profile["max_overflow"],
+        pool_timeout=profile["pool_timeout"],
+    )
+    _install_pragmas(db_engine.sync_engine, profile)
+    return db_engine
+
+
 # Create engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+engine = create_db_engine(DATABASE_URL, DB_PROFILE, DB_PROFILE_OVERRIDES)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The process's writer (app/writer.py) and its single connection; route
+# handlers send mutations there with Database.write
+writer_engine = create_db_engine(DATABASE_URL, DB_PROFILE, {**DB_PROFILE_OVERRIDES, "pool_size": 1, "max_overflow": 0})
+write_queue = WriteQueue(writer_engine)
+
+# Async engine, only created when DB_ASYNC is enabled
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = create_async_db_engine(DATABASE_URL, DB_PROFILE, DB_PROFILE_OVERRIDES)
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False)
+
 # Create Base class for models
 Base = declarative_base()
 
@@ -37,3 +209,90 @@ def get_db():
     finally:
         db.close()
 
+
+class SyncDatabase:
+    """
+    Runs session work for async handlers on the threadpool.
+
+    Each ``run`` is one thread hop with a regular sync Session, which is
+    what FastAPI did for the old ``def`` handlers. The session is closed on
+    the same thread when the work is done: waiting for a threadpool thread
+    just to return the connection could deadlock once every thread is
+    blocked waiting for a connection.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def _call(self, fn, args, kwargs):
+        try:
+            return fn(self.session, *args, **kwargs)
+        finally:
+            self.session.close()
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        return await run_in_threadpool(self._call, profiled(fn), args, kwargs)
+
+    async def write(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Like run, for work that writes: applied by the process's writer in a group commit"""
+        if not WRITE_QUEUE_ENABLED:
+            return await self.run(fn, *args, **kwargs)
+        return await write_queue.submit(profiled(fn), *args, **kwargs)
+
+    async def close(self) -> None:
+        # Nothing is left to release after run(); closing is cheap and thread-safe here
+        self.session.close()
+
+
+class AsyncDatabase:
+    """
+    Runs session work for async handlers on the aiosqlite engine.
+
+    ``run`` hands a sync Session view to the function through
+    AsyncSession.run_sync: queries await the driver on the event loop
+    instead of holding a threadpool thread, so in-flight requests are only
+    bounded by the connection pool. The connection goes back to the pool
+    as soon as the work is done.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        try:
+            return await self.session.run_sync(profiled(fn), *args, **kwargs)
+        finally:
+            await self.session.close()
+
+    async def write(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Like run, for work that writes: applied by the process's writer in a group commit"""
+        if not WRITE_QUEUE_ENABLED:
+            return await self.run(fn, *args, **kwargs)
+        return await write_queue.submit(profiled(fn), *args, **kwargs)
+
+    async def close(self) -> None:
+        await self.session.close()
+
+
+Database = Union[SyncDatabase, AsyncDatabase]
+
+
+# Async dependency: the same query code runs on either engine (DB_ASYNC)
+async def get_database():
+    if DB_ASYNC:
+        database = AsyncDatabase(AsyncSessionLocal())
+    else:
+        database = SyncDatabase(SessionLocal())
+    try:
+        yield database
+    finally:
+        await database.close()
+
+
+async def dispose_engines() -> None:
+    """Finish queued writes, then close pooled connections of every engine"""
+    await run_in_threadpool(write_queue.close)
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
+    writer_engine.dispose()
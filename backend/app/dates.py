@@ -0,0 +1,15 @@
+"""
+Date parsing shared by the student routes and the bulk import.
+"""
+from datetime import date, datetime
+from typing import Optional
+
+
+def convert_date_string(date_str: Optional[str]) -> Optional[date]:
+    """Convert a YYYY-MM-DD string to a date, or None if it is empty or invalid"""
+    if not date_str:
+        return None
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,228 @@
+"""
+On-demand request profiling and slow-query log.
+
+Profiling (PROFILING_ENABLED): a request sent with ``X-Profile: 1`` (or
+``?profile=1``) runs its database work - queries, row loading and response
+encoding, i.e. everything handlers pass to ``Database.run`` - under cProfile.
+The profile is saved in PROFILE_DIR as a pstats file (``python -m pstats
+<file>``, snakeviz) named in the ``X-Profile-File`` response header.
+``X-Profile: text`` returns the top of the report instead of the response.
+One request is profiled at a time; others asking meanwhile get
+``X-Profile: busy``. On the async engine the profile also contains whatever
+else the event loop runs while a statement waits for the driver.
+
+Slow-query log: statements whose execution takes longer than SLOW_QUERY_MS
+are logged as ``db.slow_query`` warnings with the SQL, parameters (bytes
+replaced by their size, long strings truncated), duration and the SQLite
+``EXPLAIN QUERY PLAN`` output. Rows fetched after execution are not timed.
+"""
+import io
+import logging
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, List, Optional, TypeVar
+from urllib.parse import parse_qs
+
+from sqlalchemy import event
+
+from app.log import MAX_LIST_ITEMS, get_logger, log_event
+
+# Try to get from config, otherwise use defaults
+try:
+    from config import PROFILING_ENABLED, PROFILE_DIR, SLOW_QUERY_MS, SLOW_QUERY_EXPLAIN
+except ImportError:
+    PROFILING_ENABLED = False
+    PROFILE_DIR = Path(__file__).parent.parent / "profiles"
+    SLOW_QUERY_MS = 200
+    SLOW_QUERY_EXPLAIN = True
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "profile"
+
+# Lines of the text report, sorted by cumulative time
+PROFILE_TEXT_LINES = 40
+
+# Statements that EXPLAIN QUERY PLAN can describe
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+
+T = TypeVar("T")
+
+logger = get_logger("diagnostics")
+
+# cProfile allows one active profiler per thread (per process on 3.12+)
+_profile_lock = threading.Lock()
+
+
+class RequestProfile:
+    """cProfile profiler shared by every Database.run of one request"""
+
+    def __init__(self):
+        # Imported here: only profiled requests need the profiler
+        import cProfile
+        self.profiler = cProfile.Profile()
+        self.runs = 0
+
+    def wrap(self, fn: Callable[..., T]) -> Callable[..., T]:
+        def run(*args, **kwargs):
+            self.runs += 1
+            return self.profiler.runcall(fn, *args, **kwargs)
+        return run
+
+    def report(self, lines: int = PROFILE_TEXT_LINES) -> str:
+        import pstats
+        stream = io.StringIO()
+        pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(lines)
+        return stream.getvalue()
+
+
+# Set by ProfilingMiddleware for the request being profiled
+_active_profile: ContextVar[Optional[RequestProfile]] = ContextVar("active_profile", default=None)
+
+
+def profiled(fn: Callable[..., T]) -> Callable[..., T]:
+    """``fn``, run under the current request's profiler if it is being profiled"""
+    profile = _active_profile.get()
+    return fn if profile is None else profile.wrap(fn)
+
+
+def requested_mode(scope: dict) -> Optional[str]:
+    """"text", "store" or None, from the X-Profile header or ?profile= flag"""
+    value = None
+    for name, header_value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            value = header_value.decode("latin-1")
+            break
+    if value is None and scope.get("query_string"):
+        values = parse_qs(scope["query_string"].decode("latin-1")).get(PROFILE_QUERY_PARAM)
+        value = values[0] if values else None
+    if value is None:
+        return None
+    value = value.strip().lower()
+    if value == "text":
+        return "text"
+    if value in ("1", "true", "yes", "store"):
+        return "store"
+    return None
+
+
+def _with_headers(send, headers: Callable[[], list]):
+    """Wrap ``send`` to add headers, computed when the response starts"""
+    async def send_with_headers(message):
+        if message["type"] == "http.response.start":
+            message["headers"] = list(message.get("headers", [])) + headers()
+        await send(message)
+    return send_with_headers
+
+
+class ProfilingMiddleware:
+    """Plain ASGI middleware profiling requests that ask for it (see module docstring)"""
+
+    def __init__(self, app, profile_dir: Path = PROFILE_DIR):
+        self.app = app
+        self.profile_dir = Path(profile_dir)
+
+    async def __call__(self, scope, receive, send):
+        mode = requested_mode(scope) if scope["type"] == "http" else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        if not _profile_lock.acquire(blocking=False):
+            await self.app(scope, receive, _with_headers(send, lambda: [(PROFILE_HEADER, b"busy")]))
+            return
+
+        profile = RequestProfile()
+        token = _active_profile.set(profile)
+        try:
+            if mode == "text":
+                await self._respond_with_report(profile, scope, receive, send)
+            else:
+                await self._store(profile, scope, receive, send)
+        finally:
+            _active_profile.reset(token)
+            _profile_lock.release()
+
+    async def _respond_with_report(self, profile: RequestProfile, scope, receive, send):
+        status_code = 500
+
+        async def discard(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        started = time.perf_counter()
+        await self.app(scope, receive, discard)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        text = f"{scope['method']} {scope['path']} -> {status_code} in {elapsed_ms:.1f} ms\n\n"
+        text += profile.report() if profile.runs else "No database work was run for this request.\n"
+        body = text.encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/plain; charset=utf-8"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def _store(self, profile: RequestProfile, scope, receive, send):
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{scope['method']}-{uuid.uuid4().hex[:8]}.prof"
+        # Handlers finish their database work before the response starts,
+        # so whether there is a profile to save is known by then
+        await self.app(scope, receive, _with_headers(
+            send, lambda: [(b"x-profile-file", name.encode())] if profile.runs else [(PROFILE_HEADER, b"empty")],
+        ))
+        if not profile.runs:
+            return
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        profile.profiler.dump_stats(str(self.profile_dir / name))
+        log_event(logger, "profile.saved", route=f"{scope['method']} {scope['path']}", file=name)
+
+
+def query_plan(conn, statement: str, parameters) -> Optional[List[str]]:
+    """SQLite EXPLAIN QUERY PLAN of a statement, indented by nesting level"""
+    if not statement.lstrip()[:7].upper().startswith(EXPLAINABLE):
+        return None
+    # Run on the DBAPI connection so the lookup does not fire engine events
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        depths = {}
+        plan = []
+        for node_id, parent, _, detail in cursor.fetchall():
+            depths[node_id] = depths.get(parent, -1) + 1
+            plan.append("  " * depths[node_id] + detail)
+        return plan
+    except Exception:
+        return None
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._slow_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - context._slow_query_started) * 1000
+    if duration_ms < SLOW_QUERY_MS:
+        return
+    fields = {"sql": statement, "duration_ms": round(duration_ms, 2)}
+    if executemany:
+        fields["rows"] = len(parameters)
+        fields["parameters"] = list(parameters[:MAX_LIST_ITEMS])
+        first = parameters[0] if parameters else ()
+    else:
+        fields["parameters"] = parameters
+        first = parameters
+    if SLOW_QUERY_EXPLAIN:
+        fields["plan"] = query_plan(conn, statement, first)
+    log_event(logger, "db.slow_query", level=logging.WARNING, **fields)
+
+
+def log_slow_queries(sync_engine) -> None:
+    """Log slow statements run on an engine (pass engine.sync_engine for async engines)"""
+    if SLOW_QUERY_MS is None:
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,75 @@
+"""
+Sparse fieldsets for student read endpoints.
+
+Clients pass ``fields=`` either as a named projection (summary, roster, full)
+or as a comma-separated list of response field names. Only the columns behind
+the requested fields are loaded; every other column is deferred with
+raiseload, so an accidental access fails loudly instead of reading it.
+"""
+from typing import Iterable, List, Optional
+
+from sqlalchemy.orm import load_only
+
+from app.models import Student
+
+# Response field -> model attribute it is built from
+FIELD_COLUMNS = {
+    "id": "id",
+    "firstName": "first_name",
+    "lastName": "last_name",
+    "email": "email",
+    "enrollmentYear": "enrollment_year",
+    "dob": "dob",
+    "major": "major",
+    "class": "class_name",
+    "year": "year",
+    "photo": "photo",
+    "thumbnail": "photo",  # URL derived from the photo reference
+    "documents": "documents",
+}
+
+ALL_FIELDS = list(FIELD_COLUMNS)
+
+PROJECTIONS = {
+    "full": ALL_FIELDS,
+    # Lists show avatars: the thumbnail, not the full photo
+    "summary": [field for field in ALL_FIELDS if field not in ("photo", "documents")],
+    "roster": ["id", "firstName", "lastName", "class", "year"],
+}
+
+
+def resolve_fields(fields: Optional[str]) -> List[str]:
+    """
+    Turn the ``fields`` query parameter into an ordered list of response fields.
+
+    Raises ValueError for unknown projections or field names.
+    """
+    if not fields:
+        return ALL_FIELDS
+    fields = fields.strip()
+    if fields in PROJECTIONS:
+        return PROJECTIONS[fields]
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(FIELD_COLUMNS)
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(sorted(unknown))}. "
+            f"Use a projection ({', '.join(PROJECTIONS)}) or any of: {', '.join(ALL_FIELDS)}"
+        )
+    # Keep the canonical order and always include the id
+    return [field for field in ALL_FIELDS if field in requested or field == "id"]
+
+
+def load_fields(fields: List[str], extra_columns: Iterable = ()):
+    """
+    Loader option restricting a Student query to the columns behind ``fields``.
+
+    ``extra_columns`` are model attributes needed besides the response fields,
+    such as the columns of a pagination sort key. Returns None when every
+    column is requested.
+    """
+    if fields is ALL_FIELDS:
+        return None
+    columns = {FIELD_COLUMNS[field] for field in fields}
+    columns.update(column.key for column in extra_columns)
+    return load_only(*(getattr(Student, name) for name in sorted(columns)), raiseload=True)
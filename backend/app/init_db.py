@@ -1,18 +1,53 @@
 import sys
 from pathlib import Path
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+# Add parent directory to path (when run as a script: python app/init_db.py)
+if str(Path(__file__).parent.parent) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.database import engine, Base
-from app.models import Student
+import logging
+
+from app.database import engine
+from app.migrations import LATEST_VERSION, is_new_database, migrate, pending_migrations
+from app.log import get_logger, log_event, setup_logging
+
+# Try to get from config, otherwise use defaults
+try:
+    from config import DB_MIGRATE_ON_STARTUP
+except ImportError:
+    DB_MIGRATE_ON_STARTUP = False
+
+logger = get_logger("init_db")
 
 def init_db():
     """
-    Initialize the database by creating all tables
+    Create the database or bring it to the latest schema version
+    """
+    migrate(engine)
+    log_event(logger, "db.initialized", version=LATEST_VERSION)
+
+def check_database():
+    """
+    Startup check: create a new database, report pending migrations on an existing one.
+
+    Migrations are applied at deploy time (python -m app.migrations upgrade)
+    rather than by every worker that starts, unless DB_MIGRATE_ON_STARTUP is set.
     """
-    Base.metadata.create_all(bind=engine)
-    print("Database initialized successfully!")
+    with engine.connect() as connection:
+        pending = pending_migrations(connection)
+        if not pending:
+            # The usual worker start: one PRAGMA user_version read, nothing to create
+            return
+        new = is_new_database(connection)
+    if new or DB_MIGRATE_ON_STARTUP:
+        init_db()
+        return
+    log_event(
+        logger, "db.migrations_pending", level=logging.WARNING,
+        versions=[migration.version for migration in pending],
+        hint="run: python -m app.migrations upgrade",
+    )
 
 if __name__ == "__main__":
+    setup_logging()
     init_db()
@@ -0,0 +1,138 @@
+"""
+Structured, sampled, non-blocking logging.
+
+Handlers log one-line JSON records through ``log_event``. Records go onto an
+in-memory queue on the request thread; formatting, blob redaction and the
+actual write to stdout happen on a background listener thread. INFO/DEBUG
+events can be sampled per route, warnings and errors are always kept.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+# Try to get from config, otherwise use defaults
+try:
+    from config import LOG_LEVEL, LOG_SAMPLE_RATES, LOG_DEFAULT_SAMPLE_RATE, LOG_MAX_VALUE_LENGTH
+except ImportError:
+    LOG_LEVEL = "INFO"
+    LOG_SAMPLE_RATES = {}
+    LOG_DEFAULT_SAMPLE_RATE = 1.0
+    LOG_MAX_VALUE_LENGTH = 200
+
+LOGGER_NAME = "app"
+
+# Payload keys holding file contents; their values are never written to the log
+BLOB_FIELDS = {"photo", "data"}
+
+# Payload keys allowed a longer value than LOG_MAX_VALUE_LENGTH
+FIELD_MAX_LENGTHS = {"sql": 4000}
+
+# Longest list written in full; longer lists are cut with a count of the rest
+MAX_LIST_ITEMS = 20
+
+_listener = None
+
+
+def redact(value, max_length: int = None):
+    """
+    Make a payload safe and small enough to log.
+
+    Blob fields and bytes are replaced by their size, long strings are
+    truncated and long lists are cut short.
+    """
+    if max_length is None:
+        max_length = LOG_MAX_VALUE_LENGTH
+    if isinstance(value, dict):
+        redacted = {}
+        for key, item in value.items():
+            if key in BLOB_FIELDS and isinstance(item, str) and not item.startswith("/api/blobs/"):
+                redacted[key] = f"<{len(item)} chars>"
+            else:
+                redacted[key] = redact(item, FIELD_MAX_LENGTHS.get(key, max_length))
+        return redacted
+    if isinstance(value, (list, tuple)):
+        items = [redact(item, max_length) for item in value[:MAX_LIST_ITEMS]]
+        if len(value) > MAX_LIST_ITEMS:
+            items.append(f"<{len(value) - MAX_LIST_ITEMS} more>")
+        return items
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, str) and len(value) > max_length:
+        return f"{value[:max_length]}...<{len(value) - max_length} more chars>"
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(redact(fields))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def setup_logging() -> None:
+    """
+    Route the application loggers through a queue to a background writer.
+
+    Safe to call more than once; only the first call installs handlers.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(LOG_LEVEL)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.propagate = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the application namespace ("app.<name>")"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def should_sample(route: str) -> bool:
+    """Decide whether an INFO/DEBUG event for this route is kept"""
+    rate = LOG_SAMPLE_RATES.get(route, LOG_DEFAULT_SAMPLE_RATE)
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+def log_event(logger: logging.Logger, event: str, route: str = None, level: int = logging.INFO, **fields) -> None:
+    """
+    Log a structured event.
+
+    Disabled or sampled-out events return before any record is built, so
+    the cost on the request path is a level check and a random draw.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if route is not None:
+        if level < logging.WARNING and not should_sample(route):
+            return
+        fields["route"] = route
+    logger.log(level, event, extra={"fields": fields})
@@ -1,16 +1,27 @@
-from fastapi import FastAPI
+# Imported first: times the imports below (see app/startup.py)
+from app import startup
+from fastapi import Depends, FastAPI, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
 from pathlib import Path
+import logging
 import os
-import sys
-from app.routers import students
+# Not deferred: the optional subsystems import in ~5 ms together and
+# app.database and the routers need them anyway; the import phase is
+# fastapi, pydantic and sqlalchemy (python -X importtime -c "import app.main")
+from app import diagnostics, metrics
+from app.compression import GZIP_ENABLED, GZipMiddleware
+from app.cache import student_cache
+from app.database import Database, async_engine, dispose_engines, engine, get_database, writer_engine
+from app.log import get_logger, log_event, setup_logging
+from app.routers import blobs, students
+from app.spa import AssetFiles, SpaIndex
+from app.thumbnails import shutdown_thumbnails
 
 # Try to import config, fallback to defaults if not available
 try:
-    # Add parent directory to path to import config
-    sys.path.insert(0, str(Path(__file__).parent.parent))
     from config import ALLOWED_ORIGINS, APP_TITLE, APP_VERSION
 except ImportError:
     # Fallback defaults if config.py doesn't exist
@@ -18,82 +29,151 @@ except ImportError:
     APP_TITLE = "College Student Management API"
     APP_VERSION = "1.0.0"
 
+try:
+    from config import METRICS_ENABLED
+except ImportError:
+    METRICS_ENABLED = True
+
+startup.mark("import")
+
+setup_logging()
+logger = get_logger("main")
+
 app = FastAPI(
     title=APP_TITLE,
     description="API for managing college students",
     version=APP_VERSION
 )
 
+# Get allowed origins from config file or environment variable
+# For GoDaddy: same domain deployment, so CORS allows all or specific domains
+allowed_origins = ALLOWED_ORIGINS
+
+# Also check environment variable as override (if somehow available)
+allowed_origins_env = os.getenv("ALLOWED_ORIGINS", "")
+if allowed_origins_env:
+    allowed_origins = allowed_origins_env.split(",")
+
+# Configure CORS
+# Middleware must be registered before the app starts, so this runs at import time
+# On GoDaddy, frontend and backend are same domain, so this is mainly for flexibility
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=allowed_origins if "*" not in allowed_origins else ["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag", "Last-Modified", "X-Profile", "X-Profile-File"],
+)
+
+# Slow-query log and opt-in request profiling (see app/diagnostics.py)
+diagnostics.log_slow_queries(engine)
+diagnostics.log_slow_queries(writer_engine)
+if async_engine is not None:
+    diagnostics.log_slow_queries(async_engine.sync_engine)
+if diagnostics.PROFILING_ENABLED:
+    app.add_middleware(diagnostics.ProfilingMiddleware)
+
+# Gzip for large text responses (static assets come precompressed)
+if GZIP_ENABLED:
+    app.add_middleware(GZipMiddleware)
+
+# Request metrics, added last so the middleware is outermost and times everything
+if METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.instrument_engine(engine)
+    metrics.instrument_engine(writer_engine)
+    pool_engines = {"sync": engine, "writer": writer_engine}
+    if async_engine is not None:
+        metrics.instrument_engine(async_engine.sync_engine)
+        pool_engines["async"] = async_engine.sync_engine
+    metrics.register_pool_gauges(pool_engines)
+    metrics.register_startup_gauge(startup.phases)
+
 @app.on_event("startup")
-def setup_app():
+async def setup_app():
     """
-    Configure CORS, static file serving, and initialize database.
+    Create the database if needed and report pending migrations.
     """
-    # Initialize database
-    from app.init_db import init_db
-    init_db()
-    
-    # Get allowed origins from config file or environment variable
-    # For GoDaddy: same domain deployment, so CORS allows all or specific domains
-    allowed_origins = ALLOWED_ORIGINS
-    
-    # Also check environment variable as override (if somehow available)
-    allowed_origins_env = os.getenv("ALLOWED_ORIGINS", "")
-    if allowed_origins_env:
-        allowed_origins = allowed_origins_env.split(",")
-    
-    # Configure CORS
-    # On GoDaddy, frontend and backend are same domain, so this is mainly for flexibility
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=allowed_origins if "*" not in allowed_origins else ["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
-
-    # Path where Vite builds the frontend (configured in vite.config.ts)
-    static_dir = Path(__file__).parent / "static"
-    if static_dir.exists():
-        # Mount static assets directory
-        app.mount("/assets", StaticFiles(directory=str(static_dir / "assets")), name="assets")
+    # Start the threadpool (anyio loads its backend on first use) here rather
+    # than on the first request
+    with startup.timed("threadpool"):
+        await run_in_threadpool(lambda: None)
+    with startup.timed("database"):
+        from app.init_db import check_database
+        await run_in_threadpool(check_database)
+    startup.report()
+
+
+@app.on_event("shutdown")
+async def close_database():
+    shutdown_thumbnails()
+    await dispose_engines()
+
+
+def ping_database(db: Session) -> None:
+    db.connection().exec_driver_sql("SELECT 1")
 
 
 @app.get("/health")
-def health_check():
-    print("=" * 80)
-    print("🔵 BACKEND ENDPOINT HIT: GET /health")
-    print("📥 No payload")
-    print("📤 Response: Health check")
-    print("=" * 80)
-    return {"status": "healthy"}
+async def health_check(response: Response, database: Database = Depends(get_database)):
+    """
+    Readiness check: healthy only if the database answers a query
+    """
+    try:
+        await database.run(ping_database)
+    except SQLAlchemyError as e:
+        log_event(logger, "health.failed", route="GET /health", level=logging.ERROR, error=str(e))
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "unhealthy", "database": "unavailable"}
+    log_event(logger, "health.checked", route="GET /health")
+    return {"status": "healthy", "database": "ok"}
+
+
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint():
+        """Prometheus text exposition of this worker's metrics"""
+        return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/api/cache/stats", tags=["cache"])
+async def cache_stats():
+    """Hit/miss/eviction counters of this worker's response cache"""
+    return student_cache.stats()
 
 
 # Include API routers under /api so they don't conflict with the SPA routes.
 app.include_router(students.router, prefix="/api/students", tags=["students"])
+app.include_router(blobs.router, prefix="/api/blobs", tags=["blobs"])
 
 
 # Serve SPA - MUST be after API routes
+# Path where Vite builds the frontend (configured in vite.config.ts)
 static_dir = Path(__file__).parent / "static"
 if static_dir.exists():
+    # Fingerprinted assets: immutable caching, precompressed .br/.gz variants
+    app.mount("/assets", AssetFiles(directory=str(static_dir / "assets")), name="assets")
+    spa_index = SpaIndex(static_dir / "index.html")
+
     @app.get("/")
-    async def serve_index():
+    async def serve_index(request: Request):
         """Serve index.html for root"""
-        index_path = static_dir / "index.html"
-        if index_path.exists():
-            return FileResponse(str(index_path))
+        if spa_index.body is not None:
+            return spa_index.response(request)
         return {"error": "index.html not found"}
     
     @app.get("/{full_path:path}")
-    async def serve_spa(full_path: str):
+    async def serve_spa(full_path: str, request: Request):
         """Serve index.html for all non-API routes (SPA routing)"""
         # Skip if it's an API route or asset
         if full_path.startswith("api/") or full_path.startswith("assets/"):
             return {"error": "Not found"}
         
         # Serve index.html for SPA routing
-        index_path = static_dir / "index.html"
-        if index_path.exists():
-            return FileResponse(str(index_path))
+        if spa_index.body is not None:
+            return spa_index.response(request)
         return {"error": "index.html not found"}
 
+
+startup.mark("app")
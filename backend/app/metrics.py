@@ -0,0 +1,300 @@
+"""
+In-process metrics exported in the Prometheus text format.
+
+Collectors keep one value table per thread, so recording a sample is a
+dict update without any lock; /metrics merges the tables when scraped.
+Values are per worker process: scrape every worker, or aggregate in
+Prometheus, when the app runs with several workers.
+
+Recorded:
+  - request count, status and latency per route template (ASGI middleware)
+  - in-flight requests
+  - SQL statements and database time per request (engine event hooks)
+  - connection pool checkout wait, plus pool gauges read at scrape time
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+WRITE_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+# Label for requests that matched no API route (static files, 404s), so
+# arbitrary paths cannot create new series
+UNMATCHED_ROUTE = "other"
+
+# Route label of statements run outside a request (startup, background work)
+BACKGROUND_ROUTE = "background"
+
+
+class _ThreadTables:
+    """One value table per thread; only registering a new thread takes the lock"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._tables: List[dict] = []
+        self._lock = threading.Lock()
+
+    def table(self) -> dict:
+        table = getattr(self._local, "table", None)
+        if table is None:
+            table = self._local.table = {}
+            with self._lock:
+                self._tables.append(table)
+        return table
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            tables = list(self._tables)
+        # Copy each table: another thread may add a key while we iterate
+        return [dict(table) for table in tables]
+
+
+class Counter:
+    """Monotonic counter; also used for gauges that go up and down (inc/dec)"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), kind: str = "counter"):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+        self._values = _ThreadTables()
+
+    def inc(self, labels: Tuple = (), amount: float = 1) -> None:
+        table = self._values.table()
+        table[labels] = table.get(labels, 0) + amount
+
+    def dec(self, labels: Tuple = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def collect(self) -> Dict[Tuple, float]:
+        totals: Dict[Tuple, float] = {}
+        for table in self._values.snapshot():
+            for labels, value in table.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        values = self.collect()
+        if not values and not self.labelnames:
+            values = {(): 0}
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with sum and count"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = _ThreadTables()
+
+    def observe(self, labels: Tuple, value: float) -> None:
+        table = self._values.table()
+        state = table.get(labels)
+        if state is None:
+            # One slot per bucket plus +Inf, then sum
+            state = table[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def collect(self) -> Dict[Tuple, list]:
+        totals: Dict[Tuple, list] = {}
+        for table in self._values.snapshot():
+            for labels, state in table.items():
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = list(state)
+                else:
+                    for i, value in enumerate(state):
+                        total[i] += value
+        return totals
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, state in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                bucket_labels = _labels(self.labelnames + ("le",), labels + (_number(bound),))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_number(state[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class GaugeCallback:
+    """Gauge whose values are read when /metrics is scraped"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], read: Callable[[], Dict[Tuple, float]]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.read = read
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self.read().items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value)
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route template, method and status", ("method", "route", "status"))
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+IN_FLIGHT = Counter("http_requests_in_flight", "HTTP requests being processed", kind="gauge")
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed", ("route",))
+DB_REQUEST_QUERIES = Histogram("db_queries_per_request", "SQL statements per HTTP request", ("route",), QUERY_COUNT_BUCKETS)
+DB_REQUEST_TIME = Histogram("db_time_per_request_seconds", "Time spent in SQL statements per HTTP request", ("route",))
+POOL_WAIT = Histogram("db_pool_checkout_wait_seconds", "Time waiting for a pooled connection", buckets=POOL_WAIT_BUCKETS)
+
+WRITE_BATCH_SIZE = Histogram("db_write_batch_size", "Writes committed together in one transaction", buckets=WRITE_BATCH_BUCKETS)
+WRITE_QUEUE_WAIT = Histogram("db_write_queue_wait_seconds", "Time a write waited for the writer thread", buckets=POOL_WAIT_BUCKETS)
+
+COLLECTORS: list = [
+    REQUESTS, REQUEST_DURATION, IN_FLIGHT, DB_QUERIES, DB_REQUEST_QUERIES, DB_REQUEST_TIME, POOL_WAIT,
+    WRITE_BATCH_SIZE, WRITE_QUEUE_WAIT,
+]
+
+
+class RequestStats:
+    """SQL statements and time of the request being handled"""
+    __slots__ = ("queries", "query_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+
+
+# Set by the middleware; the threadpool and run_sync both carry it into query code
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def observe_pool_wait(seconds: float) -> None:
+    POOL_WAIT.observe((), seconds)
+
+
+def observe_write_batch(size: int, waits: Iterable[float]) -> None:
+    """A committed group of writes and how long each waited (see app/writer.py)"""
+    WRITE_BATCH_SIZE.observe((), size)
+    for seconds in waits:
+        WRITE_QUEUE_WAIT.observe((), seconds)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_time += time.perf_counter() - context._metrics_started
+    else:
+        DB_QUERIES.inc((BACKGROUND_ROUTE,))
+
+
+def instrument_engine(sync_engine) -> None:
+    """Time every statement run on an engine (pass engine.sync_engine for async engines)"""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def register_pool_gauges(engines: Dict[str, object]) -> None:
+    """Expose size and checked-out connections of each named engine's pool"""
+    def read(attribute: str):
+        return lambda: {(name,): getattr(engine.pool, attribute)() for name, engine in engines.items()}
+
+    COLLECTORS.append(GaugeCallback("db_pool_checked_out", "Connections currently checked out", ("engine",), read("checkedout")))
+    COLLECTORS.append(GaugeCallback("db_pool_size", "Configured pool size", ("engine",), read("size")))
+
+
+def register_startup_gauge(phases: Dict[str, float]) -> None:
+    """Expose how long each startup phase of this worker took (see app/startup.py)"""
+    COLLECTORS.append(GaugeCallback(
+        "app_startup_seconds", "Worker cold start duration by phase", ("phase",),
+        lambda: {(phase,): seconds for phase, seconds in phases.items()},
+    ))
+
+
+def route_label(scope: dict) -> str:
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware recording request, latency and per-request SQL metrics"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started
+            IN_FLIGHT.dec()
+            _request_stats.reset(token)
+            route = route_label(scope)
+            method = scope["method"]
+            REQUESTS.inc((method, route, str(status_code)))
+            REQUEST_DURATION.observe((method, route), duration)
+            if stats.queries:
+                DB_QUERIES.inc((route,), stats.queries)
+            DB_REQUEST_QUERIES.observe((route,), stats.queries)
+            DB_REQUEST_TIME.observe((route,), stats.query_time)
+
+
+def render(collectors: Iterable = None) -> str:
+    """Prometheus text exposition of every collector"""
+    lines = []
+    for collector in collectors if collectors is not None else COLLECTORS:
+        lines.extend(collector.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,212 @@
+"""
+Versioned schema migrations.
+
+The schema version is kept in the SQLite header (PRAGMA user_version).
+MIGRATIONS is an ordered list; ``migrate`` applies the ones above the stored
+version, each in its own BEGIN IMMEDIATE transaction together with the
+version bump, so a failed migration leaves the database at the previous
+version. Data migrations that write files (transactional=False) run in
+autocommit and must be safe to re-run.
+
+Migrations run at deploy time:
+
+    python -m app.migrations status     # current version and pending migrations
+    python -m app.migrations upgrade    # apply pending migrations (--to N to stop early)
+    python -m app.migrations analyze    # refresh the query planner statistics
+    python -m app.migrations check      # report student queries doing full scans
+
+Application startup only creates a new database; on an existing one it
+logs pending migrations (unless DB_MIGRATE_ON_STARTUP is set).
+
+Index helpers use IF [NOT] EXISTS, so a migration can be re-run safely.
+Building an index holds SQLite's write lock for the duration (WAL readers
+keep going, writers wait up to the busy timeout), so index migrations on
+large tables belong in a quiet deploy window.
+"""
+import argparse
+import sys
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+
+from app.log import get_logger, log_event, setup_logging
+
+logger = get_logger("migrations")
+
+# Rows sampled per index by ANALYZE; keeps it fast on large tables
+ANALYSIS_LIMIT = 1000
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable  # apply(connection)
+    transactional: bool = True
+
+
+def create_index(connection, name: str, table: str, columns: Sequence[str], unique: bool = False) -> None:
+    connection.exec_driver_sql(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+    )
+
+
+def drop_index(connection, name: str) -> None:
+    connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+
+
+def analyze(connection, table: Optional[str] = None) -> None:
+    """Refresh sqlite_stat1 so the planner can choose between the indexes"""
+    connection.exec_driver_sql(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    connection.exec_driver_sql(f"ANALYZE {table}" if table else "ANALYZE")
+
+
+def add_missing_columns(connection) -> None:
+    """
+    Add model columns missing from existing tables.
+
+    create_all never alters existing tables; new columns must be nullable or
+    have a constant server default for SQLite's ADD COLUMN.
+    """
+    from app.database import Base
+
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(connection.dialect)}"
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+            if not column.nullable:
+                ddl += " NOT NULL"
+            connection.execute(text(ddl))
+
+
+def _baseline(connection) -> None:
+    """Schema as created by init_db before versioning; a no-op on those databases"""
+    from app import models  # noqa: F401 - registers the tables on Base.metadata
+    from app.database import Base
+    from app.search import ensure_search_index
+    from app.stats import ensure_student_stats
+    from app.versioning import ensure_collection_versions
+
+    Base.metadata.create_all(bind=connection)
+    add_missing_columns(connection)
+    # create_all skips tables that already exist, so add indexes introduced later
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=connection, checkfirst=True)
+    ensure_search_index(connection)
+    ensure_collection_versions(connection)
+    ensure_student_stats(connection)
+
+
+def _move_inline_blobs(connection) -> None:
+    from app.blobs import migrate_inline_blobs
+
+    with Session(bind=connection) as db:
+        migrated = migrate_inline_blobs(db)
+    if migrated:
+        log_event(logger, "db.blobs_migrated", students=migrated)
+
+
+def _filter_indexes(connection) -> None:
+    # get_students filters on year and/or class_name
+    create_index(connection, "ix_students_year_class_name", "students", ("year", "class_name"))
+    create_index(connection, "ix_students_class_name", "students", ("class_name",))
+    # The primary key already indexes id, and (last_name, first_name) covers last_name
+    drop_index(connection, "ix_students_id")
+    drop_index(connection, "ix_students_last_name")
+    analyze(connection)
+
+
+MIGRATIONS = [
+    Migration(1, "baseline schema, search index, versions and stats", _baseline),
+    Migration(2, "move inline photos/documents into the blob store", _move_inline_blobs, transactional=False),
+    Migration(3, "index students by year/class, drop redundant indexes, analyze", _filter_indexes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(connection) -> int:
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def pending_migrations(connection, target: Optional[int] = None) -> List[Migration]:
+    current = schema_version(connection)
+    target = LATEST_VERSION if target is None else target
+    return [migration for migration in MIGRATIONS if current < migration.version <= target]
+
+
+def is_new_database(connection) -> bool:
+    """True for a database without any table (just created by connecting)"""
+    return connection.exec_driver_sql("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'").scalar() == 0
+
+
+def migrate(engine, target: Optional[int] = None) -> List[Migration]:
+    """Apply pending migrations in order and return the ones applied"""
+    applied = []
+    # The driver must not open or commit transactions on its own: the
+    # explicit BEGIN IMMEDIATE makes the DDL and the version bump atomic
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for migration in pending_migrations(connection, target):
+            if migration.transactional:
+                connection.exec_driver_sql("BEGIN IMMEDIATE")
+                # Another process (a worker starting on a new database) may
+                # have applied it while we waited for the write lock
+                if schema_version(connection) >= migration.version:
+                    connection.exec_driver_sql("COMMIT")
+                    continue
+                try:
+                    migration.apply(connection)
+                    connection.exec_driver_sql(f"PRAGMA user_version = {migration.version}")
+                    connection.exec_driver_sql("COMMIT")
+                except BaseException:
+                    connection.exec_driver_sql("ROLLBACK")
+                    raise
+            else:
+                migration.apply(connection)
+                connection.exec_driver_sql(f"PRAGMA user_version = {migration.version}")
+            log_event(logger, "db.migrated", version=migration.version, description=migration.description)
+            applied.append(migration)
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="show the schema version and pending migrations")
+    upgrade = commands.add_parser("upgrade", help="apply pending migrations")
+    upgrade.add_argument("--to", type=int, help="stop after this version")
+    commands.add_parser("analyze", help="refresh query planner statistics")
+    commands.add_parser("check", help="report student router queries that scan whole tables")
+    args = parser.parse_args()
+
+    setup_logging()
+    from app.database import engine
+
+    if args.command == "status":
+        with engine.connect() as connection:
+            print(f"schema version {schema_version(connection)} (latest {LATEST_VERSION})")
+            for migration in pending_migrations(connection):
+                print(f"  pending {migration.version}: {migration.description}")
+    elif args.command == "upgrade":
+        applied = migrate(engine, args.to)
+        print(f"applied {len(applied)} migration(s)")
+    elif args.command == "analyze":
+        with engine.begin() as connection:
+            analyze(connection)
+        print("statistics updated")
+    else:
+        from app.query_check import check_queries, print_report
+
+        findings = check_queries(engine)
+        print_report(findings)
+        sys.exit(1 if any(finding.unexpected for finding in findings) else 0)
+
+
+if __name__ == "__main__":
+    main()
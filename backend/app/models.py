@@ -1,18 +1,57 @@
-from sqlalchemy import Column, Integer, String, Date, Text
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, Index
 from app.database import Base
 
 class Student(Base):
     __tablename__ = "students"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     first_name = Column(String(100), nullable=False, index=True)
-    last_name = Column(String(100), nullable=False, index=True)
+    last_name = Column(String(100), nullable=False)
     email = Column(String(255), unique=True, index=True, nullable=False)
-    enrollment_year = Column(Integer, nullable=False)
+    enrollment_year = Column(Integer, nullable=False, index=True)
     dob = Column(Date, nullable=True)
     major = Column(String(100), nullable=True)
-    class_name = Column(String(10), nullable=False)  # Using class_name to avoid Python keyword conflict
+    class_name = Column(String(10), nullable=False, index=True)  # Using class_name to avoid Python keyword conflict
+    year = Column(String(50), nullable=False)
+    photo = Column(Text, nullable=True)  # Blob reference ("sha256:<hex>")
+    documents = Column(Text, nullable=True)  # JSON array of {name, type, blob} references
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Incremented on every update
+    updated_at = Column(DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow)  # UTC
+
+    __table_args__ = (
+        # Stable sort key for paging by name: (last_name, first_name, id)
+        Index("ix_students_last_first_name", "last_name", "first_name"),
+        # year / year + class_name filters of the list endpoint
+        Index("ix_students_year_class_name", "year", "class_name"),
+    )
+
+    __mapper_args__ = {"version_id_col": version}
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    hash = Column(String(64), primary_key=True)  # SHA-256 hex digest of the content
+    content_type = Column(String(255), nullable=False)
+    size = Column(Integer, nullable=False)
+
+class StudentStat(Base):
+    __tablename__ = "student_stats"
+
+    id = Column(Integer, primary_key=True)
     year = Column(String(50), nullable=False)
-    photo = Column(Text, nullable=True)  # Base64 encoded image
-    documents = Column(Text, nullable=True)  # JSON string of documents array
+    class_name = Column(String(10), nullable=False)
+    major = Column(String(100), nullable=True)
+    enrollment_year = Column(Integer, nullable=False)
+    count = Column(Integer, nullable=False)  # Students with these values, kept by triggers (app/stats.py)
+
+    __table_args__ = (
+        Index("ix_student_stats_key", "year", "class_name", "major", "enrollment_year"),
+    )
+
+class CollectionVersion(Base):
+    __tablename__ = "collection_versions"
 
+    name = Column(String(50), primary_key=True)  # Table name
+    version = Column(Integer, nullable=False)  # Bumped by triggers on every write to the table
+    updated_at = Column(DateTime, nullable=True)  # UTC
@@ -0,0 +1,79 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor encodes the sort key values of the last row of a page. The next page
+is fetched with a row-value comparison on the same indexed key, so every page
+costs the same regardless of how deep into the result set it is.
+"""
+import base64
+import json
+from typing import List, Optional, Tuple
+
+from sqlalchemy import tuple_
+
+from app.models import Student
+
+# Sort name -> ordered key columns. Every key ends with the primary key so the
+# order is total and stable across pages.
+SORT_KEYS = {
+    "id": (Student.id,),
+    "last_name": (Student.last_name, Student.first_name, Student.id),
+    "enrollment_year": (Student.enrollment_year, Student.id),
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def parse_sort(sort: str) -> Tuple[str, bool]:
+    """Split "-last_name" into ("last_name", descending=True)"""
+    descending = sort.startswith("-")
+    name = sort[1:] if descending else sort
+    if name not in SORT_KEYS:
+        raise ValueError(f"Invalid sort '{sort}'. Allowed: {', '.join(SORT_KEYS)} (prefix with '-' for descending)")
+    return name, descending
+
+
+def sort_columns(sort: str):
+    """Model columns making up the key for a sort"""
+    name, _ = parse_sort(sort)
+    return SORT_KEYS[name]
+
+
+def encode_cursor(sort: str, values: List) -> str:
+    """Build an opaque cursor from the sort key values of a row"""
+    raw = json.dumps({"s": sort, "k": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> List:
+    """Decode a cursor and check that it belongs to the requested sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = data["k"]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor("Invalid cursor")
+    if data.get("s") != sort or not isinstance(values, list):
+        raise InvalidCursor("Cursor does not match the requested sort")
+    return values
+
+
+def apply_keyset(query, sort: str, cursor: Optional[str]):
+    """Order the query by the sort key and continue after the cursor, if any"""
+    name, descending = parse_sort(sort)
+    columns = SORT_KEYS[name]
+    if cursor:
+        values = decode_cursor(cursor, sort)
+        if len(values) != len(columns):
+            raise InvalidCursor("Invalid cursor")
+        key, after = tuple_(*columns), tuple_(*values)
+        query = query.filter(key < after if descending else key > after)
+    return query.order_by(*(column.desc() if descending else column for column in columns))
+
+
+def cursor_for(student: Student, sort: str) -> str:
+    """Cursor pointing just after the given row"""
+    name, _ = parse_sort(sort)
+    return encode_cursor(sort, [getattr(student, column.key) for column in SORT_KEYS[name]])
@@ -0,0 +1,175 @@
+"""
+Report queries of the students router that read whole tables.
+
+Each case runs a router query function against the database (with the
+response cache cleared, so the queries actually run), records the SQL it
+issues and looks at SQLite's EXPLAIN QUERY PLAN for it. Plan lines of the
+form ``SCAN <table>`` (with or without an index) visit every row unless a
+LIMIT stops them early; cases list the tables where that is intended, e.g.
+an unfiltered page ordered by an indexed sort key. Every other scan is
+reported as unexpected, which usually means a missing index or a filter
+the planner cannot use.
+
+    python -m app.migrations check
+
+Plans depend on the planner statistics, so run it after ``analyze`` on a
+copy of the production database for representative results.
+"""
+import logging
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.bulk import export_rows
+from app.cache import student_cache
+from app.diagnostics import query_plan
+from app.fields import PROJECTIONS
+from app.models import Student
+from app.pagination import cursor_for
+from app.routers import students
+from app.search import build_match_query
+from app.serialization import student_to_dict
+from app.stats import STATS_DIMENSIONS
+
+SUMMARY = PROJECTIONS["summary"]
+
+# Shared reasons for intended scans
+ORDERED_PAGE = "page in sort key order, stopped by LIMIT"
+
+
+class Case(NamedTuple):
+    name: str
+    run: Callable  # run(db)
+    allowed_scans: Dict[str, str]  # table -> why a scan is fine
+
+
+class Finding(NamedTuple):
+    case: str
+    sql: str
+    plan: List[str]
+    scans: List[str]  # tables scanned
+    reason: Optional[str]  # why the scans are fine, if they are
+
+    @property
+    def unexpected(self) -> bool:
+        return bool(self.scans) and self.reason is None
+
+
+def scanned_tables(plan: List[str]) -> List[str]:
+    """Tables read in full according to an EXPLAIN QUERY PLAN"""
+    tables = []
+    for line in plan:
+        parts = line.split()
+        if len(parts) < 2 or parts[0] != "SCAN" or "VIRTUAL TABLE" in line:
+            continue
+        # CONSTANT ROW and subquery results are not tables
+        if parts[1] == "CONSTANT" or parts[1].startswith("("):
+            continue
+        tables.append(parts[1])
+    return tables
+
+
+def _list(year=None, class_name=None, sort="id", cursor=None, include_total=False):
+    def run(db: Session):
+        return students._get_students(db, None, 0, 100, year, class_name, sort, cursor, include_total, SUMMARY)
+    return run
+
+
+def _export(**filters):
+    def run(db: Session):
+        for _ in export_rows(SUMMARY, student_to_dict, **filters):
+            break
+    return run
+
+
+def build_cases(db: Session) -> List[Case]:
+    """Cases with filter values taken from the first student (placeholders if there is none)"""
+    sample = db.query(Student).order_by(Student.id).first()
+    year = sample.year if sample else "Freshman"
+    class_name = sample.class_name if sample else "A"
+    student_id = sample.id if sample else 1
+    name_cursor = cursor_for(sample, "last_name") if sample else None
+    match_query = build_match_query(sample.last_name if sample else "smith")
+    crosstab = list(STATS_DIMENSIONS)[:2]
+
+    cases = [
+        Case("list", _list(), {"students": ORDERED_PAGE}),
+        Case("list sort=-last_name", _list(sort="-last_name"), {"students": ORDERED_PAGE}),
+        Case("list sort=enrollment_year", _list(sort="enrollment_year"), {"students": ORDERED_PAGE}),
+        Case("list year", _list(year=year), {}),
+        Case("list class_name", _list(class_name=class_name), {}),
+        Case("list year+class_name", _list(year=year, class_name=class_name), {}),
+        Case("list year+class_name sort=last_name", _list(year=year, class_name=class_name, sort="last_name"), {}),
+        Case("list year include_total", _list(year=year, include_total=True), {}),
+        Case("list include_total", _list(include_total=True), {
+            "students": "counting every student reads the smallest index in full",
+        }),
+        Case("search year", lambda db: students._search_students(
+            db, "check", match_query, year, None, 20, SUMMARY,
+        ), {}),
+        Case("get", lambda db: students._get_student(db, student_id, None, SUMMARY), {}),
+        Case("stats crosstab", lambda db: students._get_student_stats(db, None, crosstab), {
+            "student_stats": "summary table, one row per group",
+        }),
+        Case("export", _export(), {"students": "export streams every student"}),
+        Case("export year+class_name", _export(year=year, class_name=class_name), {}),
+    ]
+    if name_cursor:
+        cases.insert(2, Case("list sort=last_name cursor", _list(sort="last_name", cursor=name_cursor), {
+            "students": ORDERED_PAGE,
+        }))
+    return cases
+
+
+def check_queries(engine) -> List[Finding]:
+    """Run every case and return one finding per SQL statement"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    findings = []
+    # Keep the routers' log events out of the report
+    logging.disable(logging.INFO)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with Session(bind=engine) as db:
+            cases = build_cases(db)
+            for case in cases:
+                student_cache.clear()
+                statements.clear()
+                case.run(db)
+                db.rollback()
+                with engine.connect() as connection:
+                    for statement, parameters in statements:
+                        plan = query_plan(connection, statement, parameters) or []
+                        scans = scanned_tables(plan)
+                        reasons = [case.allowed_scans.get(table) for table in scans]
+                        reason = None if None in reasons else "; ".join(dict.fromkeys(reasons))
+                        findings.append(Finding(case.name, statement, plan, scans, reason))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        logging.disable(logging.NOTSET)
+        student_cache.clear()
+    return findings
+
+
+def print_report(findings: List[Finding]) -> None:
+    for finding in findings:
+        if not finding.scans:
+            status = "ok"
+        elif finding.unexpected:
+            status = "SCAN"
+        else:
+            status = "scan ok"
+        line = f"{status:8} {finding.case}: scans {', '.join(finding.scans)}" if finding.scans else f"{status:8} {finding.case}"
+        if finding.reason:
+            line += f" ({finding.reason})"
+        print(line)
+        if finding.unexpected:
+            print("         " + " ".join(finding.sql.split()))
+            for plan_line in finding.plan:
+                print("           " + plan_line)
+    unexpected = sum(1 for finding in findings if finding.unexpected)
+    print(f"{len(findings)} statements, {unexpected} unexpected full scan(s)")
@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.blobs import BLOB_REF_PREFIX, blob_path, is_valid_digest
+from app.database import Database, get_database
+from app.models import Blob
+from app.thumbnails import THUMBNAIL_FORMATS, enabled_formats, schedule_thumbnails, thumbnail_path
+from app.versioning import etag_matches
+
+router = APIRouter()
+
+# Blobs are addressed by their content hash, so a URL never changes meaning
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Original served in place of a thumbnail that is still being generated
+PENDING_THUMBNAIL_CACHE_CONTROL = "no-cache"
+
+def blob_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Blob not found"
+    )
+
+async def serve_blob(digest: str, request: Request, database: Database, cache_control: str = IMMUTABLE_CACHE_CONTROL) -> Response:
+    """Response with the stored bytes of a blob"""
+    blob = await database.run(Session.get, Blob, digest)
+    path = blob_path(digest)
+    if not blob or not path.exists():
+        raise blob_not_found()
+
+    headers = {"Cache-Control": cache_control, "ETag": f'"{digest}"'}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return FileResponse(str(path), media_type=blob.content_type, headers=headers)
+
+@router.get("/{digest}")
+async def get_blob(digest: str, request: Request, database: Database = Depends(get_database)):
+    """
+    Serve the bytes of a stored photo or document
+    """
+    if not is_valid_digest(digest):
+        raise blob_not_found()
+
+    return await serve_blob(digest, request, database)
+
+@router.get("/{digest}/thumbnail")
+async def get_thumbnail(digest: str, request: Request, database: Database = Depends(get_database)):
+    """
+    Serve the thumbnail of a stored photo
+
+    WebP is sent to clients that accept it, JPEG otherwise. A ready thumbnail
+    is served straight from disk; until it is generated the original photo
+    is returned (and generation is queued), marked for revalidation.
+    """
+    if not is_valid_digest(digest):
+        raise blob_not_found()
+
+    formats = enabled_formats()
+    accepts_webp = "image/webp" in request.headers.get("accept", "")
+    for format in formats:
+        if format == "webp" and not accepts_webp:
+            continue
+        path = thumbnail_path(digest, format)
+        if not path.exists():
+            continue
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": f'"{digest}-thumb-{format}"'}
+        if "webp" in formats:
+            headers["Vary"] = "Accept"
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return FileResponse(str(path), media_type=THUMBNAIL_FORMATS[format][0], headers=headers)
+
+    schedule_thumbnails([BLOB_REF_PREFIX + digest])
+    return await serve_blob(digest, request, database, PENDING_THUMBNAIL_CACHE_CONTROL)
@@ -1,111 +1,324 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.orm.exc import StaleDataError
+from typing import List, Optional
 import json
-from datetime import datetime
+import logging
 
-from app.database import get_db
+from app.blobs import register_blob, store_documents, store_photo
+from app.cache import invalidate_lists, invalidate_student, invalidate_students, list_key, student_cache, student_key
+from app.bulk import (
+    EXPORT_MEDIA_TYPES, IMPORT_BATCH_SIZE, ImportReport, bulk_delete, bulk_update, detect_format, export_rows,
+    import_batch, iter_csv_records, iter_lines, iter_ndjson_records, stream_export,
+)
+from app.database import Database, get_database
+from app.dates import convert_date_string
+from app.fields import ALL_FIELDS, FIELD_COLUMNS, load_fields, resolve_fields
+from app.log import get_logger, log_event
 from app.models import Student
-from app.schemas import StudentCreate, StudentUpdate, StudentResponse, Document
+from app.pagination import apply_keyset, cursor_for, sort_columns
+from app.search import apply_search, build_match_query
+from app.serialization import dumps, encode_student, encode_students, student_to_dict
+from app.thumbnails import schedule_thumbnails
+from app.uploads import MultipartUpload, UploadError, UploadedFile
+from app.stats import parse_dimensions, recompute_student_stats, student_stats
+from app.writer import after_commit
+from app.versioning import (
+    cache_headers, collection_etag, etag_matches, get_collection_version, get_row_version,
+    matching_versions, student_etag,
+)
+from app.schemas import (
+    StudentCreate, StudentUpdate, StudentResponse, StudentPartialResponse, Document, ImportReportResponse,
+    StatsRecomputeResponse, StudentStatsResponse, BulkUpdateRequest, BulkDeleteRequest, BulkResultResponse,
+)
 
 router = APIRouter()
 
-def convert_date_string(date_str):
-    """Convert date string to date object or None"""
-    if not date_str:
-        return None
+logger = get_logger("students")
+
+def row_etag(student_id: int, version: int, fields: List[str] = ALL_FIELDS) -> str:
+    """ETag of a student representation; the full record has no projection suffix"""
+    return student_etag(student_id, version, None if fields is ALL_FIELDS else fields)
+
+def json_response(body: bytes, headers: dict = None, status_code: int = status.HTTP_200_OK) -> Response:
+    """Response for a body already encoded by app.serialization"""
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+def not_modified(headers: dict) -> Response:
+    """Empty 304 response carrying the validators"""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Resolve a fields= value, rejecting unknown names with 400"""
     try:
-        return datetime.strptime(date_str, "%Y-%m-%d").date()
-    except:
-        return None
-
-def student_to_dict(student: Student) -> dict:
-    """Convert Student model to dictionary with camelCase keys"""
-    return {
-        "id": student.id,
-        "firstName": student.first_name,
-        "lastName": student.last_name,
-        "email": student.email,
-        "enrollmentYear": student.enrollment_year,
-        "dob": student.dob.isoformat() if student.dob else None,
-        "major": student.major,
-        "class": student.class_name,
-        "year": student.year,
-        "photo": student.photo,
-        "documents": json.loads(student.documents) if student.documents else None
-    }
+        return resolve_fields(fields)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+async def get_fields(
+    fields: Optional[str] = Query(
+        None,
+        description="Projection (summary, roster, full) or comma-separated field names, e.g. firstName,lastName,class"
+    )
+) -> List[str]:
+    """Dependency resolving the fields= query parameter"""
+    return parse_fields(fields)
+
+def store_student_files(db: Session, photo, documents):
+    """Move uploaded photo/documents into the blob store and return the row references"""
+    try:
+        photo_ref = store_photo(db, photo)
+        documents_json = None
+        if documents is not None:
+            documents_json = store_documents(
+                db, [doc.model_dump() if hasattr(doc, 'model_dump') else doc for doc in documents]
+            )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return photo_ref, documents_json
+
+def student_values(db: Session, data: dict) -> dict:
+    """Column values for the fields present in a create/update payload (model_dump of the schema)"""
+    values = {}
+    for field, value in data.items():
+        if field in ("photo", "documents"):
+            continue
+        if field == "dob":
+            value = convert_date_string(value)
+        values[FIELD_COLUMNS["class" if field == "class_" else field]] = value
+    
+    # Store photo and documents in the blob store, keeping only references in the row
+    if "photo" in data or "documents" in data:
+        photo_ref, documents_json = store_student_files(db, data.get("photo"), data.get("documents"))
+        if "photo" in data:
+            values["photo"] = photo_ref
+        if "documents" in data:
+            values["documents"] = documents_json
+    return values
+
+def returned_columns(fields: List[str]) -> list:
+    """Columns to return from a write: the response fields plus the row version"""
+    return [getattr(Student, FIELD_COLUMNS[field]) for field in fields] + [Student.version, Student.updated_at]
+
+def integrity_error(e: IntegrityError) -> HTTPException:
+    """400 for a duplicate email; any other constraint violation is a bug and re-raised"""
+    if "students.email" in str(e.orig):
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    raise e
 
 @router.post("/", response_model=StudentResponse, status_code=status.HTTP_201_CREATED)
-def create_student(student: StudentCreate, db: Session = Depends(get_db)):
+async def create_student(student: StudentCreate, database: Database = Depends(get_database)):
     """
     Create a new student record
     """
-    print("=" * 80)
-    print("🔵 BACKEND ENDPOINT HIT: POST /api/students/")
-    print("📥 Request Payload:")
-    print(f"   Full payload: {student.model_dump()}")
-    print("=" * 80)
-    
-    # Check if email already exists
-    existing_student = db.query(Student).filter(Student.email == student.email).first()
-    if existing_student:
+    return await database.write(_create_student, student)
+
+def _create_student(db: Session, student: StudentCreate) -> Response:
+    data = student.model_dump()
+    data["documents"] = data["documents"] or None
+    
+    # One INSERT ... RETURNING; the unique index on email rejects duplicates
+    try:
+        db_student = db.execute(
+            insert(Student).values(student_values(db, data)).returning(*returned_columns(ALL_FIELDS))
+        ).one()
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise integrity_error(e)
+    
+    after_commit(db, invalidate_lists)
+    after_commit(db, lambda: schedule_thumbnails([db_student.photo]))
+    
+    headers = cache_headers(row_etag(db_student.id, db_student.version), db_student.updated_at)
+    response_data = student_to_dict(db_student)
+    log_event(logger, "student.created", route="POST /api/students/", student_id=db_student.id, payload=response_data)
+    
+    return json_response(dumps(response_data), headers, status.HTTP_201_CREATED)
+
+@router.post("/import", response_model=ImportReportResponse)
+async def import_students(
+    request: Request,
+    response: Response,
+    format: Optional[str] = Query(None, description="csv or ndjson; defaults to the request Content-Type"),
+    dry_run: bool = False,
+    database: Database = Depends(get_database)
+):
+    """
+    Bulk-import students from a streamed CSV or NDJSON body
+
+    CSV needs a header row with the create fields (firstName, lastName,
+    email, enrollmentYear, dob, major, class, year); NDJSON takes one create
+    payload per line. Rows are validated and inserted in batches; invalid
+    rows are reported and skipped. With `dry_run=true` nothing is written.
+
+    If the body cannot be read to the end (invalid UTF-8 or CSV), the rows
+    before the error are still processed and the report is returned with
+    status 207, `complete: false` and the reason in `streamError`.
+    """
+    try:
+        import_format = detect_format(format, request.headers.get("content-type"))
+    except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+            detail=str(e)
         )
     
-    # Convert documents list to JSON string if provided
-    documents_json = None
-    if student.documents:
-        documents_json = json.dumps([doc.model_dump() for doc in student.documents])
-    
-    # Convert date string to date object
-    dob_date = convert_date_string(student.dob)
-    
-    # Create new student
-    db_student = Student(
-        first_name=student.firstName,
-        last_name=student.lastName,
-        email=student.email,
-        enrollment_year=student.enrollmentYear,
-        dob=dob_date,
-        major=student.major,
-        class_name=student.class_,  # Using class_ from schema
-        year=student.year,
-        photo=student.photo,
-        documents=documents_json
-    )
+    report = ImportReport(import_format, dry_run)
+    lines = iter_lines(request.stream())
+    records = iter_csv_records(lines) if import_format == "csv" else iter_ndjson_records(lines)
     
-    db.add(db_student)
-    db.commit()
-    db.refresh(db_student)
+    batch = []
+    stream_error = None
+    try:
+        async for record in records:
+            batch.append((report.total + len(batch) + 1, record))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await database.write(import_batch, batch, report)
+                batch = []
+    except (ValueError, UnicodeDecodeError) as e:
+        # Earlier batches are already committed; finish the rows read so far
+        # and report where the upload stopped
+        stream_error = e
+    if batch:
+        await database.write(import_batch, batch, report)
+    if stream_error is not None:
+        report.stream_error = f"Could not parse upload after row {report.total}: {stream_error}"
+        response.status_code = status.HTTP_207_MULTI_STATUS
+    if report.imported and not dry_run:
+        invalidate_lists()
     
-    response_data = student_to_dict(db_student)
-    print("📤 Response Payload:")
-    print(f"   {json.dumps(response_data, indent=2, default=str)}")
-    print("=" * 80)
+    log_event(
+        logger, "students.imported", route="POST /api/students/import",
+        format=import_format, dry_run=dry_run, total=report.total,
+        imported=report.imported, failed=report.failed, stream_error=report.stream_error
+    )
+    return report.to_dict()
+
+@router.post("/bulk/update", response_model=BulkResultResponse, response_model_exclude_none=True)
+async def bulk_update_students(body: BulkUpdateRequest, database: Database = Depends(get_database)):
+    """
+    Set year, class, major and/or enrollmentYear on every student matching a filter
+    
+    The filter takes `ids`, `year`, `class` and `enrollmentYear` (all given
+    criteria must match; at least one is required). Runs as one UPDATE in one
+    transaction; students that already have the new values are not touched.
+    With `dryRun` nothing is written and `sampleIds` lists the first students
+    that would change.
+    """
+    return await database.write(_bulk_update_students, body)
+
+def _bulk_update_students(db: Session, body: BulkUpdateRequest) -> dict:
+    try:
+        result = bulk_update(db, body.filter, body.changes, body.dryRun)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if result["affected"] and not body.dryRun:
+        after_commit(db, invalidate_students)
+    log_event(
+        logger, "students.bulk_updated", route="POST /api/students/bulk/update",
+        filter=body.filter.model_dump(exclude_none=True, by_alias=True),
+        changes=body.changes.model_dump(exclude_unset=True, by_alias=True), **result
+    )
+    return result
+
+@router.post("/bulk/delete", response_model=BulkResultResponse, response_model_exclude_none=True)
+async def bulk_delete_students(body: BulkDeleteRequest, database: Database = Depends(get_database)):
+    """
+    Delete every student matching a filter (same filter as bulk update)
     
-    return response_data
+    Runs as one DELETE in one transaction. With `dryRun` nothing is deleted
+    and `sampleIds` lists the first students that would be.
+    """
+    return await database.write(_bulk_delete_students, body)
 
-@router.get("/", response_model=List[StudentResponse])
-def get_students(
+def _bulk_delete_students(db: Session, body: BulkDeleteRequest) -> dict:
+    try:
+        result = bulk_delete(db, body.filter, body.dryRun)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if result["affected"] and not body.dryRun:
+        after_commit(db, invalidate_students)
+    log_event(
+        logger, "students.bulk_deleted", route="POST /api/students/bulk/delete",
+        level=logging.INFO if body.dryRun else logging.WARNING,
+        filter=body.filter.model_dump(exclude_none=True, by_alias=True), **result
+    )
+    return result
+
+@router.get("/", response_model=List[StudentPartialResponse], response_model_exclude_unset=True)
+async def get_students(
+    request: Request,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
     year: str = None,
     class_name: str = None,
-    db: Session = Depends(get_db)
+    sort: str = Query("id", description="id, last_name or enrollment_year; prefix with '-' for descending"),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    include_total: bool = False,
+    fields: List[str] = Depends(get_fields),
+    database: Database = Depends(get_database)
 ):
     """
     Get all students with optional filtering by year and class
+
+    Results are ordered by `sort`. When more rows are available, the
+    `X-Next-Cursor` response header holds the cursor for the next page;
+    `include_total=true` adds the filtered count as `X-Total-Count`.
+    `fields` limits the response (and the columns read) to a projection.
+    
+    The ETag changes with any write to the students table; a matching
+    If-None-Match gets 304 without running the query. Encoded pages are
+    cached in-process under that ETag.
     """
-    print("=" * 80)
-    print("🔵 BACKEND ENDPOINT HIT: GET /api/students/")
-    print("📥 Query Parameters:")
-    print(f"   - skip: {skip}")
-    print(f"   - limit: {limit}")
-    print(f"   - year: {year}")
-    print(f"   - class_name: {class_name}")
-    print("=" * 80)
+    return await database.run(
+        _get_students, request.headers.get("if-none-match"),
+        skip, limit, year, class_name, sort, cursor, include_total, fields
+    )
+
+def _get_students(
+    db: Session,
+    if_none_match: Optional[str],
+    skip: int,
+    limit: int,
+    year: Optional[str],
+    class_name: Optional[str],
+    sort: str,
+    cursor: Optional[str],
+    include_total: bool,
+    fields: List[str],
+) -> Response:
+    # Read the version before the rows: a write in between only makes the tag stale
+    version, updated_at = get_collection_version(db)
+    headers = cache_headers(
+        collection_etag(version, year, class_name, sort, cursor, skip, limit, include_total, tuple(fields)),
+        updated_at
+    )
+    if etag_matches(if_none_match, headers["ETag"]):
+        return not_modified(headers)
+    
+    cache_key = list_key(headers["ETag"])
+    cached = student_cache.get(cache_key)
+    if cached is not None:
+        return json_response(cached.body, {**headers, **cached.headers})
     
     query = db.query(Student)
     
@@ -115,144 +328,408 @@ def get_students(
     if class_name:
         query = query.filter(Student.class_name == class_name)
     
-    students = query.offset(skip).limit(limit).all()
+    page_headers = {}
+    if include_total:
+        page_headers["X-Total-Count"] = str(query.order_by(None).count())
+    
+    try:
+        query = apply_keyset(query, sort, cursor)
+        loader = load_fields(fields, sort_columns(sort))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    # skip is kept for older clients; cursor paging does not need it
+    if skip and not cursor:
+        query = query.offset(skip)
+    
+    if loader is not None:
+        query = query.options(loader)
+    
+    # Fetch one extra row to know whether there is a next page
+    students = query.limit(limit + 1).all()
+    if len(students) > limit:
+        students = students[:limit]
+        page_headers["X-Next-Cursor"] = cursor_for(students[-1], sort)
     
     # Convert to response format
-    response_data = [student_to_dict(student) for student in students]
-    print("📤 Response Payload:")
-    print(f"   Found {len(response_data)} student(s)")
-    print(f"   {json.dumps(response_data, indent=2, default=str)}")
-    print("=" * 80)
+    log_event(
+        logger, "students.listed", route="GET /api/students/",
+        year=year, class_name=class_name, sort=sort, cursor=cursor, limit=limit,
+        fields=fields, count=len(students)
+    )
     
-    return response_data
+    body = encode_students(students, fields)
+    student_cache.set(cache_key, body, page_headers)
+    return json_response(body, {**headers, **page_headers})
 
-@router.get("/{student_id}", response_model=StudentResponse)
-def get_student(student_id: int, db: Session = Depends(get_db)):
+@router.get("/search", response_model=List[StudentPartialResponse], response_model_exclude_unset=True)
+async def search_students(
+    q: str = Query(..., min_length=1, description="Words to match against name, email and major (prefix match)"),
+    year: str = None,
+    class_name: str = None,
+    limit: int = Query(20, ge=1, le=100),
+    fields: List[str] = Depends(get_fields),
+    database: Database = Depends(get_database)
+):
+    """
+    Search students by name, email or major, best matches first
+    """
+    match_query = build_match_query(q)
+    if match_query is None:
+        return json_response(b"[]")
+    
+    return await database.run(_search_students, q, match_query, year, class_name, limit, fields)
+
+def _search_students(
+    db: Session,
+    q: str,
+    match_query: str,
+    year: Optional[str],
+    class_name: Optional[str],
+    limit: int,
+    fields: List[str],
+) -> Response:
+    query = db.query(Student)
+    
+    # Apply filters
+    if year:
+        query = query.filter(Student.year == year)
+    if class_name:
+        query = query.filter(Student.class_name == class_name)
+    
+    loader = load_fields(fields)
+    if loader is not None:
+        query = query.options(loader)
+    
+    students = apply_search(query, Student, match_query).limit(limit).all()
+    
+    log_event(
+        logger, "students.searched", route="GET /api/students/search",
+        q=q, year=year, class_name=class_name, limit=limit, count=len(students)
+    )
+    
+    return json_response(encode_students(students, fields))
+
+@router.get("/stats", response_model=StudentStatsResponse)
+async def get_student_stats(
+    request: Request,
+    crosstab: Optional[str] = Query(None, description="Comma-separated dimensions to cross-tabulate, e.g. year,class"),
+    database: Database = Depends(get_database)
+):
+    """
+    Student counts by year, class, major and enrollment year
+
+    Read from a summary table kept current by triggers, so the cost does
+    not grow with the number of students. Encoded responses are cached
+    in-process under the ETag, like list pages. `crosstab` adds counts for each
+    combination of the given dimensions (year, class, major, enrollmentYear).
+    """
+    try:
+        dimensions = parse_dimensions(crosstab)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return await database.run(_get_student_stats, request.headers.get("if-none-match"), dimensions)
+
+def _get_student_stats(db: Session, if_none_match: Optional[str], dimensions: Optional[List[str]]) -> Response:
+    version, updated_at = get_collection_version(db)
+    headers = cache_headers(collection_etag(version, "stats", tuple(dimensions or ())), updated_at)
+    if etag_matches(if_none_match, headers["ETag"]):
+        return not_modified(headers)
+    
+    cache_key = list_key(headers["ETag"])
+    cached = student_cache.get(cache_key)
+    if cached is not None:
+        return json_response(cached.body, headers)
+    
+    body = dumps(student_stats(db, dimensions))
+    student_cache.set(cache_key, body)
+    return json_response(body, headers)
+
+@router.post("/stats/recompute", response_model=StatsRecomputeResponse)
+async def recompute_stats(database: Database = Depends(get_database)):
+    """
+    Verify the summary counts against the students table and rebuild them if they differ
+    """
+    report = await database.write(recompute_student_stats)
+    log_event(
+        logger, "stats.recomputed", route="POST /api/students/stats/recompute",
+        level=logging.WARNING if report["repaired"] else logging.INFO, **report
+    )
+    return report
+
+@router.get("/export")
+async def export_students(
+    format: str = Query("ndjson", description="ndjson or csv"),
+    fields: Optional[str] = Query(
+        "summary",
+        description="Projection (summary, roster, full) or comma-separated field names; photo/documents are excluded by default"
+    ),
+    year: str = None,
+    class_name: str = None
+):
+    """
+    Stream all matching students as NDJSON or CSV, ordered by id
+    """
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid format '{format}'. Allowed: {', '.join(EXPORT_MEDIA_TYPES)}"
+        )
+    export_fields = parse_fields(fields)
+    
+    log_event(
+        logger, "students.exported", route="GET /api/students/export",
+        format=format, fields=export_fields, year=year, class_name=class_name
+    )
+    chunks = export_rows(export_fields, student_to_dict, year=year, class_name=class_name)
+    return StreamingResponse(
+        stream_export(format, export_fields, chunks),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="students.{format}"'}
+    )
+
+@router.get("/{student_id}", response_model=StudentPartialResponse, response_model_exclude_unset=True)
+async def get_student(
+    student_id: int,
+    request: Request,
+    fields: List[str] = Depends(get_fields),
+    database: Database = Depends(get_database)
+):
     """
     Get a specific student by ID
+    
+    Reads the row version first: a matching If-None-Match gets 304, and the
+    encoded body is served from the in-process cache when that version is
+    cached.
     """
-    print("=" * 80)
-    print(f"🔵 BACKEND ENDPOINT HIT: GET /api/students/{student_id}")
-    print(f"📥 Path Parameter: student_id = {student_id}")
-    print("=" * 80)
+    return await database.run(_get_student, student_id, request.headers.get("if-none-match"), fields)
+
+def _get_student(db: Session, student_id: int, if_none_match: Optional[str], fields: List[str]) -> Response:
+    if if_none_match or student_cache.enabled:
+        current = get_row_version(db, student_id)
+        if current:
+            version, updated_at = current
+            headers = cache_headers(row_etag(student_id, version, fields), updated_at)
+            if etag_matches(if_none_match, headers["ETag"]):
+                return not_modified(headers)
+            cached = student_cache.get(student_key(student_id, version, fields))
+            if cached is not None:
+                return json_response(cached.body, headers)
     
-    student = db.query(Student).filter(Student.id == student_id).first()
+    query = db.query(Student).filter(Student.id == student_id)
+    loader = load_fields(fields, (Student.version, Student.updated_at))
+    if loader is not None:
+        query = query.options(loader)
+    
+    student = query.first()
     if not student:
-        print("❌ Student not found")
-        print("=" * 80)
+        log_event(logger, "student.not_found", route="GET /api/students/{student_id}", level=logging.WARNING, student_id=student_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Student not found"
         )
     
-    response_data = student_to_dict(student)
-    print("📤 Response Payload:")
-    print(f"   {json.dumps(response_data, indent=2, default=str)}")
-    print("=" * 80)
+    headers = cache_headers(row_etag(student.id, student.version, fields), student.updated_at)
+    log_event(logger, "student.fetched", route="GET /api/students/{student_id}", student_id=student_id, fields=fields)
     
-    return response_data
+    body = encode_student(student, fields)
+    student_cache.set(student_key(student_id, student.version, fields), body)
+    return json_response(body, headers)
 
 @router.put("/{student_id}", response_model=StudentResponse)
-def update_student(
+async def update_student(
     student_id: int,
     student_update: StudentUpdate,
-    db: Session = Depends(get_db)
+    request: Request,
+    database: Database = Depends(get_database)
 ):
     """
     Update a student record
+    
+    Only the fields sent are changed; the response is the full record.
+    With an If-Match header, the update only applies if the record has not
+    changed since that ETag was issued (412 otherwise).
     """
-    print("=" * 80)
-    print(f"🔵 BACKEND ENDPOINT HIT: PUT /api/students/{student_id}")
-    print(f"📥 Path Parameter: student_id = {student_id}")
-    print("📥 Request Payload:")
-    update_dict = student_update.model_dump(exclude_unset=True)
-    for key, value in update_dict.items():
-        if key == "documents" and value:
-            print(f"   - {key}: {len(value)} document(s)")
-        elif key == "photo" and value:
-            print(f"   - {key}: Present (base64)")
-        else:
-            print(f"   - {key}: {value}")
-    print(f"   Full payload: {json.dumps(update_dict, indent=2, default=str)}")
-    print("=" * 80)
+    return await database.write(
+        _update_student, student_id, student_update, request.headers.get("if-match"), ALL_FIELDS, "PUT"
+    )
+
+@router.patch("/{student_id}", response_model=StudentPartialResponse, response_model_exclude_unset=True)
+async def patch_student(
+    student_id: int,
+    student_update: StudentUpdate,
+    request: Request,
+    database: Database = Depends(get_database)
+):
+    """
+    Change some fields of a student record
     
-    db_student = db.query(Student).filter(Student.id == student_id).first()
-    if not db_student:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Student not found"
+    Issues one UPDATE of the fields sent and returns only those fields and
+    the id, with the new ETag. If-Match works as for PUT.
+    """
+    changed = {FIELD_COLUMNS["class" if field == "class_" else field] for field in student_update.model_dump(exclude_unset=True)}
+    fields = [field for field in ALL_FIELDS if field == "id" or FIELD_COLUMNS[field] in changed]
+    return await database.write(
+        _update_student, student_id, student_update, request.headers.get("if-match"), fields, "PATCH"
+    )
+
+def _update_student(
+    db: Session,
+    student_id: int,
+    student_update: StudentUpdate,
+    if_match: Optional[str],
+    fields: List[str],
+    method: str,
+) -> Response:
+    update_data = student_update.model_dump(exclude_unset=True)
+    values = student_values(db, update_data) if update_data else {}
+    return write_student(db, student_id, values, if_match, fields, f"{method} /api/students/{{student_id}}", list(update_data))
+
+def write_student(
+    db: Session,
+    student_id: int,
+    values: dict,
+    if_match: Optional[str],
+    fields: List[str],
+    route: str,
+    changed: List[str],
+) -> Response:
+    """Apply column values to one student and answer with the requested fields"""
+    versions = matching_versions(if_match, student_id) if if_match else None
+    if values:
+        # One UPDATE ... RETURNING of the changed columns; the version check
+        # and the email uniqueness check happen in the same statement
+        statement = (
+            update(Student)
+            .where(Student.id == student_id)
+            .values({**values, "version": Student.version + 1})
+            .returning(*returned_columns(fields))
         )
+        if versions is not None:
+            statement = statement.where(Student.version.in_(versions))
+        try:
+            db_student = db.execute(statement).first()
+            if db_student is None:
+                # Drop blob rows stored for an update that did not happen
+                db.rollback()
+            else:
+                db.commit()
+                after_commit(db, lambda: invalidate_student(student_id))
+                after_commit(db, lambda: schedule_thumbnails([values.get("photo")]))
+        except IntegrityError as e:
+            db.rollback()
+            raise integrity_error(e)
+    else:
+        # Nothing to change: answer with the current record
+        query = select(*returned_columns(fields)).where(Student.id == student_id)
+        if versions is not None:
+            query = query.where(Student.version.in_(versions))
+        db_student = db.execute(query).first()
     
-    # Check if email is being updated and if it already exists
-    if student_update.email and student_update.email != db_student.email:
-        existing_student = db.query(Student).filter(Student.email == student_update.email).first()
-        if existing_student:
+    if db_student is None:
+        # Only a failed precondition needs a second look at the row
+        if versions is not None and get_row_version(db, student_id) is not None:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Student was modified by another request"
             )
+        log_event(logger, "student.not_found", route=route, level=logging.WARNING, student_id=student_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Student not found"
+        )
+    headers = cache_headers(row_etag(student_id, db_student.version, fields), db_student.updated_at)
+    response_data = student_to_dict(db_student, fields)
+    log_event(
+        logger, "student.updated", route=route,
+        student_id=student_id, changed=changed, payload=response_data
+    )
     
-    # Update fields
-    update_data = student_update.model_dump(exclude_unset=True)
+    return json_response(dumps(response_data), headers)
+
+@router.post("/{student_id}/files", response_model=StudentPartialResponse, response_model_exclude_unset=True)
+async def upload_student_files(student_id: int, request: Request, database: Database = Depends(get_database)):
+    """
+    Attach a photo and/or documents uploaded as multipart/form-data
     
-    # Map camelCase to snake_case for database
-    if "firstName" in update_data:
-        db_student.first_name = update_data["firstName"]
-    if "lastName" in update_data:
-        db_student.last_name = update_data["lastName"]
-    if "email" in update_data:
-        db_student.email = update_data["email"]
-    if "enrollmentYear" in update_data:
-        db_student.enrollment_year = update_data["enrollmentYear"]
-    if "dob" in update_data:
-        db_student.dob = convert_date_string(update_data["dob"])
-    if "major" in update_data:
-        db_student.major = update_data["major"]
-    if "class" in update_data or "class_" in update_data:
-        class_value = update_data.get("class") or update_data.get("class_")
-        db_student.class_name = class_value
-    if "year" in update_data:
-        db_student.year = update_data["year"]
-    if "photo" in update_data:
-        db_student.photo = update_data["photo"]
-    if "documents" in update_data:
-        if update_data["documents"] is not None:
-            db_student.documents = json.dumps([doc.model_dump() if hasattr(doc, 'model_dump') else doc for doc in update_data["documents"]])
+    Send the photo as a `photo` file part (replaces the current one) and
+    documents as one or more `documents` file parts (added to the existing
+    ones). Files are streamed to storage; size and type limits are checked
+    while the body is read (413/415). Returns the changed fields and the id
+    with the new ETag; If-Match works as for PUT.
+    """
+    # Refuse before reading any of the body
+    if await database.run(get_row_version, student_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Student not found"
+        )
+    try:
+        upload = MultipartUpload(request.headers.get("content-type"), request.headers.get("content-length"))
+        files = await upload.read(request.stream())
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    if not files:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No files uploaded"
+        )
+    return await database.write(_attach_student_files, student_id, files, request.headers.get("if-match"))
+
+def _attach_student_files(db: Session, student_id: int, files: List[UploadedFile], if_match: Optional[str]) -> Response:
+    values = {}
+    documents = []
+    for file in files:
+        ref = register_blob(db, file.digest, file.content_type, file.size)
+        if file.field == "photo":
+            values["photo"] = ref
         else:
-            db_student.documents = None
-    
-    db.commit()
-    db.refresh(db_student)
-    
-    response_data = student_to_dict(db_student)
-    print("📤 Response Payload:")
-    print(f"   {json.dumps(response_data, indent=2, default=str)}")
-    print("=" * 80)
+            documents.append(json.dumps({"name": file.name, "type": file.content_type, "blob": ref}))
+    if documents:
+        # Appended in the UPDATE itself, so concurrent uploads do not drop each other's documents
+        appends = []
+        for document in documents:
+            appends += ["$[#]", func.json(document)]
+        values["documents"] = func.json_insert(func.coalesce(Student.documents, "[]"), *appends)
     
-    return response_data
+    fields = [field for field in ALL_FIELDS if field == "id" or FIELD_COLUMNS[field] in values]
+    return write_student(
+        db, student_id, values, if_match, fields, "POST /api/students/{student_id}/files", sorted({file.field for file in files})
+    )
 
 @router.delete("/{student_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_student(student_id: int, db: Session = Depends(get_db)):
+async def delete_student(student_id: int, database: Database = Depends(get_database)):
     """
     Delete a student record
     """
-    print("=" * 80)
-    print(f"🔵 BACKEND ENDPOINT HIT: DELETE /api/students/{student_id}")
-    print(f"📥 Path Parameter: student_id = {student_id}")
-    print("=" * 80)
-    
+    await database.write(_delete_student, student_id)
+    return None
+
+def _delete_student(db: Session, student_id: int) -> None:
     student = db.query(Student).filter(Student.id == student_id).first()
     if not student:
-        print("❌ Student not found")
-        print("=" * 80)
+        log_event(logger, "student.not_found", route="DELETE /api/students/{student_id}", level=logging.WARNING, student_id=student_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Student not found"
         )
     
-    print(f"📤 Deleting student: {student.first_name} {student.last_name} (ID: {student.id})")
     db.delete(student)
-    db.commit()
-    print("✅ Student deleted successfully")
-    print("=" * 80)
-    return None
+    try:
+        db.commit()
+    except StaleDataError:
+        # Another request deleted the row between our read and this delete
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Student not found"
+        )
+    after_commit(db, lambda: invalidate_student(student_id))
+    log_event(logger, "student.deleted", route="DELETE /api/students/{student_id}", student_id=student_id)
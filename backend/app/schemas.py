@@ -1,13 +1,25 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
+from typing import Dict, Optional, List, Union
 from datetime import date
 from pydantic import ConfigDict
 
 class Document(BaseModel):
     name: str
-    data: str  # base64 encoded
+    data: Optional[str] = None  # base64 encoded, for new uploads
+    url: Optional[str] = None  # blob URL returned by the API, to keep an existing file
     type: str  # MIME type
 
+    @model_validator(mode='after')
+    def check_content(self):
+        if not self.data and not self.url:
+            raise ValueError('Either data or url is required')
+        return self
+
+class DocumentResponse(BaseModel):
+    name: str
+    type: str  # MIME type
+    url: str  # blob URL serving the file
+
 class StudentBase(BaseModel):
     firstName: str = Field(..., min_length=1, max_length=100)
     lastName: str = Field(..., min_length=1, max_length=100)
@@ -73,10 +85,105 @@ class StudentResponse(BaseModel):
     major: Optional[str] = None
     class_: str = Field(..., alias="class")  # Using class_ to avoid Python keyword
     year: str
-    photo: Optional[str] = None
-    documents: Optional[List[Document]] = None
+    photo: Optional[str] = None  # blob URL
+    thumbnail: Optional[str] = None  # URL of the photo's thumbnail
+    documents: Optional[List[DocumentResponse]] = None
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        from_attributes=True
+    )
+
+class StudentPartialResponse(BaseModel):
+    """Student with only the fields requested through ``fields=``"""
+    id: int
+    firstName: Optional[str] = None
+    lastName: Optional[str] = None
+    email: Optional[EmailStr] = None
+    enrollmentYear: Optional[int] = None
+    dob: Optional[str] = None
+    major: Optional[str] = None
+    class_: Optional[str] = Field(None, alias="class")  # Using class_ to avoid Python keyword
+    year: Optional[str] = None
+    photo: Optional[str] = None  # blob URL
+    thumbnail: Optional[str] = None  # URL of the photo's thumbnail
+    documents: Optional[List[DocumentResponse]] = None
 
     model_config = ConfigDict(
         populate_by_name=True,
         from_attributes=True
     )
+
+class ImportFieldError(BaseModel):
+    field: Optional[str] = None
+    message: str
+
+class ImportRowError(BaseModel):
+    row: int  # 1-based data row (CSV header excluded)
+    errors: List[ImportFieldError]
+
+class ImportReportResponse(BaseModel):
+    format: str
+    dryRun: bool
+    total: int
+    imported: int  # rows written, or rows that would be written in a dry run
+    failed: int
+    errors: List[ImportRowError]
+    errorsTruncated: bool
+    complete: bool  # false when the upload could not be read to the end
+    streamError: Optional[str] = None  # why reading stopped; rows before it were processed
+
+class StatsCount(BaseModel):
+    value: Optional[Union[int, str]] = None  # null for students without a major
+    count: int
+
+class StatsCrosstab(BaseModel):
+    dimensions: List[str]
+    cells: List[Dict[str, Optional[Union[int, str]]]]  # one key per dimension, plus count
+
+class StudentStatsResponse(BaseModel):
+    total: int
+    counts: Dict[str, List[StatsCount]]  # year, class, major, enrollmentYear
+    crosstab: Optional[StatsCrosstab] = None
+
+class StatsRecomputeResponse(BaseModel):
+    groups: int
+    students: int
+    mismatched: int  # groups whose stored count was wrong
+    repaired: bool
+
+# Most ids one bulk request may list
+MAX_BULK_IDS = 10000
+
+class StudentSelection(BaseModel):
+    """Students a bulk operation applies to; all given criteria must match"""
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=MAX_BULK_IDS)
+    year: Optional[str] = Field(None, max_length=50)
+    class_: Optional[str] = Field(None, alias="class", max_length=10)  # Using class_ to avoid Python keyword
+    enrollmentYear: Optional[int] = None
+
+    model_config = ConfigDict(populate_by_name=True)
+
+class StudentChanges(BaseModel):
+    """Cohort fields a bulk update may set"""
+    enrollmentYear: Optional[int] = Field(None, ge=1900, le=2100)
+    major: Optional[str] = Field(None, max_length=100)
+    class_: Optional[str] = Field(None, alias="class", min_length=1, max_length=10)  # Using class_ to avoid Python keyword
+    year: Optional[str] = Field(None, min_length=1, max_length=50)
+
+    model_config = ConfigDict(populate_by_name=True)
+
+class BulkUpdateRequest(BaseModel):
+    filter: StudentSelection
+    changes: StudentChanges
+    dryRun: bool = False
+
+class BulkDeleteRequest(BaseModel):
+    filter: StudentSelection
+    dryRun: bool = False
+
+class BulkResultResponse(BaseModel):
+    dryRun: bool
+    matched: int  # students matching the filter
+    affected: int  # students updated/deleted, or that would be in a dry run
+    sampleIds: Optional[List[int]] = None  # first affected ids, dry run only
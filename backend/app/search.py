@@ -0,0 +1,91 @@
+"""
+Full-text student search backed by an SQLite FTS5 index.
+
+The students_fts table is an external-content FTS5 index over the students
+table: it stores only the token index, and triggers keep it in sync on every
+insert, update and delete.
+"""
+import re
+from typing import Optional
+
+from sqlalchemy import column, func, literal_column, table, text
+
+# Index columns, in the order used by the bm25() weights below
+FTS_COLUMNS = ("first_name", "last_name", "email", "major")
+
+# Names rank above email, which ranks above major
+BM25_WEIGHTS = (10.0, 10.0, 5.0, 1.0)
+
+_FTS_COLUMN_LIST = ", ".join(FTS_COLUMNS)
+_NEW_VALUES = ", ".join(f"new.{name}" for name in FTS_COLUMNS)
+_OLD_VALUES = ", ".join(f"old.{name}" for name in FTS_COLUMNS)
+
+SEARCH_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+        {_FTS_COLUMN_LIST},
+        content='students',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS students_fts_ai AFTER INSERT ON students BEGIN
+        INSERT INTO students_fts(rowid, {_FTS_COLUMN_LIST}) VALUES (new.id, {_NEW_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS students_fts_ad AFTER DELETE ON students BEGIN
+        INSERT INTO students_fts(students_fts, rowid, {_FTS_COLUMN_LIST}) VALUES ('delete', old.id, {_OLD_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS students_fts_au AFTER UPDATE OF {_FTS_COLUMN_LIST} ON students BEGIN
+        INSERT INTO students_fts(students_fts, rowid, {_FTS_COLUMN_LIST}) VALUES ('delete', old.id, {_OLD_VALUES});
+        INSERT INTO students_fts(rowid, {_FTS_COLUMN_LIST}) VALUES (new.id, {_NEW_VALUES});
+    END
+    """,
+]
+
+students_fts = table("students_fts", column("rowid"))
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def ensure_search_index(connection) -> None:
+    """
+    Create the FTS5 table and sync triggers if they are missing.
+
+    The index is rebuilt from the students table only when it is first
+    created; afterwards the triggers keep it current.
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'students_fts'")
+    ).first()
+    for statement in SEARCH_SCHEMA:
+        connection.execute(text(statement))
+    if not exists:
+        connection.execute(text("INSERT INTO students_fts(students_fts) VALUES ('rebuild')"))
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query matching every word as a prefix.
+
+    "ann smi" -> '"ann"* "smi"*'. Words are quoted so user input can never
+    inject FTS5 operators. Returns None if the text has no searchable words.
+    """
+    tokens = _TOKEN_RE.findall(q)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def apply_search(query, model, match_query: str):
+    """Restrict a Student query to FTS matches, best matches first"""
+    fts = literal_column("students_fts")
+    return (
+        query.join(students_fts, students_fts.c.rowid == model.id)
+        .filter(fts.op("MATCH")(match_query))
+        .order_by(func.bm25(fts, *BM25_WEIGHTS), model.id)
+    )
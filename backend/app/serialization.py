@@ -0,0 +1,84 @@
+"""
+Single-pass serialization of student responses.
+
+Rows are turned into camelCase dicts straight from ORM objects (or column
+rows) by a serializer compiled once per field list, then encoded to JSON
+bytes in one call. The data comes from our own database, so it is not
+validated against the response schemas again; the schemas stay the
+documented contract (response_model) and define the same keys, order and
+``class`` alias that are produced here.
+
+orjson is used when it is installed, the standard json module otherwise.
+"""
+import json
+from operator import attrgetter
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from app.blobs import blob_url, documents_to_response
+from app.fields import ALL_FIELDS, FIELD_COLUMNS
+from app.thumbnails import thumbnail_url
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+# Response fields whose column value needs converting; the rest are copied as-is
+FIELD_CONVERTERS = {
+    "dob": lambda value: value.isoformat() if value else None,
+    "photo": blob_url,
+    "thumbnail": thumbnail_url,
+    "documents": documents_to_response,
+}
+
+_serializers: Dict[Tuple[str, ...], Callable] = {}
+
+
+def dumps(data) -> bytes:
+    """Encode to compact UTF-8 JSON, the same bytes pydantic's dump_json produces"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _compile(fields: Tuple[str, ...]) -> Callable:
+    columns = [FIELD_COLUMNS[field] for field in fields]
+    if len(columns) == 1:
+        column = columns[0]
+        read = lambda row: (getattr(row, column),)
+    else:
+        read = attrgetter(*columns)
+    converters = [(field, FIELD_CONVERTERS[field]) for field in fields if field in FIELD_CONVERTERS]
+
+    def to_dict(row) -> dict:
+        values = dict(zip(fields, read(row)))
+        for field, convert in converters:
+            values[field] = convert(values[field])
+        return values
+
+    return to_dict
+
+
+def student_serializer(fields: Iterable[str] = ALL_FIELDS) -> Callable:
+    """Function turning a Student (or a row of its columns) into a response dict"""
+    key = tuple(fields)
+    serializer = _serializers.get(key)
+    if serializer is None:
+        serializer = _serializers[key] = _compile(key)
+    return serializer
+
+
+def student_to_dict(student, fields: List[str] = ALL_FIELDS) -> dict:
+    """Convert a Student to a dictionary with camelCase keys, limited to the given fields"""
+    return student_serializer(fields)(student)
+
+
+def encode_student(student, fields: List[str] = ALL_FIELDS) -> bytes:
+    return dumps(student_serializer(fields)(student))
+
+
+def encode_students(students: Iterable, fields: List[str] = ALL_FIELDS) -> bytes:
+    to_dict = student_serializer(fields)
+    return dumps([to_dict(student) for student in students])
@@ -0,0 +1,91 @@
+"""
+Serving the built frontend (app/static, written by ``vite build``).
+
+``index.html`` is read once per worker and answered from memory with an
+ETag, so client-side navigations cost no file system access; a deploy
+restarts the workers, which picks up the new file. Vite fingerprints every
+file under /assets with a content hash, so those are served with an
+immutable Cache-Control and, when the client accepts it, from the .br/.gz
+variants written at deploy time by ``python -m app.compression assets``.
+"""
+import hashlib
+import mimetypes
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import anyio
+from fastapi import Request, Response, status
+from fastapi.staticfiles import StaticFiles
+
+from app.compression import PRECOMPRESSED_SUFFIXES, accepted_encodings
+from app.versioning import REVALIDATE_CACHE_CONTROL, etag_matches
+
+# Asset names change with their content
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class SpaIndex:
+    """index.html held in memory"""
+
+    def __init__(self, path: Path):
+        self.body: Optional[bytes] = path.read_bytes() if path.exists() else None
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:16]}"' if self.body is not None else None
+
+    def response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+        if etag_matches(request.headers.get("if-none-match"), self.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=self.body, media_type="text/html; charset=utf-8", headers=headers)
+
+
+class AssetFiles(StaticFiles):
+    """StaticFiles for fingerprinted assets: immutable caching and precompressed variants"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Asset path -> available encodings; looked up once per worker
+        self._variants: Dict[str, List[Tuple[str, str]]] = {}
+
+    def _find_variants(self, path: str) -> List[Tuple[str, str]]:
+        variants = self._variants.get(path)
+        if variants is None:
+            variants = []
+            for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+                _, stat_result = self.lookup_path(path + suffix)
+                if stat_result is not None:
+                    variants.append((encoding, path + suffix))
+            self._variants[path] = variants
+        return variants
+
+    async def get_response(self, path: str, scope) -> Response:
+        accept_encoding = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        accepted = accepted_encodings(accept_encoding)
+
+        response = None
+        variants = self._variants.get(path)
+        if variants is None:
+            variants = await anyio.to_thread.run_sync(self._find_variants, path)
+        for encoding, variant_path in variants:
+            if encoding in accepted:
+                response = await super().get_response(variant_path, scope)
+                if response.status_code == status.HTTP_200_OK:
+                    response.headers["Content-Type"] = self._media_type(path)
+                    response.headers["Content-Encoding"] = encoding
+                break
+        if response is None:
+            response = await super().get_response(path, scope)
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+            if variants:
+                response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    @staticmethod
+    def _media_type(path: str) -> str:
+        """Content type of the uncompressed asset"""
+        media_type = mimetypes.guess_type(os.path.basename(path))[0] or "application/octet-stream"
+        return media_type + "; charset=utf-8" if media_type.startswith("text/") else media_type
@@ -0,0 +1,88 @@
+"""
+Worker startup timing.
+
+Passenger starts worker processes as traffic arrives and stops idle ones, so
+the first request after a spawn waits for the whole cold start. The phases
+are timed here and logged once per worker when it is ready (``app.startup``):
+
+- interpreter: from process start until app.main starts importing (Linux only)
+- import: importing FastAPI, SQLAlchemy and the app modules
+- app: creating the app, its middleware and routes
+- threadpool: starting the threadpool the database work runs on
+- database: the startup check of the schema version
+
+A startup slower than STARTUP_BUDGET_MS is logged as a warning
+(``app.startup_slow``). ``python -m benchmarks.cold_start`` measures cold
+starts in fresh processes and exits with status 1 when over budget.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from app.log import get_logger, log_event
+
+try:
+    from config import STARTUP_BUDGET_MS
+except ImportError:
+    STARTUP_BUDGET_MS = 3000
+
+logger = get_logger("startup")
+
+# Phase name -> seconds, in the order the phases ran
+phases: Dict[str, float] = {}
+
+_last_mark = time.perf_counter()
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process started, from /proc (None where unavailable)"""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesised command name; starttime is field 22
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+_age = process_age()
+if _age is not None:
+    phases["interpreter"] = _age
+
+
+def mark(phase: str) -> None:
+    """End a phase that started at the previous mark (or when this module was imported)"""
+    global _last_mark
+    now = time.perf_counter()
+    phases[phase] = now - _last_mark
+    _last_mark = now
+
+
+@contextmanager
+def timed(phase: str):
+    """Time a phase that does not directly follow the previous one"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[phase] = time.perf_counter() - started
+
+
+def total_seconds() -> float:
+    return sum(phases.values())
+
+
+def report() -> None:
+    """Log the startup breakdown (once the worker is ready to serve)"""
+    total_ms = round(total_seconds() * 1000, 1)
+    breakdown = {name: round(seconds * 1000, 1) for name, seconds in phases.items()}
+    log_event(logger, "app.startup", total_ms=total_ms, phases_ms=breakdown, pid=os.getpid())
+    if total_ms > STARTUP_BUDGET_MS:
+        log_event(
+            logger, "app.startup_slow", level=logging.WARNING,
+            total_ms=total_ms, budget_ms=STARTUP_BUDGET_MS, phases_ms=breakdown,
+        )
@@ -0,0 +1,173 @@
+"""
+Student counts for dashboards, maintained incrementally.
+
+The student_stats table holds one row per distinct (year, class_name, major,
+enrollment_year) combination with the number of students that have it.
+Triggers on the students table adjust the counts on every insert, update
+and delete, bulk statements and other worker processes included, so the
+statistics endpoint reads the summary rows (bounded by the number of
+distinct combinations) instead of scanning the roster.
+
+recompute_student_stats rebuilds the counts from the students table and
+reports whether they had drifted.
+"""
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# API dimension name -> column, in response order
+STATS_DIMENSIONS = {
+    "year": "year",
+    "class": "class_name",
+    "major": "major",
+    "enrollmentYear": "enrollment_year",
+}
+
+_KEY_COLUMNS = tuple(STATS_DIMENSIONS.values())
+_KEY_LIST = ", ".join(_KEY_COLUMNS)
+
+
+def _values(row: str) -> str:
+    return ", ".join(f"{row}.{name}" for name in _KEY_COLUMNS)
+
+
+def _matches(row: str) -> str:
+    # IS instead of = so that a NULL major matches its own group
+    return " AND ".join(f"{name} IS {row}.{name}" for name in _KEY_COLUMNS)
+
+
+def _add(row: str) -> str:
+    return f"""
+        INSERT INTO student_stats ({_KEY_LIST}, count)
+            SELECT {_values(row)}, 0
+            WHERE NOT EXISTS (SELECT 1 FROM student_stats WHERE {_matches(row)});
+        UPDATE student_stats SET count = count + 1 WHERE {_matches(row)};"""
+
+
+def _remove(row: str) -> str:
+    return f"""
+        UPDATE student_stats SET count = count - 1 WHERE {_matches(row)};
+        DELETE FROM student_stats WHERE count <= 0 AND {_matches(row)};"""
+
+
+STATS_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS student_stats_ai AFTER INSERT ON students BEGIN{_add("new")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS student_stats_ad AFTER DELETE ON students BEGIN{_remove("old")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS student_stats_au AFTER UPDATE OF {_KEY_LIST} ON students
+    WHEN NOT ({" AND ".join(f"new.{name} IS old.{name}" for name in _KEY_COLUMNS)}) BEGIN{_remove("old")}{_add("new")}
+    END
+    """,
+]
+
+_GROUP_COUNTS = f"SELECT {_KEY_LIST}, COUNT(*) FROM students GROUP BY {_KEY_LIST}"
+
+
+def _rebuild(connection) -> None:
+    connection.execute(text("DELETE FROM student_stats"))
+    connection.execute(text(f"INSERT INTO student_stats ({_KEY_LIST}, count) {_GROUP_COUNTS}"))
+
+
+def ensure_student_stats(connection) -> None:
+    """
+    Create the triggers maintaining student_stats if they are missing.
+
+    The counts are built from the students table only when the triggers are
+    first created; afterwards the triggers keep them current.
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'student_stats_ai'")
+    ).first()
+    for statement in STATS_TRIGGERS:
+        connection.execute(text(statement))
+    if not exists:
+        _rebuild(connection)
+
+
+def recompute_student_stats(db: Session) -> dict:
+    """Compare the summary counts with the students table and rebuild them if they differ"""
+    connection = db.connection()
+    expected = {tuple(row[:-1]): row[-1] for row in connection.exec_driver_sql(_GROUP_COUNTS)}
+    stored = Counter()
+    rows = 0
+    for row in connection.exec_driver_sql(f"SELECT {_KEY_LIST}, count FROM student_stats"):
+        stored[tuple(row[:-1])] += row[-1]
+        rows += 1
+    mismatched = sum(1 for key in expected.keys() | stored.keys() if expected.get(key, 0) != stored.get(key, 0))
+    # Duplicate rows of one group also need a rebuild, even if their sum is right
+    repaired = bool(mismatched) or rows != len(stored)
+    if repaired:
+        _rebuild(connection)
+        # Stats responses are cached and tagged by the collection version
+        connection.exec_driver_sql(
+            "UPDATE collection_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'students'"
+        )
+        db.commit()
+    return {
+        "groups": len(expected),
+        "students": sum(expected.values()),
+        "mismatched": mismatched,
+        "repaired": repaired,
+    }
+
+
+def parse_dimensions(value: Optional[str]) -> Optional[List[str]]:
+    """
+    Turn a comma-separated crosstab= value into dimension names.
+
+    Raises ValueError for unknown names or fewer than two dimensions.
+    """
+    if not value:
+        return None
+    dimensions = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in dimensions if name not in STATS_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown dimension(s): {', '.join(unknown)}. Use any of: {', '.join(STATS_DIMENSIONS)}")
+    if len(set(dimensions)) < 2 or len(set(dimensions)) != len(dimensions):
+        raise ValueError("crosstab needs two or more distinct dimensions, e.g. year,class")
+    return dimensions
+
+
+def _sort_key(values: tuple) -> tuple:
+    # Missing values (no major) sort last
+    return tuple((value is None, value if value is not None else "") for value in values)
+
+
+def _group(rows: Sequence[tuple], indexes: Sequence[int]) -> List[tuple]:
+    key_of = itemgetter(*indexes)
+    counts: Dict = {}
+    for row in rows:
+        key = key_of(row)
+        counts[key] = counts.get(key, 0) + row[-1]
+    if len(indexes) == 1:
+        return sorted((((key,), count) for key, count in counts.items()), key=lambda item: _sort_key(item[0]))
+    return sorted(counts.items(), key=lambda item: _sort_key(item[0]))
+
+
+def student_stats(db: Session, crosstab: Optional[List[str]] = None) -> dict:
+    """Total, counts per dimension and optionally a cross-tabulation, from the summary rows"""
+    rows = [tuple(row) for row in db.connection().exec_driver_sql(f"SELECT {_KEY_LIST}, count FROM student_stats")]
+    names = list(STATS_DIMENSIONS)
+    result = {
+        "total": sum(row[-1] for row in rows),
+        "counts": {
+            name: [{"value": key[0], "count": count} for key, count in _group(rows, (index,))]
+            for index, name in enumerate(names)
+        },
+    }
+    if crosstab:
+        cells = _group(rows, [names.index(name) for name in crosstab])
+        result["crosstab"] = {
+            "dimensions": crosstab,
+            "cells": [{**dict(zip(crosstab, key)), "count": count} for key, count in cells],
+        }
+    return result
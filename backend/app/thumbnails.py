@@ -0,0 +1,231 @@
+"""
+Photo thumbnails, generated in a background process pool.
+
+When a photo is stored, its thumbnails (a square JPEG of THUMBNAIL_SIZE
+pixels and, with THUMBNAIL_WEBP, a WebP variant) are rendered by a worker
+process and written next to the original blob ("<hash>.thumb.jpg",
+"<hash>.thumb.webp"). Blobs are content-addressed, so a thumbnail never goes
+stale and its URL (/api/blobs/<hash>/thumbnail) can be derived from the photo
+reference without a lookup. Until a thumbnail exists that URL serves the
+original photo with a short cache lifetime.
+
+Resizing is CPU-bound, so it runs in separate processes rather than on the
+threads serving requests. Photos stored before thumbnails existed, or while
+the pool was down, are processed with:
+
+    python -m app.thumbnails backfill
+"""
+import importlib.util
+import logging
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import Executor, Future
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.blobs import BLOB_REF_PREFIX, blob_path, blob_url
+from app.log import get_logger, log_event
+
+# Try to get from config, otherwise use defaults
+try:
+    from config import THUMBNAILS_ENABLED, THUMBNAIL_SIZE, THUMBNAIL_QUALITY, THUMBNAIL_WEBP, THUMBNAIL_WORKERS
+except ImportError:
+    THUMBNAILS_ENABLED = True
+    THUMBNAIL_SIZE = 96
+    THUMBNAIL_QUALITY = 80
+    THUMBNAIL_WEBP = True
+    THUMBNAIL_WORKERS = 1
+
+# Pillow is only imported by the worker processes
+PILLOW_AVAILABLE = importlib.util.find_spec("PIL") is not None
+
+# Format -> (content type, file suffix), in order of preference
+THUMBNAIL_FORMATS = {
+    "webp": ("image/webp", ".thumb.webp"),
+    "jpeg": ("image/jpeg", ".thumb.jpg"),
+}
+
+THUMBNAIL_URL_SUFFIX = "/thumbnail"
+
+logger = get_logger("thumbnails")
+
+_executor: Optional[Executor] = None
+_pending: Set[str] = set()
+# Photos that could not be decoded; not retried until the process restarts
+_failed: Set[str] = set()
+_lock = threading.Lock()
+
+
+def enabled_formats() -> List[str]:
+    return [name for name in THUMBNAIL_FORMATS if name != "webp" or THUMBNAIL_WEBP]
+
+
+def thumbnail_path(digest: str, format: str) -> Path:
+    return blob_path(digest).with_name(digest + THUMBNAIL_FORMATS[format][1])
+
+
+def thumbnail_url(ref: Optional[str]) -> Optional[str]:
+    """URL of a photo's thumbnail, derived from its stored reference"""
+    url = blob_url(ref)
+    return url + THUMBNAIL_URL_SUFFIX if url else None
+
+
+def has_thumbnails(digest: str) -> bool:
+    return all(thumbnail_path(digest, format).exists() for format in enabled_formats())
+
+
+def render_thumbnails(source: str, targets: Dict[str, str], size: int, quality: int) -> None:
+    """
+    Write square thumbnails of an image file (runs in a worker process).
+
+    ``targets`` maps a format name ("jpeg", "webp") to the output path. The
+    image is cropped to a centered square, like the avatars' object-fit: cover.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        # JPEG can decode straight at a reduced scale, which is much faster
+        image.draft("RGB", (size * 2, size * 2))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+            rgba = image.convert("RGBA")
+            image = Image.new("RGB", rgba.size, "white")
+            image.paste(rgba, mask=rgba.getchannel("A"))
+        else:
+            image = image.convert("RGB")
+        thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+
+    for format, target in targets.items():
+        directory = os.path.dirname(target)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                thumbnail.save(tmp_file, format=format.upper(), quality=quality)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        # Imported on the first photo: multiprocessing is not needed until then
+        from concurrent.futures import ProcessPoolExecutor
+        _executor = ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS)
+    return _executor
+
+
+def _submit(digest: str) -> Future:
+    targets = {format: str(thumbnail_path(digest, format)) for format in enabled_formats()}
+    return _get_executor().submit(render_thumbnails, str(blob_path(digest)), targets, THUMBNAIL_SIZE, THUMBNAIL_QUALITY)
+
+
+def _finished(digest: str, future: Future) -> None:
+    with _lock:
+        _pending.discard(digest)
+    error = None if future.cancelled() else future.exception()
+    if error is not None:
+        with _lock:
+            _failed.add(digest)
+        log_event(logger, "thumbnail.failed", level=logging.WARNING, blob=digest, error=repr(error))
+
+
+def _digest(ref: Optional[str]) -> Optional[str]:
+    if not ref or not ref.startswith(BLOB_REF_PREFIX):
+        return None
+    return ref[len(BLOB_REF_PREFIX):]
+
+
+def schedule_thumbnails(refs: Iterable[Optional[str]]) -> int:
+    """
+    Queue thumbnail generation for photos (stored references) that have none.
+
+    Returns immediately; the number of photos queued is returned.
+    """
+    global _executor
+    if not THUMBNAILS_ENABLED or not PILLOW_AVAILABLE:
+        return 0
+    queued = 0
+    for digest in {_digest(ref) for ref in refs}:
+        if digest is None or has_thumbnails(digest):
+            continue
+        with _lock:
+            if digest in _pending or digest in _failed:
+                continue
+            _pending.add(digest)
+        try:
+            future = _submit(digest)
+        except Exception as e:
+            # A broken pool (worker killed) is replaced on the next call
+            with _lock:
+                _pending.discard(digest)
+                _executor = None
+            log_event(logger, "thumbnail.pool_error", level=logging.WARNING, error=repr(e))
+            continue
+        future.add_done_callback(partial(_finished, digest))
+        queued += 1
+    return queued
+
+
+def shutdown_thumbnails() -> None:
+    """Stop the worker processes, dropping queued work (backfill picks it up later)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def backfill(force: bool = False) -> Dict[str, int]:
+    """Generate missing thumbnails for every student photo, waiting for the results"""
+    from sqlalchemy import select
+
+    from app.database import SessionLocal
+    from app.models import Student
+
+    db = SessionLocal()
+    try:
+        refs = db.scalars(select(Student.photo).where(Student.photo.is_not(None)).distinct()).all()
+    finally:
+        db.close()
+
+    digests = [digest for digest in map(_digest, refs) if digest is not None]
+    todo = [digest for digest in digests if force or not has_thumbnails(digest)]
+    failed = 0
+    futures = {digest: _submit(digest) for digest in todo}
+    for digest, future in futures.items():
+        error = future.exception()
+        if error is not None:
+            failed += 1
+            log_event(logger, "thumbnail.failed", level=logging.WARNING, blob=digest, error=repr(error))
+    shutdown_thumbnails()
+    return {"photos": len(digests), "generated": len(todo) - failed, "failed": failed}
+
+
+def main():
+    import argparse
+    from concurrent.futures import ProcessPoolExecutor
+    parser = argparse.ArgumentParser(description="Student photo thumbnails")
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("backfill", help="generate missing thumbnails for existing photos")
+    command.add_argument("--force", action="store_true", help="regenerate existing thumbnails too")
+    command.add_argument("--workers", type=int, help="worker processes (default: all CPUs)")
+    args = parser.parse_args()
+
+    if not PILLOW_AVAILABLE:
+        sys.exit("Pillow is not installed: pip install Pillow")
+    from app.log import setup_logging
+    setup_logging()
+
+    global _executor
+    _executor = ProcessPoolExecutor(max_workers=args.workers or os.cpu_count())
+    result = backfill(args.force)
+    print(f"{result['photos']} photos: {result['generated']} thumbnailed, {result['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Streaming multipart/form-data uploads of student photos and documents.
+
+The request body is parsed as it arrives and every file part is written
+straight to the blob store (see ``BlobWriter``), so a worker holds one
+network chunk at a time instead of the whole upload; the JSON API decodes
+base64 payloads in memory. Limits are enforced while reading: the declared
+Content-Length and each part's Content-Type are checked before their data is
+read, and sizes are counted as the bytes arrive, so an oversized or
+disallowed upload is rejected without consuming the rest of the body.
+"""
+import os
+from typing import AsyncIterator, List, NamedTuple, Optional
+
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, MultipartState, parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+from app.blobs import BlobWriter
+
+# Try to get from config, otherwise use defaults
+try:
+    from config import (
+        UPLOAD_MAX_PHOTO_BYTES, UPLOAD_MAX_DOCUMENT_BYTES, UPLOAD_MAX_REQUEST_BYTES,
+        UPLOAD_MAX_FILES, UPLOAD_PHOTO_TYPES, UPLOAD_DOCUMENT_TYPES,
+    )
+except ImportError:
+    UPLOAD_MAX_PHOTO_BYTES = 5 * 1024 * 1024
+    UPLOAD_MAX_DOCUMENT_BYTES = 20 * 1024 * 1024
+    UPLOAD_MAX_REQUEST_BYTES = 50 * 1024 * 1024
+    UPLOAD_MAX_FILES = 10
+    UPLOAD_PHOTO_TYPES = ["image/jpeg", "image/png", "image/webp", "image/gif"]
+    UPLOAD_DOCUMENT_TYPES = ["application/pdf", "image/jpeg", "image/png", "text/plain"]
+
+# Form field -> per-file size limit
+UPLOAD_FIELDS = {
+    "photo": UPLOAD_MAX_PHOTO_BYTES,
+    "documents": UPLOAD_MAX_DOCUMENT_BYTES,
+}
+
+# Leading bytes of the image formats accepted as photos
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+SNIFF_BYTES = 12
+
+MAX_FILENAME_LENGTH = 255
+
+
+class UploadError(ValueError):
+    """A rejected upload, with the HTTP status to answer"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UploadedFile(NamedTuple):
+    field: str  # "photo" or "documents"
+    name: str  # client file name
+    content_type: str
+    digest: str
+    size: int
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Content type of an image from its first bytes, or None if not recognized"""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+def _safe_filename(value: bytes) -> str:
+    name = value.decode("utf-8", "replace").replace("\\", "/")
+    return os.path.basename(name)[:MAX_FILENAME_LENGTH] or "document"
+
+
+class _Part:
+    def __init__(self, field: str, name: str, content_type: str):
+        self.field = field
+        self.name = name
+        self.content_type = content_type
+        self.limit = UPLOAD_FIELDS[field]
+        self.writer: Optional[BlobWriter] = None
+        self.head = b""
+        self.size = 0
+
+
+class MultipartUpload:
+    """
+    Parser for one multipart/form-data request body of "photo" and "documents" files.
+
+    ``read`` consumes the body and returns the stored files. Any error
+    removes what was written so far; files are only moved into the blob
+    store once the whole body has been accepted.
+    """
+
+    def __init__(self, content_type: Optional[str], content_length: Optional[str] = None):
+        media_type, params = parse_options_header(content_type or "")
+        if media_type != b"multipart/form-data" or b"boundary" not in params:
+            raise UploadError("Expected a multipart/form-data body", 415)
+        if content_length and content_length.isdigit() and int(content_length) > UPLOAD_MAX_REQUEST_BYTES:
+            raise UploadError(f"Upload exceeds {UPLOAD_MAX_REQUEST_BYTES} bytes", 413)
+
+        self._parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+        self._received = 0
+        self._headers = {}
+        self._header_name = b""
+        self._header_value = b""
+        self._part: Optional[_Part] = None
+        self._parts: List[_Part] = []
+        # File data parsed from the current chunk, written off the event loop
+        self._pending: List[tuple] = []
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+        self._part = None
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        field = options.get(b"name", b"").decode("utf-8", "replace")
+        if field not in UPLOAD_FIELDS or b"filename" not in options:
+            raise UploadError(f"Unexpected form field '{field}'; send files as 'photo' or 'documents'")
+        if field == "photo" and any(part.field == "photo" for part in self._parts):
+            raise UploadError("Only one photo can be uploaded")
+        if len(self._parts) >= UPLOAD_MAX_FILES:
+            raise UploadError(f"At most {UPLOAD_MAX_FILES} files can be uploaded at once")
+
+        content_type = parse_options_header(self._headers.get(b"content-type", b""))[0].decode("latin-1").lower()
+        if field == "documents" and content_type not in UPLOAD_DOCUMENT_TYPES:
+            raise UploadError(f"Unsupported document type '{content_type or 'unknown'}'", 415)
+        # Photo types are checked against the file's content when it arrives
+        self._part = _Part(field, _safe_filename(options[b"filename"]), content_type)
+        self._parts.append(self._part)
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        part = self._part
+        part.size += end - start
+        if part.size > part.limit:
+            raise UploadError(f"'{part.name}' exceeds {part.limit} bytes", 413)
+        if part.field == "photo" and len(part.head) < SNIFF_BYTES:
+            part.head += data[start:min(end, start + SNIFF_BYTES - len(part.head))]
+            if len(part.head) >= SNIFF_BYTES:
+                self._check_photo(part)
+        self._pending.append((part, data[start:end]))
+
+    def _on_part_end(self) -> None:
+        part = self._part
+        if part.field == "photo" and len(part.head) < SNIFF_BYTES:
+            self._check_photo(part)
+
+    def _check_photo(self, part: _Part) -> None:
+        content_type = sniff_image_type(part.head)
+        if content_type not in UPLOAD_PHOTO_TYPES:
+            raise UploadError("Photo must be a JPEG, PNG, WebP or GIF image", 415)
+        part.content_type = content_type
+
+    def _write_pending(self) -> None:
+        for part, data in self._pending:
+            if part.writer is None:
+                part.writer = BlobWriter()
+            part.writer.write(data)
+        self._pending.clear()
+
+    def _finish(self) -> List[UploadedFile]:
+        files = []
+        for part in self._parts:
+            if part.writer is None:
+                part.writer = BlobWriter()  # empty file
+            digest = part.writer.finish()
+            files.append(UploadedFile(part.field, part.name, part.content_type, digest, part.size))
+        return files
+
+    def _discard(self) -> None:
+        for part in self._parts:
+            if part.writer is not None:
+                part.writer.discard()
+
+    async def read(self, chunks: AsyncIterator[bytes]) -> List[UploadedFile]:
+        """Parse the body from the request stream and store its files"""
+        try:
+            async for chunk in chunks:
+                self._received += len(chunk)
+                if self._received > UPLOAD_MAX_REQUEST_BYTES:
+                    raise UploadError(f"Upload exceeds {UPLOAD_MAX_REQUEST_BYTES} bytes", 413)
+                try:
+                    self._parser.write(chunk)
+                except MultipartParseError as e:
+                    raise UploadError(f"Malformed multipart body: {e}")
+                if self._pending:
+                    await run_in_threadpool(self._write_pending)
+            self._parser.finalize()
+            if self._parser.state != MultipartState.END:
+                raise UploadError("Incomplete multipart body")
+            return await run_in_threadpool(self._finish)
+        except BaseException:
+            # Includes client disconnects and parser errors
+            self._discard()
+            raise
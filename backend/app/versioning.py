@@ -0,0 +1,166 @@
+"""
+Row and collection versions for conditional requests.
+
+Each Student row carries a version that is incremented on every update (by
+SQLAlchemy's version_id_col for ORM updates, explicitly in the router's UPDATE
+statements), plus an updated_at timestamp. The collection_versions
+table holds one counter per table, bumped by triggers on every insert, update
+and delete, so it also covers bulk statements and other worker processes.
+Read endpoints derive strong ETags from these versions and answer
+If-None-Match with 304 before loading or serializing anything.
+
+GZipMiddleware gives a compressed response its own strong ETag by adding
+GZIP_ETAG_SUFFIX inside the quotes. The validators here strip it, so a
+client that cached the gzipped body still gets 304s and passes If-Match.
+"""
+import hashlib
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Responses must be revalidated, but may be stored and answered with 304
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+VERSION_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS students_version_{event.lower()} AFTER {event} ON students BEGIN
+        UPDATE collection_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE name = 'students';
+    END
+    """
+    for event in ("INSERT", "UPDATE", "DELETE")
+]
+
+# Added to the ETag of a gzipped response: "student-1-v3" -> "student-1-v3-gzip"
+GZIP_ETAG_SUFFIX = "-gzip"
+
+_ROW_VERSION_RE = re.compile(r'^(?:W/)?"student-(\d+)-v(\d+)(?:-[0-9a-f]+)?"$')
+
+
+def ensure_collection_versions(connection) -> None:
+    """Seed the students counter and create the triggers that bump it"""
+    connection.execute(text(
+        "INSERT OR IGNORE INTO collection_versions (name, version, updated_at) "
+        "VALUES ('students', 1, CURRENT_TIMESTAMP)"
+    ))
+    for statement in VERSION_TRIGGERS:
+        connection.execute(text(statement))
+
+
+def get_collection_version(db: Session, name: str = "students") -> Tuple[int, Optional[datetime]]:
+    """Current (version, updated_at) of a collection"""
+    row = db.connection().exec_driver_sql(
+        "SELECT version, updated_at FROM collection_versions WHERE name = ?", (name,)
+    ).first()
+    if row is None:
+        return 0, None
+    version, updated_at = row
+    return version, datetime.fromisoformat(updated_at) if updated_at else None
+
+
+def get_row_version(db: Session, student_id: int) -> Optional[Tuple[int, Optional[datetime]]]:
+    """
+    Current (version, updated_at) of one student, or None if it does not exist.
+
+    Runs on every by-id read, so it skips statement construction and goes
+    straight to the driver with a fixed primary-key lookup.
+    """
+    row = db.connection().exec_driver_sql(
+        "SELECT version, updated_at FROM students WHERE id = ?", (student_id,)
+    ).first()
+    if row is None:
+        return None
+    version, updated_at = row
+    return version, datetime.fromisoformat(updated_at) if updated_at else None
+
+
+def _variant(parts: Iterable) -> str:
+    """Short digest distinguishing representations (projections, query params)"""
+    return hashlib.sha1(repr(tuple(parts)).encode()).hexdigest()[:12]
+
+
+def student_etag(student_id: int, version: int, fields: Optional[list] = None) -> str:
+    """Strong ETag of one student representation"""
+    if fields is None:
+        return f'"student-{student_id}-v{version}"'
+    return f'"student-{student_id}-v{version}-{_variant(fields)}"'
+
+
+def collection_etag(version: int, *params) -> str:
+    """Strong ETag of a list response, keyed by collection version and query"""
+    return f'"students-v{version}-{_variant(params)}"'
+
+
+def strip_encoding(etag: str) -> str:
+    """The ETag of the uncompressed representation, given the ETag of either"""
+    etag = etag.strip()
+    if etag.endswith(f'{GZIP_ETAG_SUFFIX}"'):
+        return etag[:-len(GZIP_ETAG_SUFFIX) - 1] + '"'
+    return etag
+
+
+def parse_student_etag(etag: str) -> Optional[Tuple[int, int]]:
+    """Extract (student_id, version) from an ETag produced by student_etag"""
+    match = _ROW_VERSION_RE.match(strip_encoding(etag))
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def version_matches(header: str, student_id: int, version: int) -> bool:
+    """
+    Check an If-Match header against the current version of a student.
+
+    Any representation ETag of the same student and version matches, so a
+    client may send the tag it got from a projected read.
+    """
+    if header.strip() == "*":
+        return True
+    return any(
+        parse_student_etag(value) == (student_id, version)
+        for value in header.split(",")
+    )
+
+
+def matching_versions(header: str, student_id: int) -> Optional[List[int]]:
+    """
+    Versions of a student an If-Match header accepts, for a conditional UPDATE.
+
+    None means any version ("*"); an empty list means none.
+    """
+    if header.strip() == "*":
+        return None
+    versions = []
+    for value in header.split(","):
+        parsed = parse_student_etag(value)
+        if parsed is not None and parsed[0] == student_id:
+            versions.append(parsed[1])
+    return versions
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (weak comparison, list or "*") against an ETag"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {strip_encoding(value) for value in header.split(",")}
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    """Format a naive UTC datetime for Last-Modified"""
+    if value is None:
+        return None
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def cache_headers(etag: str, updated_at: Optional[datetime]) -> dict:
+    """Validator and Cache-Control headers for a read response"""
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+    last_modified = http_date(updated_at)
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
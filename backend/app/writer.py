@@ -0,0 +1,225 @@
+"""
+Single writer per process with group commit.
+
+SQLite has one write lock per database. When every request opens its own
+write transaction, a burst of creates and updates makes the threadpool's
+connections queue on that lock in SQLite's busy handler (which sleeps and
+polls) and commit one by one. Instead, route handlers hand their mutations
+to ``Database.write``, which sends them here:
+
+- One thread per worker process applies every write, on its own connection
+  (reads keep using the request connections, which WAL never blocks).
+- Writes that queue up while a transaction is running are applied together
+  in the next one: ``BEGIN IMMEDIATE``, one SAVEPOINT per write, one COMMIT
+  (group commit). Batches are as large as the backlog, up to WRITE_BATCH_MAX.
+- Each write runs in its own session joined to the batch transaction. Its
+  ``commit()`` and ``rollback()`` release or roll back its savepoint, so the
+  write functions are unchanged and a failing write (duplicate email, 404,
+  412) does not affect the others in the batch. A write that is alone in
+  the queue runs in a transaction of its own, as it would without the queue.
+- Each caller gets its own result or exception, only after the batch has
+  committed. If the commit itself fails, every write in the batch fails.
+- Since a write's own ``commit()`` may only release a savepoint, side
+  effects that assume the data is saved (cache invalidation, thumbnail
+  jobs) are registered with ``after_commit`` and run once the batch has
+  committed, or dropped if the write or the batch fails.
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.log import get_logger, log_event
+from app.metrics import observe_write_batch
+
+# Try to get from config, otherwise use defaults
+try:
+    from config import WRITE_BATCH_MAX, WRITE_BATCH_WAIT_MS
+except ImportError:
+    WRITE_BATCH_MAX = 64
+    WRITE_BATCH_WAIT_MS = 0
+
+logger = get_logger("writer")
+
+# Seconds close() waits for queued writes to finish
+CLOSE_TIMEOUT = 30
+
+# Session.info key of the callbacks waiting for the batch to commit
+AFTER_COMMIT = "after_commit"
+
+
+def after_commit(db: Session, callback: Callable[[], None]) -> None:
+    """
+    Run ``callback`` once the changes committed by ``db.commit()`` are saved.
+
+    Call it after the write's commit. In a writer batch the callback waits
+    for the batch's COMMIT; on any other session the commit was final and
+    the callback runs right away.
+    """
+    callbacks = db.info.get(AFTER_COMMIT)
+    if callbacks is None:
+        callback()
+    else:
+        callbacks.append(callback)
+
+
+def _immediate_transactions(sync_engine) -> None:
+    """
+    Take the write lock when a transaction begins, not on its first write.
+
+    pysqlite opens transactions on its own and does not handle SAVEPOINT;
+    with its transaction handling off, SQLAlchemy's begin emits BEGIN
+    IMMEDIATE and savepoints work as documented.
+    """
+    @event.listens_for(sync_engine, "connect")
+    def disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(sync_engine, "begin")
+    def begin_immediate(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+class _Write:
+    __slots__ = ("fn", "args", "kwargs", "context", "loop", "future", "queued_at")
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict, loop: asyncio.AbstractEventLoop, future: asyncio.Future):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        # Request context (metrics, profiling) for the statements the write runs
+        self.context = contextvars.copy_context()
+        self.loop = loop
+        self.future = future
+        self.queued_at = time.perf_counter()
+
+
+def _set_result(future: asyncio.Future, result: Any, error: Optional[BaseException]) -> None:
+    # The caller may have gone away (client disconnected); the write still happened
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class WriteQueue:
+    """Applies ``fn(session, ...)`` writes on one thread, committing them in batches"""
+
+    def __init__(self, engine, max_batch: int = WRITE_BATCH_MAX, wait_ms: float = WRITE_BATCH_WAIT_MS):
+        self.engine = engine
+        self.max_batch = max(1, max_batch)
+        self.wait = wait_ms / 1000
+        _immediate_transactions(engine)
+        # Sessions joined to the batch transaction: commit/rollback act on a savepoint
+        self._sessions = sessionmaker(autoflush=False, join_transaction_mode="create_savepoint")
+        self._queue: "queue.SimpleQueue[Optional[_Write]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Started on the first write, in the process that serves requests
+            self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    async def submit(self, fn: Callable, *args, **kwargs) -> Any:
+        """Queue a write and wait until its batch has committed"""
+        if self._pid != os.getpid():
+            self._start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put(_Write(fn, args, kwargs, loop, future))
+        return await future
+
+    def close(self) -> None:
+        """Finish the queued writes and stop the writer thread"""
+        if self._pid != os.getpid():
+            return
+        self._queue.put(None)
+        self._thread.join(CLOSE_TIMEOUT)
+        self._pid = None
+
+    def _next_batch(self) -> Tuple[List[_Write], bool]:
+        """Block for one write, then take what else is queued; True once closed"""
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = time.perf_counter() + self.wait
+        while len(batch) < self.max_batch:
+            try:
+                if self.wait:
+                    write = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                else:
+                    write = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if write is None:
+                return batch, True
+            batch.append(write)
+        return batch, False
+
+    def _run(self) -> None:
+        closed = False
+        while not closed:
+            batch, closed = self._next_batch()
+            if batch:
+                self._commit(batch)
+
+    def _commit(self, batch: List[_Write]) -> None:
+        started = time.perf_counter()
+        results = []
+        try:
+            with self.engine.connect() as connection:
+                if len(batch) == 1:
+                    # Alone: the write's commit() commits its own transaction
+                    results.append(self._apply(connection, batch[0]))
+                else:
+                    with connection.begin():
+                        for write in batch:
+                            results.append(self._apply(connection, write))
+        except Exception as e:
+            # Nothing of the batch was committed
+            log_event(logger, "db.write_batch_failed", level=logging.ERROR, writes=len(batch), error=repr(e))
+            results = [(None, e, [])] * len(batch)
+        else:
+            observe_write_batch(len(batch), [started - write.queued_at for write in batch])
+        for write, (result, error, callbacks) in zip(batch, results):
+            # Before the caller resumes, so it sees what the callbacks update
+            for callback in callbacks:
+                try:
+                    write.context.run(callback)
+                except Exception as e:
+                    log_event(logger, "db.after_commit_failed", level=logging.ERROR, error=repr(e))
+            try:
+                write.loop.call_soon_threadsafe(_set_result, write.future, result, error)
+            except RuntimeError:
+                pass  # the caller's event loop is closed
+
+    def _apply(self, connection, write: _Write) -> Tuple[Any, Optional[Exception], List[Callable[[], None]]]:
+        """
+        Run one write in its own savepoint; its error is returned, not raised,
+        along with the after_commit callbacks of a write that succeeded
+        """
+        session = self._sessions(bind=connection)
+        session.info[AFTER_COMMIT] = callbacks = []
+        try:
+            return write.context.run(write.fn, session, *write.args, **write.kwargs), None, callbacks
+        except Exception as e:
+            return None, e, []
+        finally:
+            # Rolls back a savepoint the write left open (an unexpected error)
+            session.close()
@@ -0,0 +1,320 @@
+"""
+WSGI entry point for the ASGI app, used under Passenger (passenger_wsgi.py).
+
+Passenger only speaks WSGI. ``WsgiBridge`` runs the FastAPI app on one
+long-lived event loop per worker process, in a background thread, and turns
+every WSGI call into an ASGI request on that loop:
+
+- The loop and the app's lifespan (startup handlers, then shutdown when the
+  process exits) start once per process, on the first request, so a server
+  that forks after importing the module never inherits a loop thread.
+- The request body is read from ``wsgi.input`` on the WSGI thread as the
+  app asks for it, and response chunks are yielded as the app sends them.
+  The app waits until the server has taken each chunk, so uploads and
+  exports stream in both directions in bounded memory.
+- A WSGI thread only blocks on its own request; with a threaded server the
+  loop serves several requests at once.
+
+Per request this costs a few thread hand-offs, instead of creating an event
+loop and running the lifespan for every call.
+"""
+import asyncio
+import atexit
+import http
+import logging
+import os
+import queue
+import threading
+from typing import Iterable, Optional
+
+from app.log import get_logger, log_event
+
+logger = get_logger("wsgi")
+
+# Bytes read from wsgi.input per receive(); small bodies are read in one go
+READ_CHUNK_SIZE = 64 * 1024
+
+# Seconds to wait for the app's startup/shutdown handlers
+LIFESPAN_TIMEOUT = 60
+
+# Not allowed in WSGI responses; the server manages the connection
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade",
+}
+
+_DISCONNECT = {"type": "http.disconnect"}
+
+
+def status_line(code: int) -> str:
+    try:
+        return f"{code} {http.HTTPStatus(code).phrase}"
+    except ValueError:
+        return f"{code} Unknown"
+
+
+def _native_to_str(value: str) -> str:
+    """WSGI environ strings carry raw bytes as latin-1; ASGI wants decoded UTF-8"""
+    return value.encode("latin-1").decode("utf-8", "replace")
+
+
+def build_scope(environ: dict) -> dict:
+    """ASGI HTTP scope for a WSGI environ"""
+    headers = []
+    for key, value in environ.items():
+        if key.startswith("HTTP_"):
+            name = key[5:].replace("_", "-").lower()
+        elif key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            if not value:
+                continue
+            name = key.replace("_", "-").lower()
+        else:
+            continue
+        headers.append((name.encode("latin-1"), value.encode("latin-1")))
+
+    root_path = _native_to_str(environ.get("SCRIPT_NAME", ""))
+    path = root_path + _native_to_str(environ.get("PATH_INFO", "") or "/")
+    server_port = environ.get("SERVER_PORT")
+    client_host = environ.get("REMOTE_ADDR")
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": environ.get("SERVER_PROTOCOL", "HTTP/1.1").split("/", 1)[-1],
+        "method": environ["REQUEST_METHOD"].upper(),
+        "scheme": environ.get("wsgi.url_scheme", "http"),
+        "path": path,
+        "raw_path": path.encode("utf-8"),
+        "query_string": environ.get("QUERY_STRING", "").encode("latin-1"),
+        "root_path": root_path,
+        "headers": headers,
+        "server": (environ.get("SERVER_NAME", ""), int(server_port)) if server_port else None,
+        "client": (client_host, int(environ.get("REMOTE_PORT") or 0)) if client_host else None,
+        "state": {},
+    }
+
+
+class _Request:
+    """
+    One request in flight. The ASGI side runs on the loop, the WSGI side on
+    the server thread; the app's events reach the server thread through a
+    queue, and the server thread answers through futures resolved on the loop.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, environ: dict):
+        self.loop = loop
+        self.environ = environ
+        # ("read", future), ("start", message), ("body", bytes, future or None),
+        # ("done",) or ("error", exception)
+        self.events: "queue.SimpleQueue" = queue.SimpleQueue()
+        length = environ.get("CONTENT_LENGTH")
+        self.remaining = int(length) if length and length.isdigit() else None
+        chunked = "chunked" in environ.get("HTTP_TRANSFER_ENCODING", "").lower()
+        self.body_done = self.remaining == 0 or (self.remaining is None and not chunked)
+        self.first_body = b""
+        if self.remaining is not None and 0 < self.remaining <= READ_CHUNK_SIZE:
+            # Typical JSON bodies: read right away, saving a hand-off
+            self.first_body = self.read_body()
+        self.first_receive = True
+        # Loop-side state, created in run() (asyncio objects belong to the loop)
+        self.disconnected: Optional[asyncio.Event] = None
+        self.waiters = set()
+
+    def read_body(self) -> bytes:
+        """Next chunk of the request body (WSGI thread)"""
+        size = READ_CHUNK_SIZE if self.remaining is None else min(READ_CHUNK_SIZE, self.remaining)
+        data = self.environ["wsgi.input"].read(size) if size else b""
+        if self.remaining is not None:
+            self.remaining -= len(data)
+        if not data or self.remaining == 0:
+            self.body_done = True
+        return data
+
+    # ASGI side (event loop)
+
+    async def _wait(self, *event):
+        """Hand an event to the WSGI thread and wait for its answer (None on disconnect)"""
+        future = self.loop.create_future()
+        self.waiters.add(future)
+        self.events.put(event + (future,))
+        try:
+            return await future
+        finally:
+            self.waiters.discard(future)
+
+    async def receive(self) -> dict:
+        if self.first_receive and (self.first_body or self.body_done):
+            self.first_receive = False
+            body, self.first_body = self.first_body, b""
+            return {"type": "http.request", "body": body, "more_body": not self.body_done}
+        self.first_receive = False
+        if self.body_done or self.disconnected.is_set():
+            # Nothing more to read: wait until the response is over
+            await self.disconnected.wait()
+            return _DISCONNECT
+        body = await self._wait("read")
+        if body is None:
+            return _DISCONNECT
+        return {"type": "http.request", "body": body, "more_body": not self.body_done}
+
+    async def send(self, message: dict) -> None:
+        if self.disconnected.is_set():
+            return
+        if message["type"] == "http.response.start":
+            self.events.put(("start", message))
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            if message.get("more_body", False):
+                # Wait for the server to take the chunk before producing more
+                await self._wait("body", body)
+            else:
+                self.events.put(("body", body, None))
+
+    async def run(self, app) -> None:
+        self.disconnected = asyncio.Event()
+        try:
+            await app(build_scope(self.environ), self.receive, self.send)
+        except BaseException as e:
+            log_event(logger, "wsgi.unhandled_error", level=logging.ERROR, error=repr(e))
+            self.events.put(("error", e))
+        else:
+            self.events.put(("done",))
+        finally:
+            self.disconnect()
+
+    def disconnect(self) -> None:
+        """End of the exchange: pending receive() and send() calls return (loop)"""
+        self.disconnected.set()
+        for future in self.waiters:
+            if not future.done():
+                future.set_result(None)
+
+    # WSGI side (server thread)
+
+    def resolve(self, future: asyncio.Future, value) -> None:
+        self.loop.call_soon_threadsafe(lambda: future.done() or future.set_result(value))
+
+    def next_event(self) -> tuple:
+        """Wait for the app's next event, serving body reads in between"""
+        while True:
+            event = self.events.get()
+            if event[0] != "read":
+                return event
+            try:
+                data = self.read_body()
+            except OSError:
+                data = None  # client went away
+            self.resolve(event[1], data)
+
+    def abort(self) -> None:
+        """The server stopped iterating the response (client disconnected)"""
+        self.loop.call_soon_threadsafe(self.disconnect)
+
+
+class WsgiBridge:
+    """WSGI application running an ASGI app on a per-process event loop"""
+
+    def __init__(self, app):
+        self.app = app
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pid = None
+        self._lock = threading.Lock()
+        # Lifespan channels, created on the loop
+        self._to_app: Optional[asyncio.Queue] = None
+        self._from_app: Optional[asyncio.Queue] = None
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="asgi-loop", daemon=True).start()
+            try:
+                asyncio.run_coroutine_threadsafe(self._startup(), loop).result(LIFESPAN_TIMEOUT)
+            except BaseException:
+                # Retried on the next request
+                loop.call_soon_threadsafe(loop.stop)
+                raise
+            self.loop = loop
+            self._pid = os.getpid()
+            atexit.register(self.close)
+
+    async def _startup(self) -> None:
+        self._to_app = asyncio.Queue()
+        self._from_app = asyncio.Queue()
+
+        async def run():
+            try:
+                await self.app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, self._to_app.get, self._from_app.put)
+            except BaseException as e:
+                # Apps without lifespan support fail right away
+                await self._from_app.put({"type": "lifespan.unsupported", "message": repr(e)})
+
+        asyncio.ensure_future(run())
+        await self._lifespan("startup")
+
+    async def _lifespan(self, event: str) -> None:
+        """Send a lifespan event and wait for the app to complete it"""
+        await self._to_app.put({"type": f"lifespan.{event}"})
+        message = await self._from_app.get()
+        if message["type"] == f"lifespan.{event}.failed":
+            raise RuntimeError(f"Application {event} failed: {message.get('message', '')}")
+        if message["type"] == "lifespan.unsupported":
+            log_event(logger, "wsgi.lifespan_unsupported", level=logging.WARNING, error=message["message"])
+
+    def close(self) -> None:
+        """Run the app's shutdown handlers and stop the loop (at process exit)"""
+        if self._pid != os.getpid():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._lifespan("shutdown"), self.loop).result(LIFESPAN_TIMEOUT)
+        except Exception as e:
+            log_event(logger, "wsgi.shutdown_failed", level=logging.ERROR, error=repr(e))
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._pid = None
+
+    def __call__(self, environ: dict, start_response) -> Iterable[bytes]:
+        if self._pid != os.getpid():
+            self._start()
+        request = _Request(self.loop, environ)
+        asyncio.run_coroutine_threadsafe(request.run(self.app), self.loop)
+
+        event = request.next_event()
+        if event[0] != "start":
+            # The app failed (or returned) before starting a response
+            start_response("500 Internal Server Error", [("Content-Type", "text/plain; charset=utf-8")])
+            return [b"Internal Server Error"]
+
+        message = event[1]
+        headers = [
+            (name.decode("latin-1"), value.decode("latin-1"))
+            for name, value in message.get("headers", [])
+            if name.decode("latin-1").lower() not in HOP_BY_HOP_HEADERS
+        ]
+        start_response(status_line(message["status"]), headers)
+        return self._iter_body(request)
+
+    @staticmethod
+    def _iter_body(request: _Request) -> Iterable[bytes]:
+        finished = False
+        try:
+            while True:
+                event = request.next_event()
+                if event[0] == "body":
+                    _, body, future = event
+                    if body:
+                        yield body
+                    if future is None:
+                        # Last chunk; the app may still be running cleanup
+                        finished = True
+                        return
+                    request.resolve(future, None)
+                elif event[0] == "error":
+                    # Headers are already sent: let the server drop the connection
+                    finished = True
+                    raise event[1]
+                else:
+                    finished = True
+                    return
+        finally:
+            if not finished:
+                request.abort()
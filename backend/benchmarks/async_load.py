@@ -0,0 +1,135 @@
+"""
+Load benchmark of the sync (threadpool) and async (aiosqlite) database paths.
+
+Starts one uvicorn worker per mode against a seeded temporary database and
+drives it over HTTP with a fixed number of concurrent clients, mixing by-id
+reads and filtered list pages. Reports throughput, latency percentiles and
+failed requests for each concurrency level.
+
+Needs httpx for the client (pip install httpx).
+
+Usage (from backend/):
+    python -m benchmarks.async_load --concurrency 16 64 256 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.dataset import CLASSES, YEARS, generate
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(url: str, db_async: bool, port: int, env: dict = None) -> subprocess.Popen:
+    env = dict(os.environ, **(env or {}), DATABASE_URL=url, DB_ASYNC="1" if db_async else "0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning",
+         "--timeout-keep-alive", "60"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def next_request(rows: int):
+    # Random ids and filters keep most requests out of the response cache
+    if random.random() < 0.7:
+        return f"/api/students/{random.randint(1, rows)}", None
+    return "/api/students/", {
+        "year": random.choice(YEARS),
+        "class_name": random.choice(CLASSES),
+        "skip": random.randint(0, 400),
+        "limit": 20,
+        "fields": "summary",
+    }
+
+
+async def run_load(port: int, concurrency: int, duration: float, rows: int) -> dict:
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+
+        async def client_loop():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                path, params = next_request(rows)
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path, params=params)
+                    if response.status_code != 200:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else float("nan")
+
+    return {
+        "rps": len(latencies) / duration,
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"], choices=["sync", "async"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[16, 64, 256], help="in-flight requests")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--rows", type=int, default=10000, help="students in the test database")
+    args = parser.parse_args()
+
+    print(f"1 worker, {args.duration:g}s per run, {args.rows} rows")
+    print(f"{'mode':<6} {'clients':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes:
+            url = f"sqlite:///{generate(Path(tmp) / mode, args.rows)}"
+            port = free_port()
+            server = start_server(url, mode == "async", port)
+            try:
+                for concurrency in args.concurrency:
+                    result = asyncio.run(run_load(port, concurrency, args.duration, args.rows))
+                    print(
+                        f"{mode:<6} {concurrency:>8} {result['rps']:>8.0f} {result['p50']:>8.1f} "
+                        f"{result['p95']:>8.1f} {result['p99']:>8.1f} {result['errors']:>7}"
+                    )
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
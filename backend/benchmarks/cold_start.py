@@ -0,0 +1,125 @@
+"""
+Cold start of a Passenger worker, with a startup-time budget check.
+
+Starts fresh Python processes against a seeded temporary database. Each one
+imports passenger_wsgi and serves a student list page (the request the
+frontend makes first) and then a second one, like a worker that Passenger
+spawns for an incoming request. Reports the median of each startup phase
+(app.startup, see app/startup.py), the first and second request and the time
+from spawning the process to the first response.
+
+Exits with status 1 when the median spawn-to-first-response time is over
+the budget (STARTUP_BUDGET_MS in config.py, or --budget-ms), so it can gate
+a change that slows startup down.
+
+Usage (from backend/):
+    python -m benchmarks.cold_start --runs 5
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Nothing heavy is imported at module level: the child process must start as
+# a Passenger worker would, and SQLAlchemy (benchmarks.dataset) would count as
+# "interpreter" time instead of "import"
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Marks the child's result line among its log output
+RESULT_KEY = "coldStart"
+
+FIRST_PATH = "/api/students/"
+FIRST_QUERY = "limit=50&fields=summary"
+
+
+def call(application, path: str, query: str = "") -> float:
+    """Serve one GET through the WSGI entry point; returns milliseconds"""
+    environ = {
+        "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": query,
+        "SERVER_NAME": "bench", "SERVER_PORT": "80", "SERVER_PROTOCOL": "HTTP/1.1",
+        "wsgi.input": io.BytesIO(b""), "wsgi.url_scheme": "http",
+    }
+    status = []
+    started = time.perf_counter()
+    body = application(environ, lambda line, headers, exc_info=None: status.append(line))
+    for _ in body:
+        pass
+    elapsed = (time.perf_counter() - started) * 1000
+    if not status[0].startswith("200"):
+        raise RuntimeError(f"GET {path}: {status[0]}")
+    return elapsed
+
+
+def child() -> None:
+    """One cold start (runs in a fresh process)"""
+    from passenger_wsgi import application
+    from app import startup
+
+    first = call(application, FIRST_PATH, FIRST_QUERY)
+    second = call(application, FIRST_PATH, FIRST_QUERY.replace("summary", "roster"))
+    result = {name: seconds * 1000 for name, seconds in startup.phases.items()}
+    result["first request (with startup hook)"] = first
+    result["second request"] = second
+    print(json.dumps({RESULT_KEY: result}), flush=True)
+
+
+def cold_start(url: str) -> dict:
+    """Spawn a worker process and time it until its first response"""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.cold_start", "--child"],
+        cwd=BACKEND_DIR, env=dict(os.environ, DATABASE_URL=url), stdout=subprocess.PIPE, text=True,
+    )
+    result = None
+    for line in process.stdout:
+        if RESULT_KEY in line:
+            # Written right after the second response
+            result = json.loads(line)[RESULT_KEY]
+            result["spawn to first response"] = (time.perf_counter() - started) * 1000 - result["second request"]
+    process.wait()
+    if result is None:
+        raise RuntimeError(f"worker exited with status {process.returncode} before responding")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="cold starts to measure")
+    parser.add_argument("--rows", type=int, default=10000, help="students in the test database")
+    parser.add_argument("--budget-ms", type=float, help="spawn-to-first-response budget (default: STARTUP_BUDGET_MS)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    from app.startup import STARTUP_BUDGET_MS
+    from benchmarks.dataset import generate
+    budget_ms = args.budget_ms or STARTUP_BUDGET_MS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{generate(Path(tmp) / 'cold', args.rows)}"
+        # One discarded run warms the OS file cache, as on a server that has been up
+        cold_start(url)
+        runs = [cold_start(url) for _ in range(args.runs)]
+
+    print(f"{args.runs} cold starts through passenger_wsgi, {args.rows} rows (median of each)")
+    for name in runs[0]:
+        values = [run[name] for run in runs if name in run]
+        print(f"  {name:<34} {statistics.median(values):>8.1f} ms")
+
+    total = statistics.median(run["spawn to first response"] for run in runs)
+    if total > budget_ms:
+        sys.exit(f"over budget: {total:.0f} ms to the first response (budget {budget_ms:.0f} ms)")
+    print(f"within budget: {total:.0f} ms to the first response (budget {budget_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Synthetic student datasets for benchmarks.
+
+Writes a self-contained dataset directory with the same layout the app uses:
+
+    <out>/students.db   schema, rows, search index, version counters and stats
+    <out>/blobs/        photo/document files referenced by the rows
+
+Names, emails, majors, classes and dates follow realistic distributions and
+are reproducible for a given seed. With --files, about 70% of students get a
+photo and 30% one to three documents, drawn from a pool of distinct files
+(as with real uploads, many rows share the same placeholder picture).
+
+Point the app at a dataset with the DATABASE_URL and BLOB_STORAGE_DIR
+environment variables.
+
+Usage (from backend/):
+    python -m benchmarks.dataset --rows 100000 --files --out bench-data/100k-files
+"""
+import argparse
+import hashlib
+import json
+import random
+import shutil
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from sqlalchemy import insert
+
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Amelia", "Ananya", "Arjun", "Ava", "Benjamin", "Chloe", "Daniel", "Diya",
+    "Elijah", "Emma", "Ethan", "Fatima", "Gabriel", "Grace", "Hannah", "Ishaan", "Isabella", "Jacob",
+    "Kavya", "Liam", "Lucas", "Maya", "Mia", "Mohammed", "Noah", "Olivia", "Priya", "Rahul",
+    "Riya", "Rohan", "Saanvi", "Sofia", "Tanvi", "Vihaan", "William", "Yash", "Zara", "Zoe",
+]
+LAST_NAMES = [
+    "Agarwal", "Anderson", "Banerjee", "Brown", "Chatterjee", "Das", "Davis", "Desai", "Garcia", "Ghosh",
+    "Gupta", "Iyer", "Jain", "Johnson", "Joshi", "Khan", "Kumar", "Lee", "Martin", "Mehta",
+    "Miller", "Mukherjee", "Nair", "Patel", "Pillai", "Rao", "Reddy", "Rodriguez", "Roy", "Shah",
+    "Sharma", "Singh", "Smith", "Taylor", "Thomas", "Verma", "Williams", "Wilson", "Yadav", "Zhang",
+]
+MAJORS = [
+    "Computer Science", "Electrical Engineering", "Mechanical Engineering", "Civil Engineering",
+    "Mathematics", "Physics", "Chemistry", "Biology", "Economics", "Commerce", "English", "History",
+]
+CLASSES = ["A", "B", "C", "D"]
+YEARS = ["1st Year", "2nd Year", "3rd Year", "4th Year"]
+EMAIL_DOMAINS = ["example.edu", "student.example.edu", "mail.example.com"]
+
+# Rows per executemany INSERT
+INSERT_BATCH_SIZE = 10000
+
+# Distinct files behind the photo/document references
+PHOTO_POOL_SIZE = 200
+DOCUMENT_POOL_SIZE = 100
+
+
+def student_rows(count: int, rng: random.Random, photos: List[str] = (), documents: List[Tuple[str, str]] = ()) -> Iterator[dict]:
+    """Yield Student column values for ``count`` students"""
+    for i in range(1, count + 1):
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        enrollment_year = rng.randint(2015, 2025)
+        row = {
+            "first_name": first_name,
+            "last_name": last_name,
+            # The running number keeps emails unique at any scale
+            "email": f"{first_name}.{last_name}.{i}@{rng.choice(EMAIL_DOMAINS)}".lower(),
+            "enrollment_year": enrollment_year,
+            "dob": date(enrollment_year - 18, 1, 1) + timedelta(days=rng.randint(0, 3 * 365)),
+            "major": rng.choice(MAJORS) if rng.random() < 0.9 else None,
+            "class_name": rng.choice(CLASSES),
+            "year": rng.choice(YEARS),
+            "photo": None,
+            "documents": None,
+        }
+        if photos and rng.random() < 0.7:
+            row["photo"] = rng.choice(photos)
+        if documents and rng.random() < 0.3:
+            row["documents"] = json.dumps([
+                {"name": name, "type": "application/pdf", "blob": ref}
+                for name, ref in rng.sample(documents, rng.randint(1, 3))
+            ])
+        yield row
+
+
+def _store_file(connection, blob_dir: Path, data: bytes, content_type: str) -> str:
+    """Write a blob file with the app's on-disk layout and register it"""
+    from app.blobs import BLOB_REF_PREFIX, BLOB_STORAGE_DIR, blob_path
+    from app.models import Blob
+
+    digest = hashlib.sha256(data).hexdigest()
+    path = blob_dir / blob_path(digest).relative_to(BLOB_STORAGE_DIR)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    connection.execute(insert(Blob), [{"hash": digest, "content_type": content_type, "size": len(data)}])
+    return BLOB_REF_PREFIX + digest
+
+
+def make_file_pool(connection, blob_dir: Path, rng: random.Random) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """Create the distinct photos (20-80 KB) and PDF documents (50-200 KB)"""
+    photos = [
+        _store_file(connection, blob_dir, b"\xff\xd8\xff\xe0" + rng.randbytes(rng.randint(20, 80) * 1024), "image/jpeg")
+        for _ in range(PHOTO_POOL_SIZE)
+    ]
+    documents = [
+        (f"document-{i}.pdf", _store_file(connection, blob_dir, b"%PDF-1.4\n" + rng.randbytes(rng.randint(50, 200) * 1024), "application/pdf"))
+        for i in range(DOCUMENT_POOL_SIZE)
+    ]
+    return photos, documents
+
+
+def generate(out_dir, rows: int, files: bool = False, seed: int = 42) -> Path:
+    """
+    Build a dataset directory and return the path of its database.
+
+    Rows are inserted before the search index, version and stats triggers
+    exist; the migrations then build the index and counts in one pass, which
+    is much faster than firing the triggers row by row.
+    """
+    # Imported here so that importing the word lists does not configure the
+    # app: it reads DATABASE_URL/BLOB_STORAGE_DIR once, at import time
+    from app.database import Base, create_db_engine
+    from app.migrations import migrate
+    from app.models import Student
+
+    out_dir = Path(out_dir)
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True)
+    db_path = out_dir / "students.db"
+    rng = random.Random(seed)
+
+    engine = create_db_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        photos, documents = make_file_pool(connection, out_dir / "blobs", rng) if files else ([], [])
+        batch = []
+        for row in student_rows(rows, rng, photos, documents):
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH_SIZE:
+                connection.execute(insert(Student), batch)
+                batch = []
+        if batch:
+            connection.execute(insert(Student), batch)
+    migrate(engine)
+    engine.dispose()
+    return db_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="number of students (1k to 1M)")
+    parser.add_argument("--files", action="store_true", help="attach photos and documents")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", required=True, help="dataset directory (replaced if it exists)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    db_path = generate(args.out, args.rows, args.files, args.seed)
+    print(f"{args.rows} students{' with files' if args.files else ''} -> {db_path} "
+          f"({db_path.stat().st_size / 1e6:.1f} MB, {time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
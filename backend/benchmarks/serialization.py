@@ -0,0 +1,104 @@
+"""
+Micro-benchmark of student list serialization.
+
+Compares, on lists of ORM rows:
+  response_model  dict per row, validation against the response schema,
+                  jsonable dump and json.dumps (FastAPI's response_model path)
+  dump_json       dict per row, validation and pydantic's dump_json
+  direct          app.serialization: compiled row serializer and one encode
+
+Usage (from backend/):
+    python -m benchmarks.serialization --rows 1000 10000
+"""
+import argparse
+import json
+import time
+from datetime import date
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.fields import ALL_FIELDS, PROJECTIONS
+from app.models import Student
+from app.schemas import StudentPartialResponse
+from app.serialization import JSON_BACKEND, encode_students, student_to_dict
+
+PHOTO = "sha256:" + "ab" * 32
+DOCUMENTS = json.dumps([{"name": "transcript.pdf", "type": "application/pdf", "blob": "sha256:" + "cd" * 32}])
+
+
+def make_students(count: int) -> List[Student]:
+    return [
+        Student(
+            id=i,
+            first_name=f"First{i}",
+            last_name=f"Last{i % 500}",
+            email=f"student{i}@example.edu",
+            enrollment_year=2018 + i % 6,
+            dob=date(2000, 1 + i % 12, 1 + i % 28),
+            major="Computer Science" if i % 3 else None,
+            class_name="ABCD"[i % 4],
+            year=f"{1 + i % 4} Year",
+            photo=PHOTO if i % 2 else None,
+            documents=DOCUMENTS if i % 5 == 0 else None,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+adapter = TypeAdapter(List[StudentPartialResponse])
+
+
+def response_model(students, fields) -> bytes:
+    data = adapter.validate_python([student_to_dict(student, fields) for student in students])
+    return json.dumps(
+        adapter.dump_python(data, mode="json", by_alias=True, exclude_unset=True),
+        ensure_ascii=False, separators=(",", ":"),
+    ).encode()
+
+
+def dump_json(students, fields) -> bytes:
+    data = adapter.validate_python([student_to_dict(student, fields) for student in students])
+    return adapter.dump_json(data, by_alias=True, exclude_unset=True)
+
+
+def direct(students, fields) -> bytes:
+    return encode_students(students, fields)
+
+
+METHODS = {"response_model": response_model, "dump_json": dump_json, "direct": direct}
+
+
+def best_of(fn, students, fields, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(students, fields)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", nargs="+", type=int, default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case; the best is reported")
+    args = parser.parse_args()
+
+    print(f"JSON backend: {JSON_BACKEND}")
+    print(f"{'rows':>6} {'fields':<8} " + " ".join(f"{name + ' ms':>17}" for name in METHODS) + f" {'speedup':>8}")
+    for count in args.rows:
+        students = make_students(count)
+        for projection in ("full", "summary"):
+            fields = ALL_FIELDS if projection == "full" else PROJECTIONS[projection]
+            outputs = {name: fn(students, fields) for name, fn in METHODS.items()}
+            assert len(set(outputs.values())) == 1, "serializers disagree"
+            timings = {name: best_of(fn, students, fields, args.repeat) * 1000 for name, fn in METHODS.items()}
+            print(
+                f"{count:>6} {projection:<8} "
+                + " ".join(f"{timings[name]:>17.1f}" for name in METHODS)
+                + f" {timings['response_model'] / timings['direct']:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
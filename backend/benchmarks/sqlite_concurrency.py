@@ -0,0 +1,117 @@
+"""
+Reader/writer concurrency benchmark for the SQLite engine profiles.
+
+Simulates several Passenger workers sharing one database file: each reader
+and writer is a separate process with its own engine, running for a fixed
+duration against a fresh database per profile.
+
+Usage (from backend/):
+    python -m benchmarks.sqlite_concurrency --readers 4 --writers 2 --duration 5
+"""
+import argparse
+import multiprocessing
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, ENGINE_PROFILES, create_db_engine
+from app.models import Student
+
+
+def seed(url: str, profile: str, rows: int) -> None:
+    engine = create_db_engine(url, profile)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Student), [
+            {
+                "first_name": f"First{i}",
+                "last_name": f"Last{i % 500}",
+                "email": f"student{i}@example.edu",
+                "enrollment_year": 2018 + i % 6,
+                "class_name": "ABCD"[i % 4],
+                "year": f"{1 + i % 4} Year",
+            }
+            for i in range(rows)
+        ])
+    engine.dispose()
+
+
+def run_worker(args):
+    """Run reads or writes until the deadline; return (role, ok, errors)"""
+    role, url, profile, rows, start_at, duration = args
+    engine = create_db_engine(url, profile)
+    Session = sessionmaker(bind=engine)
+    ok = errors = 0
+    while time.time() < start_at:
+        time.sleep(0.001)
+    deadline = start_at + duration
+    while time.time() < deadline:
+        student_id = random.randint(1, rows)
+        db = Session()
+        try:
+            if role == "reader":
+                db.execute(
+                    select(Student.id, Student.first_name, Student.last_name, Student.class_name)
+                    .where(Student.id >= student_id).order_by(Student.id).limit(50)
+                ).all()
+            else:
+                db.execute(
+                    update(Student).where(Student.id == student_id)
+                    .values(major=f"Major{random.randint(1, 50)}", version=Student.version + 1)
+                )
+                db.commit()
+            ok += 1
+        except OperationalError:
+            db.rollback()
+            errors += 1
+        finally:
+            db.close()
+    engine.dispose()
+    return role, ok, errors
+
+
+def run_profile(profile: str, readers: int, writers: int, duration: float, rows: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        seed(url, profile, rows)
+        start_at = time.time() + 1.0
+        jobs = [("reader", url, profile, rows, start_at, duration)] * readers
+        jobs += [("writer", url, profile, rows, start_at, duration)] * writers
+        with multiprocessing.Pool(len(jobs)) as pool:
+            results = pool.map(run_worker, jobs)
+
+    summary = {"profile": profile}
+    for role in ("reader", "writer"):
+        ok = sum(r[1] for r in results if r[0] == role)
+        errors = sum(r[2] for r in results if r[0] == role)
+        summary[f"{role}_ops_per_s"] = ok / duration
+        summary[f"{role}_errors"] = errors
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=["legacy", "performance"], choices=list(ENGINE_PROFILES))
+    parser.add_argument("--readers", type=int, default=4, help="reader processes")
+    parser.add_argument("--writers", type=int, default=2, help="writer processes")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per profile")
+    parser.add_argument("--rows", type=int, default=10000, help="students in the test database")
+    args = parser.parse_args()
+
+    print(f"{args.readers} reader(s), {args.writers} writer(s), {args.duration:g}s, {args.rows} rows")
+    print(f"{'profile':<12} {'reads/s':>10} {'read errs':>10} {'writes/s':>10} {'write errs':>11}")
+    for profile in args.profiles:
+        result = run_profile(profile, args.readers, args.writers, args.duration, args.rows)
+        print(
+            f"{profile:<12} {result['reader_ops_per_s']:>10.0f} {result['reader_errors']:>10} "
+            f"{result['writer_ops_per_s']:>10.0f} {result['writer_errors']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""
+Endpoint benchmark suite with JSON baselines.
+
+Runs every students endpoint, the blob endpoint (datasets with files) and
+/health against a copy of a dataset built by benchmarks.dataset, either
+in-process (ASGI transport, no sockets) or over HTTP against a uvicorn
+worker. Each scenario is driven by --concurrency clients for --duration
+seconds and reports:
+
+  throughput        completed requests per second
+  p50/p95/p99       latency in milliseconds
+  sql_statements    statements executed by one request (in-process only)
+  memory_peak_kb    Python allocation high-water mark of one request
+                    (in-process), or the server's peak RSS (http)
+
+The single-request probes run after the warm-up requests, so they show the
+steady state: a scenario served from the response cache counts only the
+version check.
+
+Results are written as JSON; --compare checks a run against a saved
+baseline and exits with status 1 when a scenario regresses by more than
+--threshold percent, or runs more SQL statements than before.
+
+Needs httpx (pip install httpx).
+
+Usage (from backend/):
+    python -m benchmarks.dataset --rows 100000 --files --out bench-data/100k
+    python -m benchmarks.suite --dataset bench-data/100k --save benchmarks/results/baseline.json
+    python -m benchmarks.suite --dataset bench-data/100k --compare benchmarks/results/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.dataset import CLASSES, FIRST_NAMES, MAJORS, YEARS
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+class Context:
+    """Dataset facts and state shared by the scenarios of one run"""
+
+    def __init__(self, rows: int, blob_ref: Optional[str]):
+        self.rows = rows
+        self.blob_ref = blob_ref
+        self.rng = random.Random(1)
+        self.counter = 0
+        self.created: List[int] = []
+        self.next_delete = rows
+        self.next_update = 0
+        self.list_etag = None
+        self.student_etag = None
+        self.cursor = None
+
+    def unique(self) -> int:
+        self.counter += 1
+        return self.counter
+
+    def student_id(self) -> int:
+        return self.rng.randint(1, self.rows)
+
+    def update_id(self) -> int:
+        # Cycles through the rows: concurrent updates of one row would get 412
+        self.next_update = self.next_update % (self.rows // 2) + 1
+        return self.next_update
+
+
+class Scenario:
+    def __init__(self, name: str, build: Callable[[Context], tuple], expect: int = 200, needs_files: bool = False):
+        self.name = name
+        self.build = build  # Context -> (method, url, request kwargs)
+        self.expect = expect
+        self.needs_files = needs_files
+
+
+def _new_student(ctx: Context) -> dict:
+    n = ctx.unique()
+    return {
+        "firstName": ctx.rng.choice(FIRST_NAMES),
+        "lastName": "Bench",
+        "email": f"bench.{os.getpid()}.{n}@example.edu",
+        "enrollmentYear": 2024,
+        "dob": "2006-05-01",
+        "major": ctx.rng.choice(MAJORS),
+        "class": ctx.rng.choice(CLASSES),
+        "year": "1st Year",
+    }
+
+
+def _import_body(ctx: Context, rows: int = 100) -> str:
+    lines = ["firstName,lastName,email,enrollmentYear,class,year"]
+    for _ in range(rows):
+        student = _new_student(ctx)
+        lines.append(f"{student['firstName']},Import,{student['email']},2024,{student['class']},1st Year")
+    return "\n".join(lines) + "\n"
+
+
+def _delete(ctx: Context) -> tuple:
+    # Removes students added by the create scenario, then dataset rows from the
+    # highest id down, so concurrent clients never delete the same row
+    if ctx.created:
+        student_id = ctx.created.pop()
+    else:
+        student_id = ctx.next_delete
+        ctx.next_delete -= 1
+    return "DELETE", f"/api/students/{student_id}", {}
+
+
+# Read scenarios first; writes run last so they do not change what reads see
+SCENARIOS = [
+    Scenario("health", lambda ctx: ("GET", "/health", {})),
+    Scenario("list_default", lambda ctx: ("GET", "/api/students/", {})),
+    Scenario("list_summary_filtered", lambda ctx: ("GET", "/api/students/", {"params": {
+        "fields": "summary", "year": ctx.rng.choice(YEARS), "class_name": ctx.rng.choice(CLASSES),
+    }})),
+    Scenario("list_cursor_page", lambda ctx: ("GET", "/api/students/", {"params": {
+        "sort": "last_name", "limit": 50, "fields": "roster", "cursor": ctx.cursor,
+    }})),
+    Scenario("list_with_total", lambda ctx: ("GET", "/api/students/", {"params": {
+        "limit": 50, "fields": "summary", "include_total": "true", "year": ctx.rng.choice(YEARS),
+    }})),
+    Scenario("list_not_modified", lambda ctx: ("GET", "/api/students/", {"headers": {"If-None-Match": ctx.list_etag}}), 304),
+    Scenario("search", lambda ctx: ("GET", "/api/students/search", {"params": {
+        "q": ctx.rng.choice(FIRST_NAMES)[:4], "fields": "summary",
+    }})),
+    Scenario("stats_crosstab", lambda ctx: ("GET", "/api/students/stats", {"params": {"crosstab": "year,class"}})),
+    Scenario("get_student", lambda ctx: ("GET", f"/api/students/{ctx.student_id()}", {})),
+    Scenario("get_student_roster", lambda ctx: ("GET", f"/api/students/{ctx.student_id()}", {"params": {"fields": "roster"}})),
+    Scenario("get_student_not_modified", lambda ctx: ("GET", "/api/students/1", {"headers": {"If-None-Match": ctx.student_etag}}), 304),
+    Scenario("export_ndjson", lambda ctx: ("GET", "/api/students/export", {"params": {
+        "year": ctx.rng.choice(YEARS), "class_name": ctx.rng.choice(CLASSES),
+    }})),
+    Scenario("get_blob", lambda ctx: ("GET", f"/api/blobs/{ctx.blob_ref[len('sha256:'):]}", {}), needs_files=True),
+    Scenario("create_student", lambda ctx: ("POST", "/api/students/", {"json": _new_student(ctx)}), 201),
+    Scenario("update_student", lambda ctx: ("PUT", f"/api/students/{ctx.update_id()}", {"json": {"major": ctx.rng.choice(MAJORS)}})),
+    Scenario("import_csv_100", lambda ctx: ("POST", "/api/students/import", {
+        "content": _import_body(ctx), "headers": {"Content-Type": "text/csv"},
+    })),
+    Scenario("delete_student", _delete, 204),
+]
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 3)
+
+
+async def send(client: httpx.AsyncClient, ctx: Context, scenario: Scenario) -> httpx.Response:
+    method, url, kwargs = scenario.build(ctx)
+    response = await client.request(method, url, **kwargs)
+    if scenario.name == "create_student" and response.status_code == 201:
+        ctx.created.append(response.json()["id"])
+    return response
+
+
+async def prepare(client: httpx.AsyncClient, ctx: Context) -> None:
+    """Fetch the validators and cursor the conditional and paging scenarios reuse"""
+    ctx.list_etag = (await client.get("/api/students/")).headers["etag"]
+    ctx.student_etag = (await client.get("/api/students/1")).headers["etag"]
+    page = await client.get("/api/students/", params={"sort": "last_name", "limit": 50, "fields": "roster"})
+    ctx.cursor = page.headers.get("x-next-cursor")
+
+
+async def run_scenario(client: httpx.AsyncClient, ctx: Context, scenario: Scenario, concurrency: int, duration: float) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await send(client, ctx, scenario)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            if response.status_code != scenario.expect:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 2),
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+    }
+
+
+class StatementCounter:
+    """Counts SQL statements sent to the app's engines"""
+
+    def __init__(self):
+        from sqlalchemy import event
+        from app import database
+
+        self.count = 0
+        engines = [database.engine]
+        if database.async_engine is not None:
+            engines.append(database.async_engine.sync_engine)
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+async def probe(client: httpx.AsyncClient, ctx: Context, scenario: Scenario, counter: StatementCounter) -> dict:
+    """Statements and allocation peak of a single request"""
+    counter.count = 0
+    tracemalloc.start()
+    try:
+        await send(client, ctx, scenario)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"sql_statements": counter.count, "memory_peak_kb": round(peak / 1024, 1)}
+
+
+def server_peak_rss_kb(pid: int) -> Optional[int]:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+async def run_suite(args, ctx: Context, client: httpx.AsyncClient, counter=None, server=None) -> Dict[str, dict]:
+    await prepare(client, ctx)
+    results = {}
+    for scenario in SCENARIOS:
+        if args.scenarios and scenario.name not in args.scenarios:
+            continue
+        if scenario.needs_files and not ctx.blob_ref:
+            continue
+        for _ in range(args.warmup):
+            await send(client, ctx, scenario)
+        extra = await probe(client, ctx, scenario, counter) if counter else {"sql_statements": None}
+        result = await run_scenario(client, ctx, scenario, args.concurrency, args.duration)
+        if server is not None:
+            extra["memory_peak_kb"] = server_peak_rss_kb(server.pid)
+        result.update(extra)
+        results[scenario.name] = result
+        print(format_row(scenario.name, result), flush=True)
+    return results
+
+
+def format_row(name: str, result: dict) -> str:
+    def number(value, spec):
+        return format(value, spec) if value is not None else "-".rjust(int(spec.split(".")[0].lstrip(">")))
+    return (
+        f"{name:<26} {result['throughput']:>9.1f} {number(result['p50_ms'], '>8.2f')} "
+        f"{number(result['p95_ms'], '>8.2f')} {number(result['p99_ms'], '>8.2f')} "
+        f"{number(result['sql_statements'], '>5')} {number(result['memory_peak_kb'], '>10.0f')} {result['errors']:>6}"
+    )
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def dataset_info(db_path: Path) -> tuple:
+    """(student count, one blob reference or None)"""
+    connection = sqlite3.connect(str(db_path))
+    try:
+        rows = connection.execute("SELECT MAX(id) FROM students").fetchone()[0] or 0
+        blob = connection.execute("SELECT photo FROM students WHERE photo IS NOT NULL LIMIT 1").fetchone()
+    finally:
+        connection.close()
+    return rows, blob[0] if blob else None
+
+
+async def run_inprocess(args, ctx: Context) -> Dict[str, dict]:
+    # Imported only now: the app reads DATABASE_URL/BLOB_STORAGE_DIR at import time
+    from app.database import dispose_engines
+    from app.init_db import init_db
+    from app.main import app
+
+    # Keep the app's JSON log lines out of the report; records are still
+    # formatted and written, so logging stays part of the measured cost
+    from app import log
+    if log._listener is not None:
+        log._listener.handlers[0].setStream(open(os.devnull, "w"))
+    init_db()
+    counter = StatementCounter()
+    # Unhandled errors become 500 responses, counted like over HTTP
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await run_suite(args, ctx, client, counter=counter)
+    finally:
+        # The ASGI transport does not run the shutdown hook; open aiosqlite
+        # connections would keep the process alive
+        await dispose_engines()
+
+
+async def run_http(args, ctx: Context, url: str, blob_dir: Path) -> Dict[str, dict]:
+    from benchmarks.async_load import free_port, start_server
+
+    port = free_port()
+    server = start_server(url, args.db_async, port, env={"BLOB_STORAGE_DIR": str(blob_dir)})
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            return await run_suite(args, ctx, client, server=server)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[str]:
+    """Print the change of each scenario and return the regressed ones"""
+    regressions = []
+    print(f"\nCompared with {baseline['meta'].get('git') or 'baseline'} ({baseline['meta']['created']}), threshold {threshold:g}%")
+    print(f"{'scenario':<26} {'req/s':>16} {'p95 ms':>20} {'sql':>9}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<26} (new)")
+            continue
+        throughput_change = (result["throughput"] / before["throughput"] - 1) * 100 if before["throughput"] else 0.0
+        p95_change = (result["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] and result["p95_ms"] else 0.0
+        more_sql = (
+            result["sql_statements"] is not None and before["sql_statements"] is not None
+            and result["sql_statements"] > before["sql_statements"]
+        )
+        regressed = throughput_change < -threshold or p95_change > threshold or more_sql
+        if regressed:
+            regressions.append(name)
+        sql = f"{before['sql_statements']}->{result['sql_statements']}" if result["sql_statements"] is not None else "-"
+        print(
+            f"{name:<26} {result['throughput']:>8.1f} {throughput_change:>+6.1f}% "
+            f"{result['p95_ms'] or 0:>11.2f} {p95_change:>+6.1f}% {sql:>9}{'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", required=True, help="directory created by benchmarks.dataset")
+    parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients per scenario")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per scenario")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed requests before each scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=[scenario.name for scenario in SCENARIOS], help="run only these")
+    parser.add_argument("--db-async", action="store_true", help="use the aiosqlite database path (DB_ASYNC)")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args()
+
+    dataset = Path(args.dataset)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Writes go to a copy, so every run starts from the same data
+        work = Path(tmp) / "dataset"
+        shutil.copytree(dataset, work)
+        db_path = work / "students.db"
+        url = f"sqlite:///{db_path}"
+        os.environ.update(DATABASE_URL=url, BLOB_STORAGE_DIR=str(work / "blobs"), DB_ASYNC="1" if args.db_async else "0")
+        rows, blob_ref = dataset_info(db_path)
+        ctx = Context(rows, blob_ref)
+
+        print(f"{args.mode}, {rows} rows{' with files' if blob_ref else ''}, "
+              f"{args.concurrency} clients, {args.duration:g}s per scenario")
+        print(f"{'scenario':<26} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'sql':>5} {'peak KB':>10} {'errors':>6}")
+        if args.mode == "inprocess":
+            results = asyncio.run(run_inprocess(args, ctx))
+        else:
+            results = asyncio.run(run_http(args, ctx, url, work / "blobs"))
+
+    from app.serialization import JSON_BACKEND
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "mode": args.mode,
+            "db_async": args.db_async,
+            "json_backend": JSON_BACKEND,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "dataset": {"path": str(dataset), "rows": rows, "files": blob_ref is not None},
+        },
+        "results": results,
+    }
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nSaved {args.save}")
+    if args.compare:
+        regressions = compare(json.loads(Path(args.compare).read_text()), report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Write bursts with and without the per-process writer (app/writer.py).
+
+Starts one uvicorn worker per mode against a seeded temporary database, with
+WRITE_QUEUE_ENABLED on ("queue": writes are group-committed by the writer
+thread) and off ("direct": each request commits its own transaction on a
+threadpool connection). A fixed number of concurrent clients send writes:
+creates with unique emails and partial updates of random students. Reports
+throughput, latency percentiles, failed requests and, for the queue, the
+mean number of writes per committed transaction (db_write_batch_size).
+
+Needs httpx for the client (pip install httpx).
+
+Usage (from backend/):
+    python -m benchmarks.write_burst --concurrency 1 16 64 --duration 10
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.async_load import free_port, start_server
+from benchmarks.dataset import CLASSES, YEARS, generate
+
+MODES = {"queue": "1", "direct": "0"}
+
+_emails = itertools.count()
+
+
+def next_write(rows: int):
+    """(method, path, body): half creates, half updates"""
+    if random.random() < 0.5:
+        n = next(_emails)
+        return "POST", "/api/students/", {
+            "firstName": "Burst", "lastName": str(n), "email": f"burst{n}@example.com",
+            "enrollmentYear": 2024, "class": random.choice(CLASSES), "year": random.choice(YEARS),
+        }
+    return "PATCH", f"/api/students/{random.randint(1, rows)}", {"major": f"Major {random.randint(1, 50)}"}
+
+
+def batch_stats(port: int) -> tuple:
+    """(sum, count) of db_write_batch_size so far"""
+    values = {}
+    for line in httpx.get(f"http://127.0.0.1:{port}/metrics").text.splitlines():
+        if line.startswith(("db_write_batch_size_sum", "db_write_batch_size_count")):
+            name, value = line.split()
+            values[name] = float(value)
+    return values.get("db_write_batch_size_sum", 0.0), values.get("db_write_batch_size_count", 0.0)
+
+
+async def run_burst(port: int, concurrency: int, duration: float, rows: int) -> dict:
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+
+        async def client_loop():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                method, path, body = next_write(rows)
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    if response.status_code not in (200, 201):
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else float("nan")
+
+    return {
+        "rps": len(latencies) / duration,
+        "p50": percentile(0.50),
+        "p99": percentile(0.99),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 16, 64], help="in-flight writes")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--rows", type=int, default=10000, help="students in the test database")
+    args = parser.parse_args()
+
+    print(f"1 worker, {args.duration:g}s per run, {args.rows} rows, half creates / half updates")
+    print(f"{'mode':<7} {'clients':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'batch':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes:
+            url = f"sqlite:///{generate(Path(tmp) / mode, args.rows)}"
+            port = free_port()
+            server = start_server(url, False, port, {"WRITE_QUEUE_ENABLED": MODES[mode]})
+            try:
+                for concurrency in args.concurrency:
+                    before = batch_stats(port)
+                    result = asyncio.run(run_burst(port, concurrency, args.duration, args.rows))
+                    after = batch_stats(port)
+                    batches = after[1] - before[1]
+                    batch = f"{(after[0] - before[0]) / batches:.1f}" if batches else "-"
+                    print(
+                        f"{mode:<7} {concurrency:>8} {result['rps']:>8.0f} {result['p50']:>8.1f} "
+                        f"{result['p99']:>8.1f} {result['errors']:>7} {batch:>6}"
+                    )
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Throughput of the Passenger entry point (app.wsgi.WsgiBridge) against uvicorn.
+
+HTTP: one server process each, against the same seeded database.
+- "uvicorn": uvicorn serving the ASGI app directly.
+- "wsgi": the stdlib wsgiref server (single-threaded, one request at a time,
+  like a Passenger process) serving passenger_wsgi.application.
+Every request opens a new connection (wsgiref cannot keep connections alive,
+and Passenger's front server talks to the app per request), so both servers
+pay the same connection cost.
+
+In-process: the same requests without any HTTP server, to isolate the
+adapter itself.
+- "asgi": the app called directly on a running loop.
+- "bridge": WsgiBridge, with its per-process loop.
+- "loop-per-request": a new event loop for every call (what a naive
+  adapter does), for reference.
+
+Needs httpx for the HTTP client (pip install httpx).
+
+Usage (from backend/):
+    python -m benchmarks.wsgi_bridge --duration 10
+"""
+import argparse
+import asyncio
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+import httpx
+
+from benchmarks.async_load import BACKEND_DIR, free_port, next_request
+from benchmarks.dataset import generate
+
+
+def serve_wsgi(port: int) -> None:
+    """Run passenger_wsgi.application under wsgiref (subprocess entry point)"""
+    from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+    from passenger_wsgi import application
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    make_server("127.0.0.1", port, application, handler_class=QuietHandler).serve_forever()
+
+
+def start_server(kind: str, url: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=url)
+    if kind == "uvicorn":
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    else:
+        command = [sys.executable, "-m", "benchmarks.wsgi_bridge", "--serve-wsgi", str(port)]
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError(f"{kind} server did not start")
+
+
+def run_http(port: int, duration: float, rows: int) -> dict:
+    latencies = []
+    errors = 0
+    # No keep-alive: a fresh connection per request for both servers
+    limits = httpx.Limits(max_keepalive_connections=0)
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            path, params = next_request(rows)
+            started = time.perf_counter()
+            try:
+                response = client.get(path, params=params)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            if response.status_code != 200:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+    return summarize(latencies, duration, errors)
+
+
+def summarize(latencies: list, duration: float, errors: int = 0) -> dict:
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else float("nan")
+
+    return {"rps": len(latencies) / duration, "p50": percentile(0.50), "p99": percentile(0.99), "errors": errors}
+
+
+def wsgi_environ(path: str, params: dict) -> dict:
+    return {
+        "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": urlencode(params or {}),
+        "SERVER_NAME": "bench", "SERVER_PORT": "80", "SERVER_PROTOCOL": "HTTP/1.1",
+        "REMOTE_ADDR": "127.0.0.1", "wsgi.input": io.BytesIO(b""), "wsgi.url_scheme": "http",
+    }
+
+
+def call_wsgi(application, environ: dict) -> int:
+    status = []
+    body = application(environ, lambda line, headers, exc_info=None: status.append(line))
+    for _ in body:
+        pass
+    if hasattr(body, "close"):
+        body.close()
+    return int(status[0].split()[0])
+
+
+def run_in_process(kind: str, duration: float, rows: int) -> dict:
+    from app.main import app
+    from app.wsgi import WsgiBridge, build_scope
+
+    async def call_asgi(environ: dict) -> int:
+        status = []
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            return messages.pop() if messages else await asyncio.Event().wait()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+
+        await app(build_scope(environ), receive, send)
+        return status[0]
+
+    latencies = []
+    if kind == "bridge":
+        bridge = WsgiBridge(app)
+        call = lambda environ: call_wsgi(bridge, environ)  # noqa: E731
+    elif kind == "loop-per-request":
+        call = lambda environ: asyncio.run(call_asgi(environ))  # noqa: E731
+    else:
+        loop = asyncio.new_event_loop()
+        call = lambda environ: loop.run_until_complete(call_asgi(environ))  # noqa: E731
+
+    # Warm up (and run the startup handlers once)
+    call(wsgi_environ("/health", None))
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        path, params = next_request(rows)
+        started = time.perf_counter()
+        if call(wsgi_environ(path, params)) == 200:
+            latencies.append(time.perf_counter() - started)
+    return summarize(latencies, duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--rows", type=int, default=10000, help="students in the test database")
+    parser.add_argument("--serve-wsgi", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    parser.add_argument("--in-process", metavar="KIND", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_wsgi:
+        serve_wsgi(args.serve_wsgi)
+        return
+    if args.in_process:
+        result = run_in_process(args.in_process, args.duration, args.rows)
+        print(f"{result['rps']} {result['p50']} {result['p99']}")
+        return
+
+    print(f"1 process, sequential requests, {args.duration:g}s per run, {args.rows} rows")
+    print(f"{'setup':<28} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{generate(Path(tmp) / 'bridge', args.rows)}"
+        for kind in ("uvicorn", "wsgi"):
+            port = free_port()
+            server = start_server(kind, url, port)
+            try:
+                result = run_http(port, args.duration, args.rows)
+            finally:
+                server.terminate()
+                server.wait()
+            print(f"{'http ' + kind:<28} {result['rps']:>8.0f} {result['p50']:>8.2f} {result['p99']:>8.2f} {result['errors']:>7}")
+
+        # Each in-process run gets a fresh interpreter (the app keeps module state)
+        for kind in ("asgi", "bridge", "loop-per-request"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.wsgi_bridge", "--in-process", kind,
+                 "--duration", str(args.duration), "--rows", str(args.rows)],
+                cwd=BACKEND_DIR, env=dict(os.environ, DATABASE_URL=url),
+                check=True, capture_output=True, text=True,
+            ).stdout.split()
+            rps, p50, p99 = map(float, output[-3:])
+            print(f"{'in-process ' + kind:<28} {rps:>8.0f} {p50:>8.2f} {p99:>8.2f} {0:>7}")
+
+
+if __name__ == "__main__":
+    main()
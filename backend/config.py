@@ -13,6 +13,67 @@ BASE_DIR = Path(__file__).parent
 # Database configuration
 DATABASE_URL = f"sqlite:///{BASE_DIR / 'students.db'}"
 
+# SQLite engine profile (see ENGINE_PROFILES in app/database.py)
+# "performance": WAL journal, synchronous=NORMAL, larger page cache, mmap,
+#                in-memory temp store, 5 s busy timeout, explicit pool sizing
+# "legacy":      SQLite defaults (rollback journal, no busy timeout)
+DB_PROFILE = "performance"
+
+# Override individual settings of the profile, e.g.
+# DB_PROFILE_OVERRIDES = {"busy_timeout_ms": 10000, "pragmas": {"cache_size": -32000}}
+DB_PROFILE_OVERRIDES = {}
+
+# Run student/blob queries on an async aiosqlite engine instead of the
+# threadpool (requires the aiosqlite package). Handlers are async either way;
+# with False each request's database work runs on a threadpool thread.
+DB_ASYNC = False
+
+# Writes (create, update, delete, import, bulk changes) go through one writer
+# thread per worker process with its own connection. Writes that arrive while
+# a transaction is being committed are applied together in the next one, each
+# in its own savepoint (group commit); reads are not affected.
+WRITE_QUEUE_ENABLED = True
+WRITE_BATCH_MAX = 64  # writes per transaction
+WRITE_BATCH_WAIT_MS = 0  # wait this long for more writes before starting a batch (0: only what is queued)
+
+# Schema migrations are applied at deploy time (python -m app.migrations upgrade,
+# see .cpanel.yml). A new database is always created on startup; set True to
+# also apply pending migrations to an existing database when a worker starts.
+DB_MIGRATE_ON_STARTUP = False
+
+# Blob storage for student photos and documents
+# Files are stored once on disk, keyed by their SHA-256 hash
+BLOB_STORAGE_DIR = BASE_DIR / "blobs"
+
+# Multipart uploads (POST /api/students/{id}/files)
+# Files are streamed to the blob store; limits are checked as the body arrives
+UPLOAD_MAX_PHOTO_BYTES = 5 * 1024 * 1024  # 5 MB
+UPLOAD_MAX_DOCUMENT_BYTES = 20 * 1024 * 1024  # 20 MB per document
+UPLOAD_MAX_REQUEST_BYTES = 50 * 1024 * 1024  # 50 MB per request
+UPLOAD_MAX_FILES = 10
+UPLOAD_PHOTO_TYPES = ["image/jpeg", "image/png", "image/webp", "image/gif"]
+UPLOAD_DOCUMENT_TYPES = [
+    "application/pdf",
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+    "text/plain",
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.ms-excel",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+]
+
+# Photo thumbnails (requires the Pillow package)
+# Square thumbnails are generated in a background process pool when a photo is
+# stored and written next to the original; list views load them instead of the
+# full image. Existing photos: python -m app.thumbnails backfill
+THUMBNAILS_ENABLED = True
+THUMBNAIL_SIZE = 96  # pixels; avatars are shown at 48 px, so 2x for high-DPI screens
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_WEBP = True  # also write a WebP variant, served to browsers that accept it
+THUMBNAIL_WORKERS = 1  # processes per app worker
+
 # CORS configuration
 # Add your domain(s) here - comma separated
 # For same-domain deployment, you can leave this empty or use '*'
@@ -31,6 +92,60 @@ ALLOWED_ORIGINS = [
 # Uncomment the line below:
 # ALLOWED_ORIGINS = ["*"]
 
+# Response compression
+# Text responses (JSON, CSV, NDJSON, HTML) of at least GZIP_MIN_SIZE bytes are
+# gzipped for clients that accept it; images and small bodies are sent as is.
+# Frontend assets are compressed once at deploy time instead
+# (python -m app.compression assets, see .cpanel.yml).
+GZIP_ENABLED = True
+GZIP_MIN_SIZE = 1024  # bytes
+GZIP_LEVEL = 5  # 1 (fastest) to 9 (smallest); 5 is most of the gain at a fraction of the CPU
+
+# Logging
+# Application logs are written to stdout as one JSON object per line
+LOG_LEVEL = "INFO"  # DEBUG, INFO, WARNING or ERROR
+
+# Fraction of INFO/DEBUG events kept per route ("METHOD /path")
+# Warnings and errors are always logged
+LOG_SAMPLE_RATES = {
+    "GET /health": 0.01,
+}
+LOG_DEFAULT_SAMPLE_RATE = 1.0
+
+# Longer string values in logged payloads are truncated
+LOG_MAX_VALUE_LENGTH = 200
+
+# Response cache
+# Encoded student responses are cached per worker process; entries are keyed by
+# row/collection versions, so writes from other workers are never served stale
+CACHE_ENABLED = True
+CACHE_MAX_ENTRIES = 1024
+CACHE_MAX_BYTES = 32 * 1024 * 1024  # 32 MB per worker
+CACHE_TTL_SECONDS = 300
+
+# Metrics
+# Request/DB/pool metrics in Prometheus text format on /metrics (per worker process)
+METRICS_ENABLED = True
+
+# Diagnostics
+# On-demand profiling: when enabled, a request sent with the header "X-Profile: 1"
+# (or ?profile=1) is profiled and the pstats file saved in PROFILE_DIR;
+# "X-Profile: text" returns the report instead of the response.
+# Leave disabled unless you are investigating a slow endpoint.
+PROFILING_ENABLED = False
+PROFILE_DIR = BASE_DIR / "profiles"
+
+# SQL statements slower than this are logged (db.slow_query) with their
+# parameters and query plan; None disables the slow-query log
+SLOW_QUERY_MS = 200
+SLOW_QUERY_EXPLAIN = True
+
+# Startup
+# Each worker logs how long its cold start took, by phase (app.startup); a
+# start slower than this is logged as a warning (app.startup_slow).
+# python -m benchmarks.cold_start measures it and fails when over budget.
+STARTUP_BUDGET_MS = 3000
+
 # Application settings
 APP_TITLE = "College Student Management API"
 APP_VERSION = "1.0.0"
@@ -11,20 +11,8 @@ sys.path.insert(0, os.path.dirname(__file__))
 # Import the FastAPI app
 from app.main import app
 
-# Convert FastAPI (ASGI) to WSGI for Passenger
-try:
-    from mangum import Mangum
-    # Wrap FastAPI app with Mangum to make it WSGI-compatible
-    application = Mangum(app)
-except ImportError:
-    # Fallback: try asgiref if mangum is not available
-    try:
-        from asgiref.wsgi import WsgiToAsgi
-        application = WsgiToAsgi(app)
-    except ImportError:
-        # If neither is available, raise an error
-        raise ImportError(
-            "Please install 'mangum' or 'asgiref' package. "
-            "Run: pip install mangum"
-        )
+# Passenger speaks WSGI: run the ASGI app on one event loop per worker
+# process (see app/wsgi.py). Startup handlers run once, on the first request.
+from app.wsgi import WsgiBridge
 
+application = WsgiBridge(app)
@@ -1,8 +1,8 @@
 import uvicorn
-from app.main import app
 
 if __name__ == "__main__":
-    # Initialize database on startup
+    # Apply pending migrations once; the app itself is imported by the
+    # reloader's worker process, not here
     from app.init_db import init_db
     init_db()
     
@@ -43,6 +43,11 @@ echo "📝 Step 4: Building your website..."
 echo "   This may take 1-2 minutes..."
 npm run build
 
+echo ""
+echo "📝 Step 5: Compressing assets..."
+cd ../backend
+python3 -m app.compression assets
+
 echo ""
 echo "═══════════════════════════════════════════════════════════"
 echo "  ✅ Build Complete!"
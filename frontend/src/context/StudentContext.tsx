@@ -1,4 +1,4 @@
-import React, { createContext, useContext, useState, useEffect, ReactNode } from 'react'
+import React, { createContext, useContext, useState, useEffect, useCallback, useRef, ReactNode } from 'react'
 import { Student, StudentFormData } from '../types/student'
 import { studentApi } from '../services/api'
 
@@ -9,18 +9,76 @@ interface StudentContextType {
   updateStudent: (id: number, student: StudentFormData) => Promise<void>
   deleteStudent: (id: number) => Promise<void>
   refreshStudents: () => Promise<void>
+  ensureLoaded: () => void
 }
 
 const StudentContext = createContext<StudentContextType | undefined>(undefined)
 
+// New files are not sent in the JSON body but uploaded separately as multipart/form-data
+const splitUploads = (studentData: StudentFormData) => {
+  const { photoFile, documents, ...fields } = studentData
+  const payload = {
+    ...fields,
+    documents: documents?.filter(doc => !doc.file)
+  }
+  const newDocuments = (documents || []).filter(doc => doc.file).map(doc => doc.file as File)
+  return { payload, photo: photoFile, documents: newDocuments }
+}
+
+const uploadFiles = async (id: number, photo: File | undefined, documents: File[]) => {
+  if (!photo && documents.length === 0) return
+  const response = await studentApi.uploadStudentFiles(id, photo, documents)
+  if (response.error) {
+    throw new Error(response.error)
+  }
+}
+
 export const useStudents = () => {
   const context = useContext(StudentContext)
   if (!context) {
     throw new Error('useStudents must be used within StudentProvider')
   }
+  // The full list is only fetched once a page that uses it is shown
+  const { ensureLoaded } = context
+  useEffect(() => {
+    ensureLoaded()
+  }, [ensureLoaded])
   return context
 }
 
+export type RosterStudent = Pick<Student, 'id' | 'firstName' | 'lastName' | 'class' | 'year'>
+
+// Students of a year and/or class, filtered on the server with only the roster
+// columns; nothing is fetched while enabled is false
+export const useRoster = (year: string, className: string, enabled: boolean = true) => {
+  const [students, setStudents] = useState<RosterStudent[]>([])
+  const [loading, setLoading] = useState(false)
+
+  useEffect(() => {
+    if (!enabled) {
+      setStudents([])
+      return
+    }
+    let cancelled = false
+    setLoading(true)
+    studentApi.getAllStudents(year || undefined, className || undefined, 'roster').then(response => {
+      if (cancelled) return
+      if (response.data) {
+        setStudents(response.data)
+      } else if (response.error) {
+        console.error('❌ Failed to load students:', response.error)
+      }
+      setLoading(false)
+    })
+    // A newer filter replaces the pending request's result
+    return () => {
+      cancelled = true
+    }
+  }, [year, className, enabled])
+
+  return { students, loading }
+}
+
 interface StudentProviderProps {
   children: ReactNode
 }
@@ -28,12 +86,7 @@ interface StudentProviderProps {
 export const StudentProvider: React.FC<StudentProviderProps> = ({ children }) => {
   const [students, setStudents] = useState<Student[]>([])
   const [loading, setLoading] = useState(true)
-
-  // Fetch students on mount
-  useEffect(() => {
-    refreshStudents()
-    // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [])
+  const loadRequested = useRef(false)
 
   const refreshStudents = async () => {
     setLoading(true)
@@ -48,12 +101,23 @@ export const StudentProvider: React.FC<StudentProviderProps> = ({ children }) =>
     setLoading(false)
   }
 
+  // Fetch students the first time a page needs them
+  const ensureLoaded = useCallback(() => {
+    if (!loadRequested.current) {
+      loadRequested.current = true
+      refreshStudents()
+    }
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [])
+
   const addStudent = async (studentData: StudentFormData) => {
     console.log('➕ Adding new student:', studentData)
-    const response = await studentApi.createStudent(studentData)
+    const { payload, photo, documents } = splitUploads(studentData)
+    const response = await studentApi.createStudent(payload)
     
     if (response.data) {
       console.log('✅ Student created successfully:', response.data)
+      await uploadFiles(response.data.id, photo, documents)
       // Refresh the list
       await refreshStudents()
     } else if (response.error) {
@@ -64,10 +128,12 @@ export const StudentProvider: React.FC<StudentProviderProps> = ({ children }) =>
 
   const updateStudent = async (id: number, studentData: StudentFormData) => {
     console.log('✏️ Updating student:', id, studentData)
-    const response = await studentApi.updateStudent(id, studentData)
+    const { payload, photo, documents } = splitUploads(studentData)
+    const response = await studentApi.updateStudent(id, payload)
     
     if (response.data) {
       console.log('✅ Student updated successfully:', response.data)
+      await uploadFiles(id, photo, documents)
       // Refresh the list
       await refreshStudents()
     } else if (response.error) {
@@ -91,7 +157,7 @@ export const StudentProvider: React.FC<StudentProviderProps> = ({ children }) =>
   }
 
   return (
-    <StudentContext.Provider value={{ students, loading, addStudent, updateStudent, deleteStudent, refreshStudents }}>
+    <StudentContext.Provider value={{ students, loading, addStudent, updateStudent, deleteStudent, refreshStudents, ensureLoaded }}>
       {children}
     </StudentContext.Provider>
   )
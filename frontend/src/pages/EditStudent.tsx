@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react'
 import { useNavigate, useParams } from 'react-router-dom'
 import { useStudents } from '../context/StudentContext'
-import { studentApi } from '../services/api'
+import { assetUrl, studentApi } from '../services/api'
 import { StudentFormData, Document } from '../types/student'
 import './RegisterStudent.css'
 
@@ -47,7 +47,7 @@ const EditStudent: React.FC = () => {
           documents: student.documents || []
         })
         if (student.photo) {
-          setPhotoPreview(student.photo)
+          setPhotoPreview(assetUrl(student.photo) || null)
         }
             console.log('✅ Student data loaded for edit')
       } else {
@@ -80,13 +80,9 @@ const EditStudent: React.FC = () => {
     const file = e.target.files?.[0]
     if (file) {
       if (file.type.startsWith('image/')) {
-        const reader = new FileReader()
-        reader.onloadend = () => {
-          const base64String = reader.result as string
-          setFormData(prev => ({ ...prev, photo: base64String }))
-          setPhotoPreview(base64String)
-        }
-        reader.readAsDataURL(file)
+        // Uploaded as a file once the student is saved
+        setFormData(prev => ({ ...prev, photoFile: file }))
+        setPhotoPreview(URL.createObjectURL(file))
       } else {
         alert('Please upload an image file')
       }
@@ -96,29 +92,15 @@ const EditStudent: React.FC = () => {
   const handleDocumentUpload = (e: React.ChangeEvent<HTMLInputElement>) => {
     const files = e.target.files
     if (files) {
-      const documentPromises: Promise<Document>[] = []
-      
-      Array.from(files).forEach(file => {
-        const promise = new Promise<Document>((resolve) => {
-          const reader = new FileReader()
-          reader.onloadend = () => {
-            resolve({
-              name: file.name,
-              data: reader.result as string,
-              type: file.type
-            })
-          }
-          reader.readAsDataURL(file)
-        })
-        documentPromises.push(promise)
-      })
-
-      Promise.all(documentPromises).then(documents => {
-        setFormData(prev => ({
-          ...prev,
-          documents: [...(prev.documents || []), ...documents]
-        }))
-      })
+      const documents: Document[] = Array.from(files).map(file => ({
+        name: file.name,
+        type: file.type,
+        file
+      }))
+      setFormData(prev => ({
+        ...prev,
+        documents: [...(prev.documents || []), ...documents]
+      }))
     }
   }
 
@@ -1,6 +1,6 @@
-import React, { useState } from 'react'
+import React, { useEffect, useState } from 'react'
 import { useNavigate } from 'react-router-dom'
-import { useStudents } from '../context/StudentContext'
+import { useRoster } from '../context/StudentContext'
 import './EnterGrades.css'
 
 interface GradeRecord {
@@ -12,7 +12,6 @@ interface GradeRecord {
 
 const EnterGrades: React.FC = () => {
   const navigate = useNavigate()
-  const { students } = useStudents()
   const [showSuccess, setShowSuccess] = useState(false)
   const [formData, setFormData] = useState({
     course: '',
@@ -22,26 +21,21 @@ const EnterGrades: React.FC = () => {
     maxScore: 100
   })
   const [gradeRecords, setGradeRecords] = useState<GradeRecord[]>([])
-  const [filteredStudents, setFilteredStudents] = useState(students)
+  // Filtered by year and class on the server, once one of them is chosen
+  const { students } = useRoster(formData.year, formData.class, Boolean(formData.year || formData.class))
+
+  useEffect(() => {
+    setGradeRecords(students.map(student => ({
+      studentId: student.id,
+      studentName: `${student.firstName} ${student.lastName}`,
+      grade: '',
+      score: 0
+    })))
+  }, [students])
 
   const handleFilterChange = (e: React.ChangeEvent<HTMLInputElement | HTMLSelectElement>) => {
     const { name, value } = e.target
     setFormData(prev => ({ ...prev, [name]: value }))
-    
-    if (name === 'year' || name === 'class') {
-      const filtered = students.filter(student => {
-        if (name === 'year' && value && student.year !== value) return false
-        if (name === 'class' && value && student.class !== value) return false
-        return true
-      })
-      setFilteredStudents(filtered)
-      setGradeRecords(filtered.map(student => ({
-        studentId: student.id,
-        studentName: `${student.firstName} ${student.lastName}`,
-        grade: '',
-        score: 0
-      })))
-    }
   }
 
   const handleGradeChange = (studentId: number, field: 'grade' | 'score', value: string | number) => {
@@ -1,6 +1,6 @@
-import React, { useState } from 'react'
+import React, { useEffect, useState } from 'react'
 import { useNavigate } from 'react-router-dom'
-import { useStudents } from '../context/StudentContext'
+import { useRoster } from '../context/StudentContext'
 import './MarkAttendance.css'
 
 interface AttendanceRecord {
@@ -11,7 +11,6 @@ interface AttendanceRecord {
 
 const MarkAttendance: React.FC = () => {
   const navigate = useNavigate()
-  const { students } = useStudents()
   const [showSuccess, setShowSuccess] = useState(false)
   const [formData, setFormData] = useState({
     date: new Date().toISOString().split('T')[0],
@@ -20,28 +19,21 @@ const MarkAttendance: React.FC = () => {
     course: ''
   })
   const [attendanceRecords, setAttendanceRecords] = useState<AttendanceRecord[]>([])
-  const [filteredStudents, setFilteredStudents] = useState(students)
+  // Filtered by year and class on the server, once one of them is chosen
+  const { students } = useRoster(formData.year, formData.class, Boolean(formData.year || formData.class))
+
+  // Initialize attendance records for the students of the selected year and class
+  useEffect(() => {
+    setAttendanceRecords(students.map(student => ({
+      studentId: student.id,
+      studentName: `${student.firstName} ${student.lastName}`,
+      status: 'present' as const
+    })))
+  }, [students])
 
   const handleFilterChange = (e: React.ChangeEvent<HTMLInputElement | HTMLSelectElement>) => {
     const { name, value } = e.target
     setFormData(prev => ({ ...prev, [name]: value }))
-    
-    // Filter students based on year and class
-    if (name === 'year' || name === 'class') {
-      const filtered = students.filter(student => {
-        if (name === 'year' && value && student.year !== value) return false
-        if (name === 'class' && value && student.class !== value) return false
-        return true
-      })
-      setFilteredStudents(filtered)
-      
-      // Initialize attendance records for filtered students
-      setAttendanceRecords(filtered.map(student => ({
-        studentId: student.id,
-        studentName: `${student.firstName} ${student.lastName}`,
-        status: 'present' as const
-      })))
-    }
   }
 
   const handleStatusChange = (studentId: number, status: 'present' | 'absent' | 'late' | 'excused') => {
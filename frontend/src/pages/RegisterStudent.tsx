@@ -33,13 +33,9 @@ const RegisterStudent: React.FC = () => {
     const file = e.target.files?.[0]
     if (file) {
       if (file.type.startsWith('image/')) {
-        const reader = new FileReader()
-        reader.onloadend = () => {
-          const base64String = reader.result as string
-          setFormData(prev => ({ ...prev, photo: base64String }))
-          setPhotoPreview(base64String)
-        }
-        reader.readAsDataURL(file)
+        // Uploaded as a file once the student is saved
+        setFormData(prev => ({ ...prev, photoFile: file }))
+        setPhotoPreview(URL.createObjectURL(file))
       } else {
         alert('Please upload an image file')
       }
@@ -49,29 +45,15 @@ const RegisterStudent: React.FC = () => {
   const handleDocumentUpload = (e: React.ChangeEvent<HTMLInputElement>) => {
     const files = e.target.files
     if (files) {
-      const documentPromises: Promise<Document>[] = []
-      
-      Array.from(files).forEach(file => {
-        const promise = new Promise<Document>((resolve) => {
-          const reader = new FileReader()
-          reader.onloadend = () => {
-            resolve({
-              name: file.name,
-              data: reader.result as string,
-              type: file.type
-            })
-          }
-          reader.readAsDataURL(file)
-        })
-        documentPromises.push(promise)
-      })
-
-      Promise.all(documentPromises).then(documents => {
-        setFormData(prev => ({
-          ...prev,
-          documents: [...(prev.documents || []), ...documents]
-        }))
-      })
+      const documents: Document[] = Array.from(files).map(file => ({
+        name: file.name,
+        type: file.type,
+        file
+      }))
+      setFormData(prev => ({
+        ...prev,
+        documents: [...(prev.documents || []), ...documents]
+      }))
     }
   }
 
@@ -1,17 +1,18 @@
 import React, { useState } from 'react'
 import { useNavigate } from 'react-router-dom'
-import { useStudents } from '../context/StudentContext'
+import { useRoster } from '../context/StudentContext'
 import './StudentEnrollment.css'
 
 const StudentEnrollment: React.FC = () => {
   const navigate = useNavigate()
-  const { students } = useStudents()
   const [showSuccess, setShowSuccess] = useState(false)
   const [filters, setFilters] = useState({
     course: '',
     year: '',
     class: ''
   })
+  // Filtered by year and class on the server
+  const { students: filteredStudents } = useRoster(filters.year, filters.class)
   const [selectedStudents, setSelectedStudents] = useState<number[]>([])
 
   const courses = [
@@ -27,12 +28,6 @@ const StudentEnrollment: React.FC = () => {
     setFilters(prev => ({ ...prev, [name]: value }))
   }
 
-  const filteredStudents = students.filter(student => {
-    if (filters.year && student.year !== filters.year) return false
-    if (filters.class && student.class !== filters.class) return false
-    return true
-  })
-
   const handleStudentToggle = (studentId: number) => {
     setSelectedStudents(prev =>
       prev.includes(studentId)
@@ -63,7 +58,7 @@ const StudentEnrollment: React.FC = () => {
     console.log('Enrollment:', {
       course: filters.course,
       students: selectedStudents,
-      studentDetails: students.filter(s => selectedStudents.includes(s.id))
+      studentDetails: filteredStudents.filter(s => selectedStudents.includes(s.id))
     })
 
     setShowSuccess(true)
@@ -1,21 +1,28 @@
-import React, { useMemo } from 'react'
+import React, { useEffect, useMemo, useState } from 'react'
 import { useNavigate } from 'react-router-dom'
-import { useStudents } from '../context/StudentContext'
+import { studentApi } from '../services/api'
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, Cell } from 'recharts'
 import './Students.css'
 
 const Students: React.FC = () => {
   const navigate = useNavigate()
-  const { students } = useStudents()
+  const [yearCounts, setYearCounts] = useState<{ [key: string]: number }>({})
 
-  // Calculate class-wise student strength from actual data
-  const classData = useMemo(() => {
-    const yearCounts: { [key: string]: number } = {}
-    
-    students.forEach(student => {
-      yearCounts[student.year] = (yearCounts[student.year] || 0) + 1
+  // Counts come from the server-side summary, without loading every student
+  useEffect(() => {
+    studentApi.getStudentStats().then(response => {
+      if (response.data) {
+        const counts: { [key: string]: number } = {}
+        response.data.counts.year.forEach(({ value, count }) => {
+          counts[String(value)] = count
+        })
+        setYearCounts(counts)
+      }
     })
+  }, [])
 
+  // Class-wise student strength
+  const classData = useMemo(() => {
     return [
       { class: '1st Year', students: yearCounts['1st Year'] || 0 },
       { class: '2nd Year', students: yearCounts['2nd Year'] || 0 },
@@ -23,7 +30,7 @@ const Students: React.FC = () => {
       { class: '4th Year', students: yearCounts['4th Year'] || 0 },
       { class: 'Graduate', students: yearCounts['Graduate'] || 0 }
     ]
-  }, [students])
+  }, [yearCounts])
 
   const handleRegisterClick = () => {
     navigate('/students/register')
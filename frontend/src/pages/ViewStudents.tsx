@@ -1,7 +1,8 @@
 import React, { useState, useEffect } from 'react'
 import { useNavigate, useSearchParams } from 'react-router-dom'
 import { useStudents } from '../context/StudentContext'
-import { Student } from '../types/student'
+import { assetUrl, studentApi } from '../services/api'
+import { Document, Student } from '../types/student'
 import './ViewStudents.css'
 
 const ViewStudents: React.FC = () => {
@@ -13,6 +14,8 @@ const ViewStudents: React.FC = () => {
     class: ''
   })
   const [editingStudent, setEditingStudent] = useState<Student | null>(null)
+  const [searchQuery, setSearchQuery] = useState('')
+  const [searchResults, setSearchResults] = useState<Student[] | null>(null)
 
   // Initialize filters from URL params
   useEffect(() => {
@@ -27,6 +30,22 @@ const ViewStudents: React.FC = () => {
     }
   }, [searchParams])
 
+  // Search on the server (debounced) instead of filtering the whole list here
+  useEffect(() => {
+    const q = searchQuery.trim()
+    if (!q) {
+      setSearchResults(null)
+      return
+    }
+    const timer = setTimeout(async () => {
+      const response = await studentApi.searchStudents(q, filters.year, filters.class)
+      if (response.data) {
+        setSearchResults(response.data)
+      }
+    }, 250)
+    return () => clearTimeout(timer)
+  }, [searchQuery, filters.year, filters.class, students])
+
   const handleFilterChange = (e: React.ChangeEvent<HTMLSelectElement>) => {
     const { name, value } = e.target
     setFilters(prev => ({
@@ -52,17 +71,28 @@ const ViewStudents: React.FC = () => {
     }
   }
 
-  const handleDownloadDocument = (doc: { name: string; data: string; type: string }, studentName: string) => {
+  const handleDownloadDocument = async (doc: Document, studentName: string) => {
     try {
-      // Convert base64 to blob
-      const base64Data = doc.data.includes(',') ? doc.data.split(',')[1] : doc.data
-      const byteCharacters = atob(base64Data)
-      const byteNumbers = new Array(byteCharacters.length)
-      for (let i = 0; i < byteCharacters.length; i++) {
-        byteNumbers[i] = byteCharacters.charCodeAt(i)
+      let blob: Blob
+      if (doc.url) {
+        // Stored documents are served from the blob endpoint
+        const response = await fetch(assetUrl(doc.url) as string)
+        if (!response.ok) {
+          throw new Error('Failed to fetch document')
+        }
+        blob = await response.blob()
+      } else {
+        // Convert base64 to blob
+        const data = doc.data || ''
+        const base64Data = data.includes(',') ? data.split(',')[1] : data
+        const byteCharacters = atob(base64Data)
+        const byteNumbers = new Array(byteCharacters.length)
+        for (let i = 0; i < byteCharacters.length; i++) {
+          byteNumbers[i] = byteCharacters.charCodeAt(i)
+        }
+        const byteArray = new Uint8Array(byteNumbers)
+        blob = new Blob([byteArray], { type: doc.type })
       }
-      const byteArray = new Uint8Array(byteNumbers)
-      const blob = new Blob([byteArray], { type: doc.type })
 
       // Create download link
       const url = URL.createObjectURL(blob)
@@ -79,7 +109,7 @@ const ViewStudents: React.FC = () => {
     }
   }
 
-  const filteredStudents = students.filter(student => {
+  const filteredStudents = searchResults ?? students.filter(student => {
     if (filters.year && student.year !== filters.year) return false
     if (filters.class && student.class !== filters.class) return false
     return true
@@ -87,6 +117,7 @@ const ViewStudents: React.FC = () => {
 
   const clearFilters = () => {
     setFilters({ year: '', class: '' })
+    setSearchQuery('')
   }
 
   return (
@@ -106,6 +137,17 @@ const ViewStudents: React.FC = () => {
         <div className="filter-section">
           <h2>Filter Students</h2>
           <div className="filter-form">
+            <div className="filter-group">
+              <label htmlFor="filter-search">Search</label>
+              <input
+                id="filter-search"
+                type="search"
+                placeholder="Name, email or major"
+                value={searchQuery}
+                onChange={(e) => setSearchQuery(e.target.value)}
+              />
+            </div>
+
             <div className="filter-group">
               <label htmlFor="filter-year">Year</label>
               <select
@@ -184,7 +226,7 @@ const ViewStudents: React.FC = () => {
                       <td>
                         {student.photo ? (
                           <div className="student-photo">
-                            <img src={student.photo} alt={`${student.firstName} ${student.lastName}`} />
+                            <img src={assetUrl(student.thumbnail || student.photo)} loading="lazy" alt={`${student.firstName} ${student.lastName}`} />
                           </div>
                         ) : (
                           <div className="student-photo-placeholder">
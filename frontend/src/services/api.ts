@@ -1,9 +1,20 @@
+import { StudentStats } from '../types/student'
+
 // Use environment variable for API URL, fallback to relative path for same-domain deployment
 // For GoDaddy: API will be on same domain, so use relative path
 // For development: use localhost
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 
   (import.meta.env.DEV ? 'http://localhost:8000/api' : '/api')
 
+// Page size used when walking the student list with cursors
+const STUDENT_PAGE_SIZE = 500
+
+// Blob URLs returned by the API (/api/blobs/...) are relative to the API origin
+export const assetUrl = (path?: string): string | undefined => {
+  if (!path || !path.startsWith('/api/')) return path
+  return API_BASE_URL.replace(/\/api\/?$/, '') + path
+}
+
 export interface ApiResponse<T> {
   data?: T
   error?: string
@@ -11,40 +22,95 @@ export interface ApiResponse<T> {
 
 // Student API calls
 export const studentApi = {
-  // Get all students
-  async getAllStudents(year?: string, class_name?: string): Promise<ApiResponse<any[]>> {
+  // Get all students, following the X-Next-Cursor header page by page.
+  // fields: a projection such as 'roster' to fetch only those columns
+  async getAllStudents(year?: string, class_name?: string, fields?: string): Promise<ApiResponse<any[]>> {
     try {
       const params = new URLSearchParams()
       if (year) params.append('year', year)
       if (class_name) params.append('class_name', class_name)
+      if (fields) params.append('fields', fields)
+      params.append('sort', 'last_name')
+      params.append('limit', String(STUDENT_PAGE_SIZE))
       
-      const url = `${API_BASE_URL}/students${params.toString() ? '?' + params.toString() : ''}`
       console.log('='.repeat(80))
       console.log('🟢 FRONTEND API CALL: GET /api/students')
-      console.log('📤 Endpoint:', url)
       console.log('📥 Query Parameters:')
       console.log('   - year:', year || 'none')
       console.log('   - class_name:', class_name || 'none')
+      console.log('   - fields:', fields || 'full')
       console.log('='.repeat(80))
       
-      const response = await fetch(url)
-      const data = await response.json()
+      const students: any[] = []
+      let cursor: string | null = null
+      do {
+        if (cursor) params.set('cursor', cursor)
+        const url = `${API_BASE_URL}/students/?${params.toString()}`
+        console.log('📤 Endpoint:', url)
+        
+        const response = await fetch(url)
+        const data = await response.json()
+        
+        if (!response.ok) {
+          throw new Error(data.detail || 'Failed to fetch students')
+        }
+        
+        students.push(...data)
+        cursor = response.headers.get('X-Next-Cursor')
+      } while (cursor)
       
       console.log('='.repeat(80))
       console.log('✅ FRONTEND API RESPONSE: GET /api/students')
-      console.log('📥 Response Status:', response.status)
-      console.log('📥 Response Data:', data)
-      console.log(`📥 Records Count: ${Array.isArray(data) ? data.length : 'N/A'}`)
+      console.log(`📥 Records Count: ${students.length}`)
       console.log('='.repeat(80))
       
+      return { data: students }
+    } catch (error: any) {
+      console.error('❌ API Error - GET Students:', error)
+      return { error: error.message || 'Failed to fetch students' }
+    }
+  },
+
+  // Search students by name, email or major (server-side full-text index)
+  async searchStudents(q: string, year?: string, class_name?: string): Promise<ApiResponse<any[]>> {
+    try {
+      const params = new URLSearchParams({ q })
+      if (year) params.append('year', year)
+      if (class_name) params.append('class_name', class_name)
+      
+      const url = `${API_BASE_URL}/students/search?${params.toString()}`
+      const response = await fetch(url)
+      const data = await response.json()
+      
       if (!response.ok) {
-        throw new Error(data.detail || 'Failed to fetch students')
+        throw new Error(data.detail || 'Failed to search students')
       }
       
       return { data }
     } catch (error: any) {
-      console.error('❌ API Error - GET Students:', error)
-      return { error: error.message || 'Failed to fetch students' }
+      console.error('❌ API Error - Search Students:', error)
+      return { error: error.message || 'Failed to search students' }
+    }
+  },
+
+  // Student counts by year, class, major and enrollment year (server-side summary table)
+  async getStudentStats(crosstab?: string): Promise<ApiResponse<StudentStats>> {
+    try {
+      const params = new URLSearchParams()
+      if (crosstab) params.append('crosstab', crosstab)
+      
+      const url = `${API_BASE_URL}/students/stats?${params.toString()}`
+      const response = await fetch(url)
+      const data = await response.json()
+      
+      if (!response.ok) {
+        throw new Error(data.detail || 'Failed to fetch student statistics')
+      }
+      
+      return { data }
+    } catch (error: any) {
+      console.error('❌ API Error - Student Stats:', error)
+      return { error: error.message || 'Failed to fetch student statistics' }
     }
   },
 
@@ -173,6 +239,46 @@ export const studentApi = {
     }
   },
 
+  // Upload a photo and/or documents for a student as multipart/form-data
+  async uploadStudentFiles(id: number, photo?: File, documents: File[] = []): Promise<ApiResponse<any>> {
+    try {
+      const url = `${API_BASE_URL}/students/${id}/files`
+      console.log('='.repeat(80))
+      console.log('🟢 FRONTEND API CALL: POST /api/students/:id/files')
+      console.log('📤 Endpoint:', url)
+      console.log('📥 Path Parameter: id =', id)
+      console.log('   - photo:', photo ? photo.name : 'none')
+      console.log('   - documents:', documents.map(file => file.name))
+      console.log('='.repeat(80))
+      
+      const body = new FormData()
+      if (photo) body.append('photo', photo)
+      documents.forEach(file => body.append('documents', file))
+      
+      // The browser sets the multipart Content-Type with its boundary
+      const response = await fetch(url, {
+        method: 'POST',
+        body,
+      })
+      
+      const data = await response.json()
+      console.log('='.repeat(80))
+      console.log('✅ FRONTEND API RESPONSE: POST /api/students/:id/files')
+      console.log('📥 Response Status:', response.status)
+      console.log('📥 Response Data:', data)
+      console.log('='.repeat(80))
+      
+      if (!response.ok) {
+        throw new Error(data.detail || 'Failed to upload files')
+      }
+      
+      return { data }
+    } catch (error: any) {
+      console.error('❌ API Error - POST Student files:', error)
+      return { error: error.message || 'Failed to upload files' }
+    }
+  },
+
   // Delete student
   async deleteStudent(id: number): Promise<ApiResponse<void>> {
     try {
@@ -1,6 +1,8 @@
 export interface Document {
   name: string
-  data: string // base64 encoded file data
+  data?: string // base64 encoded file data (new uploads)
+  url?: string // blob URL of a stored file (returned by the API)
+  file?: File // new upload, sent as multipart/form-data after the record is saved
   type: string // MIME type
 }
 
@@ -14,7 +16,8 @@ export interface Student {
   major: string
   class: string
   year: string
-  photo?: string // base64 encoded image
+  photo?: string // blob URL of the stored image
+  thumbnail?: string // small square version of the photo (falls back to the photo until generated)
   documents?: Document[]
 }
 
@@ -28,5 +31,25 @@ export interface StudentFormData {
   class: string
   year: string
   photo?: string
+  photoFile?: File // new photo, sent as multipart/form-data after the record is saved
   documents?: Document[]
 }
+
+export interface StatsCount {
+  value: string | number | null
+  count: number
+}
+
+export interface StudentStats {
+  total: number
+  counts: {
+    year: StatsCount[]
+    class: StatsCount[]
+    major: StatsCount[]
+    enrollmentYear: StatsCount[]
+  }
+  crosstab?: {
+    dimensions: string[]
+    cells: Array<{ [dimension: string]: string | number | null }>
+  }
+}